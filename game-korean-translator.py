@@ -1,17 +1,19 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext
-import pyautogui
-import pytesseract
+from tkinter import ttk, scrolledtext, messagebox
 from PIL import Image, ImageTk, ImageDraw, ImageFont
-import cv2
-import numpy as np
-from googletrans import Translator
-import threading
-import time
-import keyboard
 from datetime import datetime
-import json
 import os
+from translator_core.config import PipelineConfig
+from translator_core.engine import ENGINE_MODULES, TranslationEngine
+from translator_core.history import HistoryStore
+from translator_core.ocr_cache import OcrCache
+from translator_core.lazy import lazy_import, warm_up
+from translator_core.session import CaptureSession
+
+# 重量級模組延遲載入，讓視窗先顯示
+pyautogui = lazy_import('pyautogui')
+pytesseract = lazy_import('pytesseract')
+keyboard = lazy_import('keyboard')
 
 class GameTranslatorApp:
     def __init__(self, root):
@@ -19,8 +21,17 @@ class GameTranslatorApp:
         self.root.title("遊戲韓文即時翻譯器")
         self.root.geometry("800x600")
         
-        # 初始化翻譯器
-        self.translator = Translator()
+        # 翻譯管線（OCR、翻譯快取與歷史記錄）：韓文 → 繁中，固定每 0.5 秒檢查一次
+        self.history_store = HistoryStore()
+        self.ocr_cache = OcrCache()
+        self.engine = TranslationEngine(self.history_store, ocr_cache=self.ocr_cache, config=PipelineConfig(
+            preprocessing='basic',
+            language='kor',
+            languages=('kor',),
+            target_language='zh-tw',
+            interval=0.5
+        ))
+        self.session = CaptureSession(self.engine)
         
         # 狀態變數
         self.is_capturing = False
@@ -33,8 +44,13 @@ class GameTranslatorApp:
         # 建立UI
         self.create_ui()
         
-        # 設定快捷鍵
-        self.setup_hotkeys()
+        # 翻譯服務中斷或恢復時更新狀態列
+        self.engine.translation.breaker.on_change = lambda state, retry_in: self.root.after(
+            0, self.update_service_status
+        )
+        
+        # 背景預載重量級模組，完成後設定快捷鍵
+        warm_up(ENGINE_MODULES + [keyboard], then=self.setup_hotkeys)
         
     def setup_styles(self):
         """設定視覺樣式"""
@@ -202,6 +218,7 @@ class GameTranslatorApp:
                 
                 if x2 - x1 > 10 and y2 - y1 > 10:  # 最小區域限制
                     self.capture_region = (x1, y1, x2 - x1, y2 - y1)
+                    self.engine.config.publish(region=self.capture_region)
                     self.status_label.config(
                         text=f"已選擇區域: {x2-x1}x{y2-y1}",
                         fg='#4CAF50'
@@ -233,77 +250,42 @@ class GameTranslatorApp:
         if self.is_capturing:
             self.toggle_btn.config(text="停止偵測", bg='#f44336')
             self.status_label.config(text="正在偵測中...", fg='#4CAF50')
-            # 啟動擷取執行緒
-            self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
-            self.capture_thread.start()
+            # 啟動擷取工作（同一時間只會有一個）
+            self.start_capture_session()
         else:
+            # 要求停止，不等待進行中的階段；結束時回報停止延遲
+            self.session.stop(wait=False)
             self.toggle_btn.config(text="開始偵測", bg='#2196F3')
             self.status_label.config(text="已停止偵測", fg='#FFC107')
             
-    def capture_loop(self):
-        """擷取循環"""
-        last_text = ""
-        
-        while self.is_capturing:
-            try:
-                # 擷取指定區域
-                x, y, w, h = self.capture_region
-                screenshot = pyautogui.screenshot(region=(x, y, w, h))
-                
-                # 轉換為OpenCV格式
-                img_cv = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-                
-                # 影像預處理
-                processed_img = self.preprocess_image(img_cv)
-                
-                # OCR識別韓文
-                korean_text = pytesseract.image_to_string(
-                    processed_img,
-                    lang='kor',
-                    config='--psm 6'
-                ).strip()
-                
-                # 如果識別到新文字
-                if korean_text and korean_text != last_text:
-                    last_text = korean_text
-                    
-                    # 翻譯
-                    chinese_text = self.translate_text(korean_text)
-                    
-                    # 更新UI
-                    self.root.after(0, self.update_display, screenshot, korean_text, chinese_text)
-                    
-                # 更新預覽（每秒更新）
-                self.root.after(0, self.update_preview, screenshot)
-                
-            except Exception as e:
-                print(f"擷取錯誤: {e}")
-                
-            time.sleep(0.5)  # 每0.5秒檢查一次
-            
-    def preprocess_image(self, img):
-        """影像預處理以改善OCR效果"""
-        # 轉換為灰階
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # 放大影像
-        scaled = cv2.resize(gray, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
-        
-        # 應用二值化
-        _, binary = cv2.threshold(scaled, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        # 去噪
-        denoised = cv2.medianBlur(binary, 3)
-        
-        return denoised
+    def start_capture_session(self):
+        """啟動擷取工作，回呼一律轉交 UI 執行緒"""
+        self.session.start(
+            on_result=lambda screenshot, result, translation: self.root.after(
+                0, self.update_display, screenshot, result['text'], translation
+            ),
+            on_preview=lambda screenshot: self.root.after(0, self.update_preview, screenshot),
+            on_stopped=lambda latency: self.root.after(0, self.on_capture_stopped, latency)
+        )
         
-    def translate_text(self, korean_text):
-        """翻譯韓文為中文"""
-        try:
-            result = self.translator.translate(korean_text, src='ko', dest='zh-tw')
-            return result.text
-        except Exception as e:
-            return f"翻譯錯誤: {str(e)}"
+    def on_capture_stopped(self, latency):
+        """擷取工作結束（於 UI 執行緒執行）"""
+        if not self.is_capturing:
+            self.status_label.config(text=f"已停止偵測 (停止耗時 {latency * 1000:.0f} ms)", fg='#FFC107')
+        
+    def update_service_status(self):
+        """顯示翻譯服務狀態；中斷期間每秒更新重試倒數"""
+        breaker = self.engine.translation.breaker
+        if breaker.state == 'open':
+            self.status_label.config(
+                text=f"翻譯服務中斷，僅使用快取 ({breaker.retry_in():.0f} 秒後重試)",
+                fg='#f44336'
+            )
+            self.root.after(1000, self.update_service_status)
+        elif breaker.state == 'half_open':
+            self.status_label.config(text="正在重新連線翻譯服務...", fg='#FFC107')
+        else:
+            self.status_label.config(text="翻譯服務已恢復", fg='#4CAF50')
             
     def update_preview(self, screenshot):
         """更新預覽圖片"""
@@ -350,18 +332,43 @@ class GameTranslatorApp:
         """清除翻譯歷史"""
         self.translation_text.delete(1.0, tk.END)
         self.translation_history.clear()
+        self.history_store.clear(self.history_store.session)
         self.status_label.config(text="已清除歷史", fg='#4CAF50')
         
     def save_history(self):
-        """儲存翻譯歷史"""
-        if not self.translation_history:
+        """儲存本次執行的翻譯歷史（背景寫入）"""
+        if not self.history_store.has_records(self.history_store.session):
             return
             
         filename = f"translation_history_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.translation_history, f, ensure_ascii=False, indent=2)
-            
-        self.status_label.config(text=f"已儲存至 {filename}", fg='#4CAF50')
+        
+        def on_done(count, error):
+            if error:
+                messagebox.showerror("錯誤", f"儲存失敗: {str(error)}")
+                self.status_label.config(text="儲存失敗", fg='#f44336')
+            else:
+                self.status_label.config(text=f"已儲存至 {filename}", fg='#4CAF50')
+                
+        self.history_store.export_async(
+            filename,
+            None,
+            None,
+            transform=lambda item: {
+                'timestamp': item['timestamp'],
+                'korean': item['source'],
+                'chinese': item['target']
+            },
+            session=self.history_store.session,
+            on_done=lambda count, error: self.root.after(0, on_done, count, error)
+        )
+        
+    def on_closing(self):
+        """關閉程式時的處理"""
+        self.is_capturing = False
+        self.session.stop(timeout=2.0)
+        self.history_store.close()
+        self.ocr_cache.close()
+        self.root.destroy()
 
 def main():
     # 檢查必要的套件和設定
@@ -376,6 +383,7 @@ def main():
     # 建立主視窗
     root = tk.Tk()
     app = GameTranslatorApp(root)
+    root.protocol("WM_DELETE_WINDOW", app.on_closing)
     
     # 啟動主循環
     root.mainloop()
@@ -1,89 +1,33 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import pyautogui
-import pytesseract
 from PIL import Image, ImageTk, ImageDraw, ImageFont, ImageEnhance
-import cv2
-import numpy as np
-from googletrans import Translator
 import threading
-import time
-import keyboard
 from datetime import datetime
 import json
 import os
 import sys
-from collections import deque
-import easyocr
 import ctypes
+from translator_core.color_picker import TextColorCalibrator
+from translator_core.engine import ENGINE_MODULES, TranslationEngine, capture_region
+from translator_core.history import HistoryStore
+from translator_core.ocr_cache import OcrCache
+from translator_core.ocr_worker import DEFAULT_IDLE_TIMEOUT, OcrWorker
+from translator_core.recent import RecentHistory
+from translator_core.overlay import OverlayWindow
+from translator_core.corpus import compile_corpus, corpus_path, load_corpus, read_corpus_lines
+from translator_core.lazy import lazy_import, warm_up
+from translator_core.recorder import RECORDING_DIR, SessionRecorder, recording_path
+from translator_core.phrases import compile_phrase_table, load_phrase_table, phrase_table_path, read_phrase_pairs
+from translator_core.session import CaptureSession
+from translator_core.textcolor import TextColorModel
+from translator_core.tuning import PROFILE_DIR, load_ocr_profile
+from translator_core.perf_panel import PerformancePanel
 
-class OverlayWindow:
-    """透明覆蓋視窗，用於在遊戲上顯示翻譯"""
-    def __init__(self, parent_app):
-        self.parent_app = parent_app
-        self.window = None
-        self.is_showing = False
-        
-    def create_overlay(self):
-        """建立覆蓋視窗"""
-        self.window = tk.Toplevel()
-        self.window.title("翻譯覆蓋")
-        
-        # 設定視窗屬性
-        self.window.attributes('-topmost', True)
-        self.window.attributes('-alpha', 0.8)
-        self.window.overrideredirect(True)
-        
-        # 設定視窗樣式
-        self.window.configure(bg='black')
-        
-        # 翻譯文字標籤
-        self.text_label = tk.Label(
-            self.window,
-            text="",
-            bg='black',
-            fg='yellow',
-            font=('Microsoft JhengHei', 14, 'bold'),
-            wraplength=400,
-            justify=tk.LEFT
-        )
-        self.text_label.pack(padx=10, pady=10)
-        
-        # 使視窗可拖動
-        self.window.bind('<Button-1>', self.start_move)
-        self.window.bind('<B1-Motion>', self.on_move)
-        
-        # 初始位置
-        self.window.geometry("+100+100")
-        
-    def start_move(self, event):
-        self.x = event.x
-        self.y = event.y
-        
-    def on_move(self, event):
-        deltax = event.x - self.x
-        deltay = event.y - self.y
-        x = self.window.winfo_x() + deltax
-        y = self.window.winfo_y() + deltay
-        self.window.geometry(f"+{x}+{y}")
-        
-    def update_text(self, text):
-        """更新覆蓋文字"""
-        if not self.window:
-            self.create_overlay()
-        self.text_label.config(text=text)
-        
-    def toggle(self):
-        """切換顯示/隱藏"""
-        if not self.window:
-            self.create_overlay()
-            self.is_showing = True
-        else:
-            if self.is_showing:
-                self.window.withdraw()
-            else:
-                self.window.deiconify()
-            self.is_showing = not self.is_showing
+# 重量級模組延遲載入，讓視窗先顯示（easyocr 會載入 torch）
+pyautogui = lazy_import('pyautogui')
+pytesseract = lazy_import('pytesseract')
+keyboard = lazy_import('keyboard')
+easyocr = lazy_import('easyocr')
 
 class GameTranslatorEnhanced:
     def __init__(self, root):
@@ -91,30 +35,39 @@ class GameTranslatorEnhanced:
         self.root.title("遊戲韓文翻譯器 Pro v2.0")
         self.root.geometry("1000x700")
         
-        # 初始化元件
-        self.translator = Translator()
+        # 初始化元件（OCR、翻譯快取與歷史記錄都由翻譯管線負責）
+        self.history_store = HistoryStore()
+        self.ocr_cache = OcrCache()
+        self.ocr_profile = None
+        self.engine = TranslationEngine(self.history_store, ocr_cache=self.ocr_cache)
+        self.ocr_worker = OcrWorker(metrics=self.engine.metrics)
+        self.session = CaptureSession(self.engine)
         self.overlay = OverlayWindow(self)
         
-        # 初始化 EasyOCR（可選）
-        self.ocr_engine = 'tesseract'  # 預設使用 tesseract
-        self.easyocr_reader = None
-        
         # 狀態變數
         self.is_capturing = False
         self.capture_region = None
-        self.translation_cache = {}
-        self.translation_history = deque(maxlen=100)
+        self.translation_history = RecentHistory(maxlen=100)
         self.hotkey_enabled = True
         
         # 設定
         self.settings = {
             'ocr_engine': 'tesseract',
+            'easyocr_threads': 2,
+            'easyocr_onnx': False,
             'translation_api': 'google',
             'update_interval': 0.5,
             'preprocessing': True,
             'overlay_enabled': False,
             'auto_copy': False,
-            'sound_notification': False
+            'sound_notification': False,
+            'phrase_table': '',
+            'script_corpus': '',
+            'ocr_profile': '',
+            'ocr_worker': True,
+            'ocr_idle_timeout': DEFAULT_IDLE_TIMEOUT,
+            'color_mask': False,
+            'text_colors': []
         }
         
         # 載入設定
@@ -126,8 +79,32 @@ class GameTranslatorEnhanced:
         # 建立UI
         self.create_ui()
         
-        # 設定快捷鍵
-        self.setup_hotkeys()
+        # 翻譯服務中斷或恢復時更新狀態列
+        self.engine.translation.breaker.on_change = lambda state, retry_in: self.root.after(
+            0, self.update_service_status
+        )
+        
+        # 文字顏色模型
+        self.text_colors = TextColorModel.from_list(self.settings['text_colors'])
+        self.update_text_color_label()
+        
+        # 載入遊戲詞彙表與劇本語料
+        self.load_phrase_table(self.settings['phrase_table'])
+        self.load_script_corpus(self.settings['script_corpus'])
+        self.load_ocr_profile(self.settings['ocr_profile'])
+        self.apply_ocr_worker()
+        
+        # 發布管線設定，之後設定變更時自動重新發布
+        self.publish_config()
+        for var in (self.preprocessing_var, self.color_mask_var, self.ocr_var, self.interval_var):
+            var.trace_add('write', self.publish_config)
+        
+        # 背景預載重量級模組，完成後設定快捷鍵
+        modules = ENGINE_MODULES + [keyboard]
+        # 使用 OCR 工作程序時 EasyOCR 在工作程序內載入
+        if self.settings['ocr_engine'] == 'easyocr' and not self.settings['ocr_worker']:
+            modules.append(easyocr)
+        warm_up(modules, then=self.setup_hotkeys)
         
     def setup_styles(self):
         """設定視覺樣式"""
@@ -165,6 +142,11 @@ class GameTranslatorEnhanced:
         notebook.add(history_tab, text="歷史")
         self.create_history_tab(history_tab)
         
+        # 效能頁面
+        perf_tab = ttk.Frame(notebook)
+        notebook.add(perf_tab, text="效能")
+        self.perf_panel = PerformancePanel(perf_tab, self.engine.metrics)
+        
         # 狀態列
         self.create_status_bar()
         
@@ -334,6 +316,39 @@ class GameTranslatorEnhanced:
             activeforeground='white'
         ).pack(anchor=tk.W, padx=20, pady=5)
         
+        # EasyOCR 使用的 CPU 執行緒（下次載入 EasyOCR 時生效）
+        threads_frame = tk.Frame(ocr_frame, bg='#1e1e1e')
+        threads_frame.pack(anchor=tk.W, padx=40, pady=5)
+        
+        tk.Label(
+            threads_frame,
+            text="EasyOCR 執行緒:",
+            bg='#1e1e1e',
+            fg='white'
+        ).pack(side=tk.LEFT)
+        
+        self.easyocr_threads_var = tk.IntVar(value=self.settings['easyocr_threads'])
+        tk.Spinbox(
+            threads_frame,
+            from_=1,
+            to=os.cpu_count() or 1,
+            textvariable=self.easyocr_threads_var,
+            width=4
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # 已匯出 int8 ONNX 模型時以 ONNX Runtime 執行（python -m translator_core.onnx_easyocr export）
+        self.easyocr_onnx_var = tk.BooleanVar(value=self.settings['easyocr_onnx'])
+        tk.Checkbutton(
+            ocr_frame,
+            text="EasyOCR 使用 int8 ONNX 模型 (CPU)",
+            variable=self.easyocr_onnx_var,
+            bg='#1e1e1e',
+            fg='white',
+            selectcolor='#1e1e1e',
+            activebackground='#1e1e1e',
+            activeforeground='white'
+        ).pack(anchor=tk.W, padx=40, pady=5)
+        
         # 功能設定
         feature_frame = tk.LabelFrame(
             settings_frame,
@@ -394,6 +409,237 @@ class GameTranslatorEnhanced:
         )
         interval_scale.pack(side=tk.LEFT, padx=10)
         
+        # 遊戲詞彙表
+        phrase_frame = tk.LabelFrame(
+            settings_frame,
+            text="遊戲詞彙表",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        phrase_frame.pack(fill=tk.X, pady=10)
+        
+        self.phrase_label = tk.Label(
+            phrase_frame,
+            text="未載入",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.phrase_label.pack(side=tk.LEFT, padx=20, pady=5)
+        
+        tk.Button(
+            phrase_frame,
+            text="匯入詞彙表",
+            command=self.import_phrase_table,
+            bg='#2196F3',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=20, pady=5)
+        
+        # 劇本語料
+        corpus_frame = tk.LabelFrame(
+            settings_frame,
+            text="劇本語料（OCR 結果對齊到劇本原句）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        corpus_frame.pack(fill=tk.X, pady=10)
+        
+        self.corpus_label = tk.Label(
+            corpus_frame,
+            text="未載入",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.corpus_label.pack(side=tk.LEFT, padx=20, pady=5)
+        
+        tk.Button(
+            corpus_frame,
+            text="匯入劇本",
+            command=self.import_script_corpus,
+            bg='#2196F3',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=20, pady=5)
+        
+        # 文字顏色遮罩
+        color_frame = tk.LabelFrame(
+            settings_frame,
+            text="文字顏色遮罩（快速預處理，適合固定顏色的對話文字）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        color_frame.pack(fill=tk.X, pady=10)
+        
+        self.color_mask_var = tk.BooleanVar(value=self.settings['color_mask'])
+        tk.Checkbutton(
+            color_frame,
+            text="使用顏色遮罩",
+            variable=self.color_mask_var,
+            bg='#1e1e1e',
+            fg='white',
+            selectcolor='#1e1e1e',
+            activebackground='#1e1e1e',
+            activeforeground='white'
+        ).pack(side=tk.LEFT, padx=20, pady=5)
+        
+        self.text_color_label = tk.Label(
+            color_frame,
+            text="未校正",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.text_color_label.pack(side=tk.LEFT, padx=10, pady=5)
+        
+        tk.Button(
+            color_frame,
+            text="校正文字顏色",
+            command=self.calibrate_text_color,
+            bg='#2196F3',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=20, pady=5)
+        
+        # OCR 設定檔
+        profile_frame = tk.LabelFrame(
+            settings_frame,
+            text="OCR 設定檔（python -m translator_core.tuning 調校產生）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        profile_frame.pack(fill=tk.X, pady=10)
+        
+        self.ocr_profile_label = tk.Label(
+            profile_frame,
+            text="未載入（使用預設 --psm 6）",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.ocr_profile_label.pack(side=tk.LEFT, padx=20, pady=5)
+        
+        tk.Button(
+            profile_frame,
+            text="停用",
+            command=lambda: self.load_ocr_profile(''),
+            bg='#666',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=(0, 20), pady=5)
+        
+        tk.Button(
+            profile_frame,
+            text="載入設定檔",
+            command=self.choose_ocr_profile,
+            bg='#2196F3',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=10, pady=5)
+        
+        # OCR 快取
+        ocr_cache_frame = tk.LabelFrame(
+            settings_frame,
+            text="OCR 快取（重複出現的畫面不再識別）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        ocr_cache_frame.pack(fill=tk.X, pady=10)
+        
+        self.ocr_cache_label = tk.Label(
+            ocr_cache_frame,
+            text=f"{len(self.ocr_cache)} 個畫面",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.ocr_cache_label.pack(side=tk.LEFT, padx=20, pady=5)
+        # 快取在背景載入，完成後更新畫面數
+        self.ocr_cache.when_loaded(lambda count: self.root.after(
+            0, lambda: self.ocr_cache_label.config(text=f"{count} 個畫面")
+        ))
+        
+        tk.Button(
+            ocr_cache_frame,
+            text="清除 OCR 快取",
+            command=self.clear_ocr_cache,
+            bg='#f44336',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=20, pady=5)
+        
+        # OCR 工作程序
+        ocr_worker_frame = tk.LabelFrame(
+            settings_frame,
+            text="OCR 工作程序（在獨立程序中識別，閒置後卸載釋放記憶體）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        ocr_worker_frame.pack(fill=tk.X, pady=10)
+        
+        self.ocr_worker_var = tk.BooleanVar(value=self.settings['ocr_worker'])
+        tk.Checkbutton(
+            ocr_worker_frame,
+            text="在獨立程序中執行 OCR",
+            variable=self.ocr_worker_var,
+            command=self.apply_ocr_worker,
+            bg='#1e1e1e',
+            fg='white',
+            selectcolor='#1e1e1e',
+            activebackground='#1e1e1e',
+            activeforeground='white'
+        ).pack(side=tk.LEFT, padx=20, pady=5)
+        
+        tk.Label(
+            ocr_worker_frame,
+            text="閒置卸載 (秒):",
+            bg='#1e1e1e',
+            fg='white'
+        ).pack(side=tk.LEFT, padx=(20, 0))
+        
+        self.ocr_idle_timeout_var = tk.IntVar(value=self.settings['ocr_idle_timeout'])
+        tk.Spinbox(
+            ocr_worker_frame,
+            from_=10,
+            to=3600,
+            increment=10,
+            textvariable=self.ocr_idle_timeout_var,
+            width=6
+        ).pack(side=tk.LEFT, padx=10)
+        self.ocr_idle_timeout_var.trace_add('write', self.apply_ocr_worker)
+        
+        # 工作階段錄製
+        record_frame = tk.LabelFrame(
+            settings_frame,
+            text="工作階段錄製（重現效能或識別問題）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        record_frame.pack(fill=tk.X, pady=10)
+        
+        self.record_session_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            record_frame,
+            text="偵測時錄製有變化的畫面與結果",
+            variable=self.record_session_var,
+            bg='#1e1e1e',
+            fg='white',
+            selectcolor='#1e1e1e',
+            activebackground='#1e1e1e',
+            activeforeground='white'
+        ).pack(side=tk.LEFT, padx=20, pady=5)
+        
+        self.recording_label = tk.Label(
+            record_frame,
+            text=f"錄製檔存於 {RECORDING_DIR}/",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.recording_label.pack(side=tk.LEFT, padx=10)
+        
         # 儲存按鈕
         save_btn = tk.Button(
             settings_frame,
@@ -507,6 +753,15 @@ class GameTranslatorEnhanced:
         )
         self.region_label.pack(side=tk.RIGHT, padx=10)
         
+        self.service_label = tk.Label(
+            status_frame,
+            text="翻譯服務: 正常",
+            bg='#0d0d0d',
+            fg='#888',
+            font=('Arial', 9)
+        )
+        self.service_label.pack(side=tk.RIGHT, padx=10)
+        
     def setup_hotkeys(self):
         """設定全域快捷鍵"""
         keyboard.add_hotkey('f2', self.select_capture_region)
@@ -580,6 +835,7 @@ class GameTranslatorEnhanced:
                 
                 if x2 - x1 > 10 and y2 - y1 > 10:
                     self.capture_region = (x1, y1, x2 - x1, y2 - y1)
+                    self.engine.config.publish(region=self.capture_region)
                     self.region_label.config(
                         text=f"區域: {x2-x1}x{y2-y1} @ ({x1},{y1})",
                         fg='white'
@@ -617,11 +873,15 @@ class GameTranslatorEnhanced:
         
         if self.is_capturing:
             # 初始化 OCR 引擎
-            if self.ocr_var.get() == 'easyocr' and not self.easyocr_reader:
+            if self.ocr_var.get() == 'easyocr' and not self.engine.easyocr_reader:
                 self.status_label.config(text="正在載入 EasyOCR...", fg='#FFC107')
                 self.root.update()
                 try:
-                    self.easyocr_reader = easyocr.Reader(['ko', 'ch_tra'])
+                    self.engine.load_easyocr(
+                        ['ko', 'ch_tra'],
+                        threads=self.easyocr_threads_var.get(),
+                        onnx=self.easyocr_onnx_var.get()
+                    )
                 except:
                     messagebox.showerror("錯誤", "EasyOCR 載入失敗，切換至 Tesseract")
                     self.ocr_var.set('tesseract')
@@ -633,10 +893,11 @@ class GameTranslatorEnhanced:
                     
             self.status_label.config(text="偵測中...", fg='#4CAF50')
             
-            # 啟動擷取執行緒
-            self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
-            self.capture_thread.start()
+            # 啟動擷取工作（同一時間只會有一個）
+            self.start_capture_session()
         else:
+            # 要求停止，不等待進行中的階段；結束時回報停止延遲
+            self.session.stop(wait=False)
             # 更新按鈕和狀態
             for widget in self.root.winfo_children():
                 if isinstance(widget, tk.Button) and widget['text'] == '停止偵測':
@@ -644,99 +905,80 @@ class GameTranslatorEnhanced:
                     
             self.status_label.config(text="已停止", fg='#FFC107')
             
-    def capture_loop(self):
-        """改進的擷取循環"""
-        last_text_hash = ""
+    def start_capture_session(self):
+        """啟動擷取工作，回呼一律轉交 UI 執行緒"""
+        metrics = self.engine.metrics
+        update_translation = metrics.timed('ui_render', self.update_translation)
+        update_preview = metrics.timed('ui_preview', self.update_preview)
+        self.start_recording()
+        
+        self.session.start(
+            on_result=lambda screenshot, result, translation: self.root.after(
+                0, update_translation, result['text'], translation
+            ),
+            on_preview=lambda screenshot: self.root.after(0, update_preview, screenshot),
+            on_stopped=lambda latency: self.root.after(0, self.on_capture_stopped, latency)
+        )
         
-        while self.is_capturing:
-            try:
-                # 擷取指定區域
-                x, y, w, h = self.capture_region
-                screenshot = pyautogui.screenshot(region=(x, y, w, h))
-                
-                # 更新預覽
-                self.root.after(0, self.update_preview, screenshot)
-                
-                # 預處理影像
-                if self.preprocessing_var.get():
-                    processed_img = self.advanced_preprocess(screenshot)
-                else:
-                    processed_img = np.array(screenshot)
-                    
-                # OCR 識別
-                korean_text = ""
-                if self.ocr_var.get() == 'tesseract':
-                    korean_text = pytesseract.image_to_string(
-                        processed_img,
-                        lang='kor',
-                        config='--psm 6'
-                    ).strip()
-                elif self.ocr_var.get() == 'easyocr' and self.easyocr_reader:
-                    results = self.easyocr_reader.readtext(processed_img)
-                    korean_text = ' '.join([result[1] for result in results])
-                    
-                # 檢查是否為新文字
-                current_hash = hash(korean_text)
-                if korean_text and current_hash != last_text_hash:
-                    last_text_hash = current_hash
-                    
-                    # 檢查快取
-                    if korean_text in self.translation_cache:
-                        chinese_text = self.translation_cache[korean_text]
-                    else:
-                        # 翻譯
-                        chinese_text = self.translate_text(korean_text)
-                        self.translation_cache[korean_text] = chinese_text
-                        
-                    # 更新顯示
-                    self.root.after(0, self.update_translation, korean_text, chinese_text)
-                    
-                    # 自動複製
-                    if self.auto_copy_var.get():
-                        self.root.clipboard_clear()
-                        self.root.clipboard_append(chinese_text)
-                        
-            except Exception as e:
-                print(f"擷取錯誤: {e}")
-                
-            time.sleep(self.interval_var.get())
+    def on_capture_stopped(self, latency):
+        """擷取工作結束（於 UI 執行緒執行）"""
+        # 已重新開始偵測時，錄製器屬於新的工作階段
+        if not self.is_capturing:
+            self.stop_recording()
+            self.status_label.config(text=f"已停止 (停止耗時 {latency * 1000:.0f} ms)", fg='#FFC107')
+        
+    def start_recording(self):
+        """開始偵測時依設定建立錄製器（只錄製本機處理的工作階段）"""
+        self.stop_recording()
+        if self.record_session_var.get() and self.session.engine is self.engine:
+            path = recording_path()
+            self.engine.recorder = SessionRecorder(path)
+            self.recording_label.config(text=f"錄製中: {path}", fg='#f44336')
             
-    def advanced_preprocess(self, image):
-        """進階影像預處理"""
-        # 轉換為 numpy 陣列
-        img = np.array(image)
-        
-        # 轉換為灰階
-        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-        
-        # 提高對比度
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
-        
-        # 去噪
-        denoised = cv2.fastNlMeansDenoising(enhanced)
-        
-        # 放大
-        scaled = cv2.resize(denoised, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
-        
-        # 銳化
-        kernel = np.array([[-1,-1,-1],
-                          [-1, 9,-1],
-                          [-1,-1,-1]])
-        sharpened = cv2.filter2D(scaled, -1, kernel)
-        
-        # 二值化
-        _, binary = cv2.threshold(sharpened, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        
-        return binary
+    def stop_recording(self):
+        """擷取工作結束後寫完並關閉錄製檔"""
+        recorder = self.engine.recorder
+        if recorder is None:
+            return
+        self.engine.recorder = None
+        recorder.close()
+        self.recording_label.config(
+            text=f"已錄製 {recorder.events} 張畫面: {recorder.path}", fg='#999'
+        )
         
-    def translate_text(self, text):
-        """翻譯文字"""
-        try:
-            result = self.translator.translate(text, src='ko', dest='zh-tw')
-            return result.text
-        except Exception as e:
-            return f"翻譯錯誤: {str(e)}"
+    def preprocessing_mode(self):
+        """預處理方案：已校正文字顏色且啟用遮罩時使用快速的顏色遮罩"""
+        if self.color_mask_var.get() and self.text_colors is not None:
+            return 'color'
+        return 'advanced' if self.preprocessing_var.get() else 'none'
+        
+    def publish_config(self, *args):
+        """發布擷取管線設定（韓文 → 繁中），擷取執行緒只讀取發布的快照"""
+        self.engine.config.publish(
+            region=self.capture_region,
+            preprocessing=self.preprocessing_mode(),
+            ocr_engine=self.ocr_var.get(),
+            language='kor',
+            languages=('kor',),
+            target_language='zh-tw',
+            interval=self.interval_var.get(),
+            ocr_profile=self.ocr_profile,
+            text_colors=self.text_colors
+        )
+            
+    def update_service_status(self):
+        """狀態列顯示翻譯服務狀態；中斷期間每秒更新重試倒數"""
+        breaker = self.engine.translation.breaker
+        if breaker.state == 'open':
+            self.service_label.config(
+                text=f"翻譯服務中斷，僅使用快取與詞彙表 ({breaker.retry_in():.0f} 秒後重試)",
+                fg='#f44336'
+            )
+            self.root.after(1000, self.update_service_status)
+        elif breaker.state == 'half_open':
+            self.service_label.config(text="翻譯服務: 重新連線中...", fg='#FFC107')
+        else:
+            self.service_label.config(text="翻譯服務: 正常", fg='#888')
             
     def update_preview(self, screenshot):
         """更新預覽圖片"""
@@ -776,6 +1018,11 @@ class GameTranslatorEnhanced:
         # 更新覆蓋視窗
         if self.overlay.is_showing:
             self.overlay.update_text(f"{korean_text}\n{chinese_text}")
+            
+        # 自動複製
+        if self.auto_copy_var.get():
+            self.root.clipboard_clear()
+            self.root.clipboard_append(chinese_text)
         
         # 加入歷史記錄
         timestamp = datetime.now().strftime("%H:%M:%S")
@@ -787,14 +1034,8 @@ class GameTranslatorEnhanced:
         self.translation_display.insert(tk.END, "-" * 60 + "\n")
         self.translation_display.see(tk.END)
         
-        # 儲存到歷史
-        history_item = {
-            'timestamp': timestamp,
-            'date': datetime.now().strftime("%Y-%m-%d"),
-            'korean': korean_text,
-            'chinese': chinese_text
-        }
-        self.translation_history.append(history_item)
+        # 儲存到歷史（顯示用的時間在讀取時產生）
+        self.translation_history.append(korean_text, chinese_text, 'kor')
         
         # 更新歷史列表
         self.history_listbox.insert(
@@ -814,8 +1055,9 @@ class GameTranslatorEnhanced:
         self.translation_display.delete(1.0, tk.END)
         
     def save_current_session(self):
-        """儲存當前工作階段"""
-        if not self.translation_history:
+        """儲存當前工作階段（本次執行的所有記錄）"""
+        session = self.history_store.session
+        if not self.history_store.has_records(session):
             messagebox.showinfo("提示", "沒有可儲存的翻譯記錄")
             return
             
@@ -826,18 +1068,27 @@ class GameTranslatorEnhanced:
         )
         
         if filename:
-            try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(list(self.translation_history), f, ensure_ascii=False, indent=2)
-                self.status_label.config(text=f"已儲存: {os.path.basename(filename)}", fg='#4CAF50')
-            except Exception as e:
-                messagebox.showerror("錯誤", f"儲存失敗: {str(e)}")
+            def on_done(count, error):
+                if error:
+                    messagebox.showerror("錯誤", f"儲存失敗: {str(error)}")
+                else:
+                    self.status_label.config(text=f"已儲存: {os.path.basename(filename)}", fg='#4CAF50')
+                    
+            self.status_label.config(text="儲存中...", fg='#FFC107')
+            self.history_store.export_async(
+                filename,
+                None,
+                None,
+                transform=self.history_export_item,
+                session=session,
+                on_done=lambda count, error: self.root.after(0, on_done, count, error)
+            )
                 
     def copy_latest_translation(self):
         """複製最新翻譯"""
         if self.translation_history:
             latest = self.translation_history[-1]
-            text = f"{latest['korean']}\n{latest['chinese']}"
+            text = f"{latest.source}\n{latest.target}"
             self.root.clipboard_clear()
             self.root.clipboard_append(text)
             self.status_label.config(text="已複製到剪貼簿", fg='#4CAF50')
@@ -848,11 +1099,11 @@ class GameTranslatorEnhanced:
         self.history_listbox.delete(0, tk.END)
         
         for item in self.translation_history:
-            if (keyword in item['korean'].lower() or 
-                keyword in item['chinese'].lower()):
-                display_text = (f"{item['timestamp']} | "
-                              f"{item['korean'][:20]}... → "
-                              f"{item['chinese'][:20]}...")
+            if (keyword in item.source.lower() or 
+                keyword in item.target.lower()):
+                display_text = (f"{item.timestamp} | "
+                              f"{item.source[:20]}... → "
+                              f"{item.target[:20]}...")
                 self.history_listbox.insert(tk.END, display_text)
                 
     def show_history_detail(self, event):
@@ -878,14 +1129,14 @@ class GameTranslatorEnhanced:
                 )
                 detail_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
                 
-                detail_text.insert(tk.END, f"時間: {item['date']} {item['timestamp']}\n\n")
-                detail_text.insert(tk.END, f"韓文:\n{item['korean']}\n\n")
-                detail_text.insert(tk.END, f"中文:\n{item['chinese']}")
+                detail_text.insert(tk.END, f"時間: {item.date} {item.timestamp}\n\n")
+                detail_text.insert(tk.END, f"韓文:\n{item.source}\n\n")
+                detail_text.insert(tk.END, f"中文:\n{item.target}")
                 detail_text.config(state=tk.DISABLED)
                 
     def export_history(self):
-        """匯出歷史記錄"""
-        if not self.translation_history:
+        """匯出歷史記錄（背景串流寫入）"""
+        if not self.history_store.has_records():
             messagebox.showinfo("提示", "沒有可匯出的歷史記錄")
             return
             
@@ -900,66 +1151,301 @@ class GameTranslatorEnhanced:
         )
         
         if filename:
-            try:
-                if filename.endswith('.json'):
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        json.dump(list(self.translation_history), f, ensure_ascii=False, indent=2)
-                elif filename.endswith('.csv'):
-                    import csv
-                    with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
-                        writer = csv.DictWriter(f, fieldnames=['date', 'timestamp', 'korean', 'chinese'])
-                        writer.writeheader()
-                        writer.writerows(self.translation_history)
-                else:  # txt
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        for item in self.translation_history:
-                            f.write(f"[{item['date']} {item['timestamp']}]\n")
-                            f.write(f"韓文: {item['korean']}\n")
-                            f.write(f"中文: {item['chinese']}\n")
-                            f.write("-" * 60 + "\n\n")
-                            
-                messagebox.showinfo("成功", "歷史記錄已匯出")
-            except Exception as e:
-                messagebox.showerror("錯誤", f"匯出失敗: {str(e)}")
+            self.status_label.config(text="匯出中...", fg='#FFC107')
+            self.history_store.export_async(
+                filename,
+                ['date', 'timestamp', 'korean', 'chinese'],
+                self.write_history_text,
+                transform=self.history_export_item,
+                on_done=lambda count, error: self.root.after(0, self.on_export_done, count, error),
+                progress=lambda count: self.root.after(
+                    0, lambda: self.status_label.config(text=f"匯出中... {count} 筆", fg='#FFC107')
+                )
+            )
+            
+    def history_export_item(self, item):
+        """轉換為韓中對照的匯出格式"""
+        return {
+            'timestamp': item['timestamp'],
+            'date': item['date'],
+            'korean': item['source'],
+            'chinese': item['target']
+        }
+        
+    def write_history_text(self, f, item):
+        """以純文字格式寫入一筆歷史"""
+        f.write(f"[{item['date']} {item['timestamp']}]\n")
+        f.write(f"韓文: {item['korean']}\n")
+        f.write(f"中文: {item['chinese']}\n")
+        f.write("-" * 60 + "\n\n")
+        
+    def on_export_done(self, count, error):
+        """匯出完成（於 UI 執行緒執行）"""
+        if error:
+            messagebox.showerror("錯誤", f"匯出失敗: {str(error)}")
+            self.status_label.config(text="匯出失敗", fg='#f44336')
+        else:
+            self.status_label.config(text=f"已匯出 {count} 筆記錄", fg='#4CAF50')
+            messagebox.showinfo("成功", "歷史記錄已匯出")
                 
     def import_history(self):
-        """匯入歷史記錄"""
+        """匯入歷史記錄（背景串流解析，自動略過重複）"""
         filename = filedialog.askopenfilename(
             filetypes=[
                 ("JSON files", "*.json"),
+                ("JSON Lines files", "*.jsonl"),
                 ("All files", "*.*")
             ]
         )
         
         if filename:
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    imported_data = json.load(f)
-                    
-                # 合併歷史記錄
-                for item in imported_data:
-                    self.translation_history.append(item)
-                    display_text = (f"{item['timestamp']} | "
-                                  f"{item['korean'][:20]}... → "
-                                  f"{item['chinese'][:20]}...")
-                    self.history_listbox.insert(tk.END, display_text)
-                    
-                messagebox.showinfo("成功", f"已匯入 {len(imported_data)} 筆記錄")
-            except Exception as e:
-                messagebox.showerror("錯誤", f"匯入失敗: {str(e)}")
+            self.status_label.config(text="匯入中...", fg='#FFC107')
+            self.history_store.import_async(
+                filename,
+                default_language='kor',
+                on_pairs=lambda pairs: self.engine.translation.cache.update(pairs, 'ko', 'zh-tw'),
+                progress=lambda read, added: self.root.after(
+                    0, lambda: self.status_label.config(
+                        text=f"匯入中... 已讀取 {read} 筆，新增 {added} 筆", fg='#FFC107'
+                    )
+                ),
+                on_done=lambda result, error: self.root.after(0, self.on_import_done, result, error),
+                keep_last=self.translation_history.maxlen
+            )
+            
+    def on_import_done(self, result, error):
+        """匯入完成（於 UI 執行緒執行）"""
+        if error:
+            messagebox.showerror("錯誤", f"匯入失敗: {str(error)}")
+            self.status_label.config(text="匯入失敗", fg='#f44336')
+            return
+            
+        read, added, recent = result
+        
+        # 只將最近的新記錄加入列表
+        for ts, language, source, target, confidence in recent:
+            self.translation_history.append(source, target, language, confidence, ts)
+            item = self.translation_history[-1]
+            display_text = (f"{item.timestamp} | "
+                          f"{item.source[:20]}... → "
+                          f"{item.target[:20]}...")
+            self.history_listbox.insert(tk.END, display_text)
+            
+        self.status_label.config(text=f"已匯入 {added} 筆記錄", fg='#4CAF50')
+        messagebox.showinfo("成功", f"已匯入 {added} 筆記錄（略過重複 {read - added} 筆）")
                 
     def clear_all_history(self):
         """清空所有歷史記錄"""
         if messagebox.askyesno("確認", "確定要清空所有歷史記錄嗎？"):
             self.translation_history.clear()
+            self.history_store.clear()
             self.history_listbox.delete(0, tk.END)
             self.translation_display.delete(1.0, tk.END)
             self.status_label.config(text="已清空歷史記錄", fg='#4CAF50')
             
+    def load_phrase_table(self, path):
+        """載入遊戲詞彙表索引，翻譯時優先於快取與網路"""
+        table = load_phrase_table(path)
+        old = self.engine.translation.phrases
+        self.engine.translation.phrases = table
+        if old is not None and old is not table:
+            old.close()
+            
+        self.settings['phrase_table'] = path if table else ''
+        if table:
+            self.phrase_label.config(
+                text=f"{os.path.basename(path)} ({len(table)} 筆, 譯文 {table.target_language})",
+                fg='#4CAF50'
+            )
+        else:
+            self.phrase_label.config(text="未載入", fg='#999')
+            
+    def import_phrase_table(self):
+        """從 CSV/JSON 匯入詞彙表（背景編譯為索引檔）"""
+        filename = filedialog.askopenfilename(
+            filetypes=[
+                ("CSV files", "*.csv"),
+                ("TSV files", "*.tsv"),
+                ("JSON files", "*.json"),
+                ("All files", "*.*")
+            ]
+        )
+        if not filename:
+            return
+            
+        path = phrase_table_path(os.path.splitext(os.path.basename(filename))[0])
+        target = 'zh-tw'
+        
+        # 重新匯入目前使用中的詞彙表時，先關閉舊的索引才能取代檔案
+        current = self.engine.translation.phrases
+        if current is not None and os.path.abspath(current.path) == os.path.abspath(path):
+            self.load_phrase_table('')
+            
+        self.status_label.config(text="正在編譯詞彙表...", fg='#FFC107')
+        
+        def run():
+            try:
+                count = compile_phrase_table(read_phrase_pairs(filename), path, target)
+            except Exception as e:
+                self.root.after(0, self.on_phrase_table_compiled, path, 0, e)
+                return
+            self.root.after(0, self.on_phrase_table_compiled, path, count, None)
+            
+        threading.Thread(target=run, daemon=True).start()
+        
+    def on_phrase_table_compiled(self, path, count, error):
+        """詞彙表編譯完成（於 UI 執行緒執行）"""
+        if error:
+            self.status_label.config(text="詞彙表匯入失敗", fg='#f44336')
+            messagebox.showerror("錯誤", f"匯入詞彙表失敗: {str(error)}")
+            return
+            
+        self.load_phrase_table(path)
+        self.status_label.config(text=f"已匯入 {count} 筆詞彙", fg='#4CAF50')
+        
+    def load_script_corpus(self, path):
+        """載入劇本語料索引，識別結果會先對齊到最接近的原句"""
+        corpus = load_corpus(path)
+        old = self.engine.corpus
+        self.engine.corpus = corpus
+        if old is not None and old is not corpus:
+            old.close()
+            
+        self.settings['script_corpus'] = path if corpus else ''
+        if corpus:
+            target = f", 譯文 {corpus.target_language}" if corpus.target_language else ""
+            self.corpus_label.config(
+                text=f"{os.path.basename(path)} ({len(corpus)} 行{target})",
+                fg='#4CAF50'
+            )
+        else:
+            self.corpus_label.config(text="未載入", fg='#999')
+            
+    def import_script_corpus(self):
+        """匯入遊戲劇本：TXT 每行一句，或含譯文的 CSV/JSON（背景編譯為索引檔）"""
+        filename = filedialog.askopenfilename(
+            filetypes=[
+                ("Text files", "*.txt"),
+                ("CSV files", "*.csv"),
+                ("TSV files", "*.tsv"),
+                ("JSON files", "*.json"),
+                ("All files", "*.*")
+            ]
+        )
+        if not filename:
+            return
+            
+        path = corpus_path(os.path.splitext(os.path.basename(filename))[0])
+        target = '' if filename.lower().endswith('.txt') else 'zh-tw'
+        
+        # 重新匯入目前使用中的語料時，先關閉舊的索引才能取代檔案
+        current = self.engine.corpus
+        if current is not None and os.path.abspath(current.path) == os.path.abspath(path):
+            self.load_script_corpus('')
+            
+        self.status_label.config(text="正在編譯劇本語料...", fg='#FFC107')
+        
+        def run():
+            try:
+                count = compile_corpus(read_corpus_lines(filename), path, target)
+            except Exception as e:
+                self.root.after(0, self.on_script_corpus_compiled, path, 0, e)
+                return
+            self.root.after(0, self.on_script_corpus_compiled, path, count, None)
+            
+        threading.Thread(target=run, daemon=True).start()
+        
+    def on_script_corpus_compiled(self, path, count, error):
+        """劇本語料編譯完成（於 UI 執行緒執行）"""
+        if error:
+            self.status_label.config(text="劇本匯入失敗", fg='#f44336')
+            messagebox.showerror("錯誤", f"匯入劇本失敗: {str(error)}")
+            return
+            
+        self.load_script_corpus(path)
+        self.status_label.config(text=f"已匯入 {count} 行劇本", fg='#4CAF50')
+        
+    def calibrate_text_color(self):
+        """擷取目前區域，開啟文字顏色校正視窗"""
+        if not self.capture_region:
+            messagebox.showwarning("提示", "請先選擇擷取區域！")
+            return
+        try:
+            screenshot = capture_region(self.capture_region)
+        except Exception as e:
+            messagebox.showerror("錯誤", f"擷取失敗: {str(e)}")
+            return
+        TextColorCalibrator(self.root, screenshot, self.on_text_color_calibrated)
+        
+    def on_text_color_calibrated(self, model):
+        """套用校正後的文字顏色模型並啟用顏色遮罩"""
+        self.text_colors = model
+        self.settings['text_colors'] = model.to_list()
+        self.update_text_color_label()
+        self.color_mask_var.set(True)
+        self.publish_config()
+        
+    def update_text_color_label(self):
+        if self.text_colors is None:
+            self.text_color_label.config(text="未校正", fg='#999')
+        else:
+            self.text_color_label.config(text=f"已校正 {len(self.text_colors.ranges)} 種文字顏色", fg='#4CAF50')
+            
+    def load_ocr_profile(self, path):
+        """載入遊戲的 OCR 設定檔，單一語言 Tesseract 識別依設定檔的 PSM/OEM/倍率執行"""
+        profile = load_ocr_profile(path)
+        self.ocr_profile = profile
+        self.settings['ocr_profile'] = path if profile else ''
+        if profile:
+            self.ocr_profile_label.config(
+                text=(
+                    f"{os.path.basename(path)} ({profile.language}, {profile.preprocessing} x{profile.scale:g}, "
+                    f"psm {profile.psm}, 正確率 {profile.accuracy:.0%}, {profile.latency_ms:.0f} ms)"
+                ),
+                fg='#4CAF50'
+            )
+        else:
+            self.ocr_profile_label.config(text="未載入（使用預設 --psm 6）", fg='#999')
+        self.publish_config()
+        
+    def choose_ocr_profile(self):
+        """選擇 OCR 設定檔"""
+        filename = filedialog.askopenfilename(
+            initialdir=PROFILE_DIR if os.path.isdir(PROFILE_DIR) else None,
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if filename:
+            self.load_ocr_profile(filename)
+            if self.ocr_profile is None:
+                messagebox.showerror("錯誤", "無法載入 OCR 設定檔")
+                
+    def clear_ocr_cache(self):
+        """清除 OCR 快取（更新 Tesseract 語言資料後使用）"""
+        if messagebox.askyesno("確認", "確定要清除 OCR 快取嗎？"):
+            self.ocr_cache.clear()
+            self.ocr_cache_label.config(text="0 個畫面")
+            
+    def apply_ocr_worker(self, *args):
+        """啟用或停用 OCR 工作程序；停用時立即卸載（之後在本程序識別）"""
+        try:
+            self.ocr_worker.idle_timeout = max(10, self.ocr_idle_timeout_var.get())
+        except tk.TclError:
+            pass
+        if self.ocr_worker_var.get():
+            self.engine.ocr_worker = self.ocr_worker
+        else:
+            self.engine.ocr_worker = None
+            self.ocr_worker.stop()
+            
     def save_settings(self):
         """儲存設定"""
         self.settings['ocr_engine'] = self.ocr_var.get()
+        self.settings['easyocr_threads'] = self.easyocr_threads_var.get()
+        self.settings['easyocr_onnx'] = self.easyocr_onnx_var.get()
         self.settings['preprocessing'] = self.preprocessing_var.get()
+        self.settings['color_mask'] = self.color_mask_var.get()
+        self.settings['ocr_worker'] = self.ocr_worker_var.get()
+        self.settings['ocr_idle_timeout'] = self.ocr_idle_timeout_var.get()
         self.settings['auto_copy'] = self.auto_copy_var.get()
         self.settings['update_interval'] = self.interval_var.get()
         
@@ -982,7 +1468,12 @@ class GameTranslatorEnhanced:
     def on_closing(self):
         """關閉程式時的處理"""
         self.is_capturing = False
+        self.session.stop(timeout=2.0)
+        self.stop_recording()
         self.save_settings()
+        self.history_store.close()
+        self.ocr_cache.close()
+        self.ocr_worker.close()
         self.root.destroy()
 
 def main():
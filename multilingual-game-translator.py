@@ -1,63 +1,36 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import pyautogui
-import pytesseract
 from PIL import Image, ImageTk, ImageDraw, ImageFont, ImageEnhance
-import cv2
-import numpy as np
-from googletrans import Translator
 import threading
 import time
-import keyboard
 from datetime import datetime
 import json
 import os
 import sys
-from collections import deque
+from translator_core.color_picker import TextColorCalibrator
+from translator_core.engine import ENGINE_MODULES, ONE_SHOT_TARGET, TranslationEngine, capture_region
+from translator_core.history import HistoryStore
+from translator_core.ocr_cache import OcrCache
+from translator_core.ocr_worker import DEFAULT_IDLE_TIMEOUT, OcrWorker
+from translator_core.recent import RecentHistory
+from translator_core.overlay import OverlayWindow
+from translator_core.remote import RemoteCaptureClient, parse_address
+from translator_core.languages import (
+    LANGUAGES, TARGET_LANGUAGES, language_name, load_cached_languages, discover_languages_async
+)
+from translator_core.corpus import compile_corpus, corpus_path, load_corpus, read_corpus_lines
+from translator_core.lazy import lazy_import, warm_up
+from translator_core.recorder import RECORDING_DIR, SessionRecorder, recording_path
+from translator_core.phrases import compile_phrase_table, load_phrase_table, phrase_table_path, read_phrase_pairs
+from translator_core.session import CaptureSession
+from translator_core.textcolor import TextColorModel
+from translator_core.tuning import PROFILE_DIR, load_ocr_profile
+from translator_core.perf_panel import PerformancePanel
 
-# 語言配置
-LANGUAGES = {
-    # 東亞語言
-    'jpn': {'name': '日文', 'google_code': 'ja'},
-    'kor': {'name': '韓文', 'google_code': 'ko'},
-    'chi_sim': {'name': '簡體中文', 'google_code': 'zh-cn'},
-    'chi_tra': {'name': '繁體中文', 'google_code': 'zh-tw'},
-    
-    # 歐洲語言
-    'eng': {'name': '英文', 'google_code': 'en'},
-    'fra': {'name': '法文', 'google_code': 'fr'},
-    'deu': {'name': '德文', 'google_code': 'de'},
-    'spa': {'name': '西班牙文', 'google_code': 'es'},
-    'ita': {'name': '義大利文', 'google_code': 'it'},
-    'por': {'name': '葡萄牙文', 'google_code': 'pt'},
-    'rus': {'name': '俄文', 'google_code': 'ru'},
-    
-    # 其他語言
-    'ara': {'name': '阿拉伯文', 'google_code': 'ar'},
-    'tha': {'name': '泰文', 'google_code': 'th'},
-    'vie': {'name': '越南文', 'google_code': 'vi'},
-    'ind': {'name': '印尼文', 'google_code': 'id'},
-    'tur': {'name': '土耳其文', 'google_code': 'tr'},
-    'pol': {'name': '波蘭文', 'google_code': 'pl'},
-    'nld': {'name': '荷蘭文', 'google_code': 'nl'},
-    'swe': {'name': '瑞典文', 'google_code': 'sv'},
-}
-
-# 目標語言選項
-TARGET_LANGUAGES = {
-    'zh-tw': '繁體中文',
-    'zh-cn': '簡體中文',
-    'en': '英文',
-    'ja': '日文',
-    'ko': '韓文',
-    'es': '西班牙文',
-    'fr': '法文',
-    'de': '德文',
-    'ru': '俄文',
-    'ar': '阿拉伯文',
-    'th': '泰文',
-    'vi': '越南文',
-}
+# 重量級模組延遲載入，讓視窗先顯示
+pyautogui = lazy_import('pyautogui')
+pytesseract = lazy_import('pytesseract')
+keyboard = lazy_import('keyboard')
 
 class MultilingualGameTranslator:
     def __init__(self, root):
@@ -65,12 +38,19 @@ class MultilingualGameTranslator:
         self.root.title("多語言遊戲翻譯器 v3.0")
         self.root.geometry("1200x800")
         
-        # 初始化
-        self.translator = Translator()
+        # 初始化（OCR、翻譯快取與歷史記錄都由翻譯管線負責）
+        self.history_store = HistoryStore()
+        self.ocr_cache = OcrCache()
+        self.ocr_profile = None
+        self.engine = TranslationEngine(self.history_store, ocr_cache=self.ocr_cache)
+        self.ocr_worker = OcrWorker(metrics=self.engine.metrics)
+        self.session = CaptureSession(self.engine)
+        self.remote_client = None   # 設定了翻譯伺服器時使用（見 translator_core/remote.py）
         self.is_capturing = False
         self.capture_region = None
-        self.translation_cache = {}
-        self.translation_history = deque(maxlen=500)
+        self.translation_history = RecentHistory(maxlen=500)
+        self.overlay = OverlayWindow(self)
+        self.one_shot_lock = threading.Lock()   # 單次翻譯進行中時忽略重複按鍵
         
         # 檢查已安裝的語言
         self.check_installed_languages()
@@ -83,7 +63,15 @@ class MultilingualGameTranslator:
             'update_interval': 0.5,
             'preprocessing': True,
             'auto_detect': False,
-            'confidence_threshold': 60
+            'confidence_threshold': 60,
+            'phrase_table': '',
+            'script_corpus': '',
+            'ocr_profile': '',
+            'ocr_worker': True,
+            'ocr_idle_timeout': DEFAULT_IDLE_TIMEOUT,
+            'remote_server': '',
+            'color_mask': False,
+            'text_colors': []
         }
         
         # 載入設定
@@ -95,24 +83,65 @@ class MultilingualGameTranslator:
         # 建立UI
         self.create_ui()
         
-        # 設定快捷鍵
-        self.setup_hotkeys()
+        # 翻譯服務中斷或恢復時更新狀態列
+        self.engine.translation.breaker.on_change = lambda state, retry_in: self.root.after(
+            0, self.update_service_status
+        )
+        
+        # 文字顏色模型
+        self.text_colors = TextColorModel.from_list(self.settings['text_colors'])
+        self.update_text_color_label()
+        
+        # 載入遊戲詞彙表與劇本語料
+        self.load_phrase_table(self.settings['phrase_table'])
+        self.load_script_corpus(self.settings['script_corpus'])
+        self.load_ocr_profile(self.settings['ocr_profile'])
+        self.apply_ocr_worker()
+        
+        # 發布管線設定，之後設定變更時自動重新發布
+        self.publish_config()
+        for var in (self.source_lang_var, self.target_lang_var, self.ocr_mode_var, self.auto_detect_var,
+                    self.preprocessing_var, self.color_mask_var, self.confidence_var, self.interval_var):
+            var.trace_add('write', self.publish_config)
+        
+        # 背景預載重量級模組，完成後設定快捷鍵
+        warm_up(ENGINE_MODULES + [keyboard], then=self.setup_hotkeys)
         
     def check_installed_languages(self):
-        """檢查已安裝的 Tesseract 語言包"""
-        try:
-            # 取得可用語言列表
-            languages = pytesseract.get_languages()
-            self.installed_languages = {}
+        """檢查已安裝的 Tesseract 語言包（先使用快取，背景重新偵測）"""
+        cached = load_cached_languages()
+        if cached is not None:
+            self.set_installed_languages(cached)
+        else:
+            self.installed_languages = LANGUAGES  # 偵測完成前假設全部都有
             
-            for lang_code, lang_info in LANGUAGES.items():
-                if lang_code in languages:
-                    self.installed_languages[lang_code] = lang_info
-                    
-            print(f"已安裝的語言: {list(self.installed_languages.keys())}")
-        except Exception as e:
-            print(f"無法檢查語言包: {e}")
-            self.installed_languages = LANGUAGES  # 假設全部都有
+        discover_languages_async(
+            lambda languages, error: self.root.after(0, self.on_languages_discovered, languages, error)
+        )
+        
+    def set_installed_languages(self, languages):
+        """依 Tesseract 回報的語言列表更新已安裝語言"""
+        self.installed_languages = {
+            lang_code: lang_info for lang_code, lang_info in LANGUAGES.items()
+            if lang_code in languages
+        }
+        
+    def on_languages_discovered(self, languages, error):
+        """背景語言偵測完成（於 UI 執行緒執行）"""
+        if error:
+            print(f"無法檢查語言包: {error}")
+            return
+            
+        previous = list(self.installed_languages.keys())
+        self.set_installed_languages(languages)
+        print(f"已安裝的語言: {list(self.installed_languages.keys())}")
+        
+        if list(self.installed_languages.keys()) != previous:
+            self.source_lang_combo.config(
+                values=[(f"{info['name']} ({code})") for code, info in self.installed_languages.items()]
+            )
+            self.fill_language_text()
+            self.publish_config()
             
     def setup_styles(self):
         """設定視覺樣式"""
@@ -155,6 +184,11 @@ class MultilingualGameTranslator:
         notebook.add(history_tab, text="歷史")
         self.create_history_tab(history_tab)
         
+        # 效能頁面
+        perf_tab = ttk.Frame(notebook)
+        notebook.add(perf_tab, text="效能")
+        self.perf_panel = PerformancePanel(perf_tab, self.engine.metrics)
+        
         # 狀態列
         self.create_status_bar()
         
@@ -398,7 +432,7 @@ class MultilingualGameTranslator:
         installed_frame.pack(fill=tk.X, pady=10)
         
         # 顯示已安裝語言
-        lang_text = tk.Text(
+        self.lang_text = tk.Text(
             installed_frame,
             height=10,
             bg='#0d0d0d',
@@ -406,19 +440,8 @@ class MultilingualGameTranslator:
             font=('Arial', 10),
             wrap=tk.WORD
         )
-        lang_text.pack(fill=tk.X, padx=10, pady=10)
-        
-        # 填入已安裝語言資訊
-        lang_text.insert(tk.END, "已安裝的 OCR 語言包:\n\n")
-        for code, info in self.installed_languages.items():
-            lang_text.insert(tk.END, f"• {info['name']} ({code})\n")
-            
-        lang_text.insert(tk.END, "\n" + "="*50 + "\n")
-        lang_text.insert(tk.END, "支援的翻譯目標語言:\n\n")
-        for code, name in TARGET_LANGUAGES.items():
-            lang_text.insert(tk.END, f"• {name} ({code})\n")
-            
-        lang_text.config(state=tk.DISABLED)
+        self.lang_text.pack(fill=tk.X, padx=10, pady=10)
+        self.fill_language_text()
         
         # 語言對應設定
         mapping_frame = tk.LabelFrame(
@@ -483,6 +506,23 @@ class MultilingualGameTranslator:
         )
         guide_text.pack(padx=10, pady=10)
         
+    def fill_language_text(self):
+        """填入已安裝語言資訊"""
+        lang_text = self.lang_text
+        lang_text.config(state=tk.NORMAL)
+        lang_text.delete(1.0, tk.END)
+        
+        lang_text.insert(tk.END, "已安裝的 OCR 語言包:\n\n")
+        for code, info in self.installed_languages.items():
+            lang_text.insert(tk.END, f"• {info['name']} ({code})\n")
+            
+        lang_text.insert(tk.END, "\n" + "="*50 + "\n")
+        lang_text.insert(tk.END, "支援的翻譯目標語言:\n\n")
+        for code, name in TARGET_LANGUAGES.items():
+            lang_text.insert(tk.END, f"• {name} ({code})\n")
+            
+        lang_text.config(state=tk.DISABLED)
+        
     def create_settings_tab(self, parent):
         """建立進階設定頁面"""
         settings_frame = tk.Frame(parent, bg='#1e1e1e')
@@ -617,6 +657,271 @@ class MultilingualGameTranslator:
         )
         interval_scale.pack(side=tk.LEFT)
         
+        # 遊戲詞彙表
+        phrase_frame = tk.LabelFrame(
+            settings_frame,
+            text="遊戲詞彙表",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        phrase_frame.pack(fill=tk.X, pady=10)
+        
+        self.phrase_label = tk.Label(
+            phrase_frame,
+            text="未載入",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.phrase_label.pack(side=tk.LEFT, padx=20, pady=5)
+        
+        tk.Button(
+            phrase_frame,
+            text="匯入詞彙表",
+            command=self.import_phrase_table,
+            bg='#2196F3',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=20, pady=5)
+        
+        # 劇本語料
+        corpus_frame = tk.LabelFrame(
+            settings_frame,
+            text="劇本語料（OCR 結果對齊到劇本原句）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        corpus_frame.pack(fill=tk.X, pady=10)
+        
+        self.corpus_label = tk.Label(
+            corpus_frame,
+            text="未載入",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.corpus_label.pack(side=tk.LEFT, padx=20, pady=5)
+        
+        tk.Button(
+            corpus_frame,
+            text="匯入劇本",
+            command=self.import_script_corpus,
+            bg='#2196F3',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=20, pady=5)
+        
+        # 文字顏色遮罩
+        color_frame = tk.LabelFrame(
+            settings_frame,
+            text="文字顏色遮罩（快速預處理，適合固定顏色的對話文字）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        color_frame.pack(fill=tk.X, pady=10)
+        
+        self.color_mask_var = tk.BooleanVar(value=self.settings['color_mask'])
+        tk.Checkbutton(
+            color_frame,
+            text="使用顏色遮罩",
+            variable=self.color_mask_var,
+            bg='#1e1e1e',
+            fg='white',
+            selectcolor='#1e1e1e',
+            activebackground='#1e1e1e',
+            activeforeground='white'
+        ).pack(side=tk.LEFT, padx=20, pady=5)
+        
+        self.text_color_label = tk.Label(
+            color_frame,
+            text="未校正",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.text_color_label.pack(side=tk.LEFT, padx=10, pady=5)
+        
+        tk.Button(
+            color_frame,
+            text="校正文字顏色",
+            command=self.calibrate_text_color,
+            bg='#2196F3',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=20, pady=5)
+        
+        # OCR 設定檔
+        profile_frame = tk.LabelFrame(
+            settings_frame,
+            text="OCR 設定檔（python -m translator_core.tuning 調校產生）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        profile_frame.pack(fill=tk.X, pady=10)
+        
+        self.ocr_profile_label = tk.Label(
+            profile_frame,
+            text="未載入（使用預設 --psm 6）",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.ocr_profile_label.pack(side=tk.LEFT, padx=20, pady=5)
+        
+        tk.Button(
+            profile_frame,
+            text="停用",
+            command=lambda: self.load_ocr_profile(''),
+            bg='#666',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=(0, 20), pady=5)
+        
+        tk.Button(
+            profile_frame,
+            text="載入設定檔",
+            command=self.choose_ocr_profile,
+            bg='#2196F3',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=10, pady=5)
+        
+        # OCR 快取
+        ocr_cache_frame = tk.LabelFrame(
+            settings_frame,
+            text="OCR 快取（重複出現的畫面不再識別）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        ocr_cache_frame.pack(fill=tk.X, pady=10)
+        
+        self.ocr_cache_label = tk.Label(
+            ocr_cache_frame,
+            text=f"{len(self.ocr_cache)} 個畫面",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.ocr_cache_label.pack(side=tk.LEFT, padx=20, pady=5)
+        # 快取在背景載入，完成後更新畫面數
+        self.ocr_cache.when_loaded(lambda count: self.root.after(
+            0, lambda: self.ocr_cache_label.config(text=f"{count} 個畫面")
+        ))
+        
+        tk.Button(
+            ocr_cache_frame,
+            text="清除 OCR 快取",
+            command=self.clear_ocr_cache,
+            bg='#f44336',
+            fg='white',
+            padx=10
+        ).pack(side=tk.RIGHT, padx=20, pady=5)
+        
+        # OCR 工作程序
+        ocr_worker_frame = tk.LabelFrame(
+            settings_frame,
+            text="OCR 工作程序（在獨立程序中識別，閒置後卸載釋放記憶體）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        ocr_worker_frame.pack(fill=tk.X, pady=10)
+        
+        self.ocr_worker_var = tk.BooleanVar(value=self.settings['ocr_worker'])
+        tk.Checkbutton(
+            ocr_worker_frame,
+            text="在獨立程序中執行 OCR",
+            variable=self.ocr_worker_var,
+            command=self.apply_ocr_worker,
+            bg='#1e1e1e',
+            fg='white',
+            selectcolor='#1e1e1e',
+            activebackground='#1e1e1e',
+            activeforeground='white'
+        ).pack(side=tk.LEFT, padx=20, pady=5)
+        
+        tk.Label(
+            ocr_worker_frame,
+            text="閒置卸載 (秒):",
+            bg='#1e1e1e',
+            fg='white'
+        ).pack(side=tk.LEFT, padx=(20, 0))
+        
+        self.ocr_idle_timeout_var = tk.IntVar(value=self.settings['ocr_idle_timeout'])
+        tk.Spinbox(
+            ocr_worker_frame,
+            from_=10,
+            to=3600,
+            increment=10,
+            textvariable=self.ocr_idle_timeout_var,
+            width=6
+        ).pack(side=tk.LEFT, padx=10)
+        self.ocr_idle_timeout_var.trace_add('write', self.apply_ocr_worker)
+        
+        # 遠端翻譯伺服器
+        remote_frame = tk.LabelFrame(
+            settings_frame,
+            text="遠端翻譯伺服器（本機只擷取畫面，識別與翻譯由伺服器處理）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        remote_frame.pack(fill=tk.X, pady=10)
+        
+        tk.Label(
+            remote_frame,
+            text="伺服器 (host:port，留空為本機處理):",
+            bg='#1e1e1e',
+            fg='white'
+        ).pack(side=tk.LEFT, padx=20, pady=5)
+        
+        self.remote_server_var = tk.StringVar(value=self.settings['remote_server'])
+        tk.Entry(
+            remote_frame,
+            textvariable=self.remote_server_var,
+            width=24,
+            bg='#2d2d2d',
+            fg='white',
+            insertbackground='white'
+        ).pack(side=tk.LEFT, padx=10)
+        
+        tk.Label(
+            remote_frame,
+            text="下次開始偵測時生效",
+            bg='#1e1e1e',
+            fg='#999'
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # 工作階段錄製
+        record_frame = tk.LabelFrame(
+            settings_frame,
+            text="工作階段錄製（重現效能或識別問題）",
+            bg='#1e1e1e',
+            fg='white',
+            font=('Arial', 11, 'bold')
+        )
+        record_frame.pack(fill=tk.X, pady=10)
+        
+        self.record_session_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            record_frame,
+            text="偵測時錄製有變化的畫面與結果",
+            variable=self.record_session_var,
+            bg='#1e1e1e',
+            fg='white',
+            selectcolor='#1e1e1e',
+            activebackground='#1e1e1e',
+            activeforeground='white'
+        ).pack(side=tk.LEFT, padx=20, pady=5)
+        
+        self.recording_label = tk.Label(
+            record_frame,
+            text=f"錄製檔存於 {RECORDING_DIR}/",
+            bg='#1e1e1e',
+            fg='#999'
+        )
+        self.recording_label.pack(side=tk.LEFT, padx=10)
+        
         # 儲存按鈕
         tk.Button(
             settings_frame,
@@ -742,6 +1047,15 @@ class MultilingualGameTranslator:
         )
         self.region_label.pack(side=tk.RIGHT, padx=10)
         
+        self.service_label = tk.Label(
+            status_frame,
+            text="翻譯服務: 正常",
+            bg='#0d0d0d',
+            fg='#888',
+            font=('Arial', 9)
+        )
+        self.service_label.pack(side=tk.RIGHT, padx=10)
+        
         self.current_lang_label = tk.Label(
             status_frame,
             text="--",
@@ -755,9 +1069,16 @@ class MultilingualGameTranslator:
         """設定快捷鍵"""
         keyboard.add_hotkey('f2', self.select_capture_region)
         keyboard.add_hotkey('f3', self.toggle_capture)
+        keyboard.add_hotkey('f4', self.one_shot_translate)
         keyboard.add_hotkey('f5', self.quick_switch_language)
         keyboard.add_hotkey('ctrl+s', self.save_current_session)
         
+        # 預先建立管線與翻譯器，第一次按 F4 時不必等待初始化
+        try:
+            self.engine.warm_up()
+        except Exception as e:
+            print(f"預熱翻譯管線失敗: {e}")
+        
     def toggle_auto_detect(self):
         """切換自動偵測語言"""
         self.settings['auto_detect'] = self.auto_detect_var.get()
@@ -786,7 +1107,7 @@ class MultilingualGameTranslator:
         """快速切換常用語言 (F5)"""
         # 定義快速切換順序
         quick_langs = ['jpn', 'kor', 'eng', 'chi_sim']
-        current = self.source_lang_var.get()
+        current = self.get_source_code()
         
         try:
             current_index = quick_langs.index(current)
@@ -798,7 +1119,7 @@ class MultilingualGameTranslator:
             
     def update_language_display(self):
         """更新語言顯示"""
-        source_code = self.source_lang_var.get()
+        source_code = self.get_source_code()
         target_code = self.get_target_code()
         
         if source_code in self.installed_languages:
@@ -812,6 +1133,13 @@ class MultilingualGameTranslator:
             text=f"{source_name}→{target_name}" if source_code in self.installed_languages else "--"
         )
         
+    def get_source_code(self):
+        """取得來源語言代碼（下拉選單的值為「名稱 (代碼)」）"""
+        value = self.source_lang_var.get()
+        if value.endswith(')') and '(' in value:
+            return value[value.rindex('(') + 1:-1]
+        return value
+        
     def get_target_code(self):
         """取得目標語言代碼"""
         target_name = self.target_lang_var.get()
@@ -885,6 +1213,7 @@ class MultilingualGameTranslator:
                 
                 if x2 - x1 > 10 and y2 - y1 > 10:
                     self.capture_region = (x1, y1, x2 - x1, y2 - y1)
+                    self.engine.config.publish(region=self.capture_region)
                     self.region_label.config(
                         text=f"區域: {x2-x1}x{y2-y1} @ ({x1},{y1})",
                         fg='white'
@@ -930,10 +1259,11 @@ class MultilingualGameTranslator:
             self.status_label.config(text="偵測中...", fg='#4CAF50')
             self.update_language_display()
             
-            # 啟動擷取執行緒
-            self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
-            self.capture_thread.start()
+            # 啟動擷取工作（同一時間只會有一個）
+            self.start_capture_session()
         else:
+            # 要求停止，不等待進行中的階段；結束時回報停止延遲
+            self.session.stop(wait=False)
             # 更新按鈕
             for widget in self.root.winfo_children():
                 for child in widget.winfo_children():
@@ -942,182 +1272,157 @@ class MultilingualGameTranslator:
                         
             self.status_label.config(text="已停止", fg='#FFC107')
             
-    def capture_loop(self):
-        """擷取循環"""
-        last_text_hash = ""
+    def capture_backend(self):
+        """擷取循環的執行者：設定了翻譯伺服器時為遠端用戶端，否則為本機翻譯管線"""
+        address = self.remote_server_var.get().strip()
+        if not address:
+            return self.engine
+        try:
+            parsed = parse_address(address)
+        except ValueError:
+            messagebox.showerror("錯誤", f"伺服器位址格式錯誤: {address}，改由本機處理")
+            return self.engine
+        if self.remote_client is None or self.remote_client.address != parsed:
+            self.remote_client = RemoteCaptureClient(self.engine, parsed)
+        return self.remote_client
+        
+    def start_capture_session(self):
+        """啟動擷取工作，回呼一律轉交 UI 執行緒"""
+        metrics = self.engine.metrics
+        # 遠端用戶端與本機管線共用效能統計、設定與歷史記錄
+        self.session.engine = self.capture_backend()
+        update_translation = metrics.timed('ui_render', self.update_translation)
+        update_preview = metrics.timed('ui_preview', self.update_preview)
+        self.start_recording()
+        
+        self.session.start(
+            on_result=lambda screenshot, result, translation: self.root.after(
+                0, update_translation,
+                result['text'], translation, result['language'], result['confidence']
+            ),
+            on_preview=lambda screenshot: self.root.after(0, update_preview, screenshot),
+            on_low_confidence=lambda result: self.root.after(
+                0, self.update_confidence, result['confidence']
+            ),
+            on_stopped=lambda latency: self.root.after(0, self.on_capture_stopped, latency)
+        )
         
-        while self.is_capturing:
-            try:
-                # 擷取指定區域
-                x, y, w, h = self.capture_region
-                screenshot = pyautogui.screenshot(region=(x, y, w, h))
-                
-                # 更新預覽
-                self.root.after(0, self.update_preview, screenshot)
-                
-                # 預處理影像
-                if self.preprocessing_var.get():
-                    processed_img = self.preprocess_image(screenshot)
-                else:
-                    processed_img = np.array(screenshot)
-                    
-                # OCR 識別
-                if self.auto_detect_var.get() or self.ocr_mode_var.get() == 'multi':
-                    # 多語言模式
-                    result = self.multi_language_ocr(processed_img)
-                else:
-                    # 單一語言模式
-                    result = self.single_language_ocr(processed_img)
-                    
-                if result and result['text']:
-                    current_hash = hash(result['text'])
-                    if current_hash != last_text_hash:
-                        last_text_hash = current_hash
-                        
-                        # 檢查信心度
-                        if result['confidence'] >= self.confidence_var.get():
-                            # 翻譯
-                            translation = self.translate_text(
-                                result['text'],
-                                result['language']
-                            )
-                            
-                            # 更新顯示
-                            self.root.after(0, self.update_translation,
-                                          result['text'],
-                                          translation,
-                                          result['language'],
-                                          result['confidence'])
-                        else:
-                            self.root.after(0, self.update_confidence,
-                                          result['confidence'])
-                            
-            except Exception as e:
-                print(f"擷取錯誤: {e}")
-                
-            time.sleep(self.interval_var.get())
+    def on_capture_stopped(self, latency):
+        """擷取工作結束（於 UI 執行緒執行）"""
+        # 已重新開始偵測時，錄製器屬於新的工作階段
+        if not self.is_capturing:
+            self.stop_recording()
+            self.status_label.config(text=f"已停止 (停止耗時 {latency * 1000:.0f} ms)", fg='#FFC107')
+        
+    def start_recording(self):
+        """開始偵測時依設定建立錄製器（只錄製本機處理的工作階段）"""
+        self.stop_recording()
+        if self.record_session_var.get() and self.session.engine is self.engine:
+            path = recording_path()
+            self.engine.recorder = SessionRecorder(path)
+            self.recording_label.config(text=f"錄製中: {path}", fg='#f44336')
             
-    def preprocess_image(self, image):
-        """影像預處理"""
-        # 轉換為 numpy 陣列
-        img = np.array(image)
-        
-        # 轉換為灰階
-        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-        
-        # 提高對比度
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
-        
-        # 去噪
-        denoised = cv2.fastNlMeansDenoising(enhanced)
-        
-        # 放大
-        scaled = cv2.resize(denoised, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
-        
-        # 銳化
-        kernel = np.array([[-1,-1,-1],
-                          [-1, 9,-1],
-                          [-1,-1,-1]])
-        sharpened = cv2.filter2D(scaled, -1, kernel)
+    def stop_recording(self):
+        """擷取工作結束後寫完並關閉錄製檔"""
+        recorder = self.engine.recorder
+        if recorder is None:
+            return
+        self.engine.recorder = None
+        recorder.close()
+        self.recording_label.config(
+            text=f"已錄製 {recorder.events} 張畫面: {recorder.path}", fg='#999'
+        )
         
-        # 二值化
-        _, binary = cv2.threshold(sharpened, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    def preprocessing_mode(self):
+        """預處理方案：已校正文字顏色且啟用遮罩時使用快速的顏色遮罩"""
+        if self.color_mask_var.get() and self.text_colors is not None:
+            return 'color'
+        return 'advanced' if self.preprocessing_var.get() else 'none'
+        
+    def publish_config(self, *args):
+        """發布擷取管線設定，擷取執行緒只讀取發布的快照"""
+        multi = self.auto_detect_var.get() or self.ocr_mode_var.get() == 'multi'
+        self.engine.config.publish(
+            region=self.capture_region,
+            preprocessing=self.preprocessing_mode(),
+            ocr_engine='tesseract',
+            ocr_mode='multi' if multi else 'single',
+            language=self.get_source_code(),
+            languages=self.installed_languages.keys(),
+            target_language=self.get_target_code(),
+            confidence_threshold=self.confidence_var.get(),
+            interval=self.interval_var.get(),
+            ocr_profile=self.ocr_profile,
+            text_colors=self.text_colors
+        )
         
-        return binary
+    def screenshot_translate(self):
+        """單次截圖翻譯"""
+        if not self.capture_region:
+            messagebox.showwarning("提示", "請先選擇擷取區域！")
+            return
+            
+        self.one_shot_translate()
         
-    def single_language_ocr(self, image):
-        """單一語言 OCR"""
-        lang_code = self.source_lang_var.get()
+    def one_shot_translate(self):
+        """單次翻譯（F4）：立即擷取、識別並翻譯，結果顯示在覆蓋視窗
         
-        try:
-            # 使用 Tesseract 進行 OCR
-            data = pytesseract.image_to_data(
-                image,
-                lang=lang_code,
-                output_type=pytesseract.Output.DICT,
-                config='--psm 6'
-            )
-            
-            # 計算平均信心度
-            confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-            
-            # 組合文字
-            text = ' '.join([data['text'][i] for i in range(len(data['text'])) 
-                           if int(data['conf'][i]) > 0])
-            
-            return {
-                'text': text.strip(),
-                'language': lang_code,
-                'confidence': avg_confidence
-            }
-        except Exception as e:
-            print(f"OCR 錯誤: {e}")
-            return None
+        從快捷鍵執行緒呼叫也安全；從按鍵到覆蓋視窗顯示的延遲記錄在效能統計的 one_shot 階段。
+        """
+        pressed = time.perf_counter()
+        if not self.capture_region:
+            self.root.after(0, lambda: self.status_label.config(text="請先選擇擷取區域", fg='#FFC107'))
+            return
+        if not self.one_shot_lock.acquire(blocking=False):
+            return
             
-    def multi_language_ocr(self, image):
-        """多語言 OCR (自動偵測)"""
-        best_result = None
-        best_confidence = 0
+        config = self.engine.config.current
         
-        # 嘗試所有已安裝的語言
-        for lang_code in self.installed_languages.keys():
+        def run():
             try:
-                data = pytesseract.image_to_data(
-                    image,
-                    lang=lang_code,
-                    output_type=pytesseract.Output.DICT,
-                    config='--psm 6'
-                )
-                
-                # 計算信心度
-                confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-                avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-                
-                # 如果信心度更高，更新最佳結果
-                if avg_confidence > best_confidence:
-                    text = ' '.join([data['text'][i] for i in range(len(data['text'])) 
-                                   if int(data['conf'][i]) > 0])
-                    
-                    if text.strip():
-                        best_confidence = avg_confidence
-                        best_result = {
-                            'text': text.strip(),
-                            'language': lang_code,
-                            'confidence': avg_confidence
-                        }
-                        
-            except:
-                continue
+                screenshot, result, translation = self.engine.translate_once(config)
+            except Exception as e:
+                print(f"擷取錯誤: {e}")
+                self.root.after(0, lambda: self.status_label.config(text="截圖翻譯失敗", fg='#f44336'))
+                return
+            finally:
+                self.one_shot_lock.release()
                 
-        return best_result
-        
-    def translate_text(self, text, source_lang_code):
-        """翻譯文字"""
-        try:
-            # 取得語言代碼
-            source_google = self.installed_languages[source_lang_code]['google_code']
-            target_google = self.get_target_code()
+            self.root.after(0, self.show_one_shot, pressed, screenshot, result, translation)
             
-            # 檢查快取
-            cache_key = f"{text}_{source_google}_{target_google}"
-            if cache_key in self.translation_cache:
-                return self.translation_cache[cache_key]
-                
-            # 執行翻譯
-            result = self.translator.translate(
-                text,
-                src=source_google,
-                dest=target_google
-            )
+        threading.Thread(target=run, name='one-shot', daemon=True).start()
+        
+    def show_one_shot(self, pressed, screenshot, result, translation):
+        """顯示單次翻譯結果：先更新覆蓋視窗，再更新主視窗與歷史"""
+        if translation is None:
+            self.update_preview(screenshot)
+            self.status_label.config(text="未識別到文字", fg='#FFC107')
+            return
             
-            # 儲存到快取
-            self.translation_cache[cache_key] = result.text
+        self.overlay.show_text(f"{result['text']}\n{translation}")
+        latency = time.perf_counter() - pressed
+        self.engine.metrics.observe('one_shot', latency)
+        
+        self.update_translation(result['text'], translation, result['language'], result['confidence'])
+        self.update_preview(screenshot)
+        self.status_label.config(
+            text=f"截圖翻譯完成（{latency * 1000:.0f} ms）",
+            fg='#4CAF50' if latency <= ONE_SHOT_TARGET else '#FF9800'
+        )
             
-            return result.text
-        except Exception as e:
-            return f"翻譯錯誤: {str(e)}"
+    def update_service_status(self):
+        """狀態列顯示翻譯服務狀態；中斷期間每秒更新重試倒數"""
+        breaker = self.engine.translation.breaker
+        if breaker.state == 'open':
+            self.service_label.config(
+                text=f"翻譯服務中斷，僅使用快取與詞彙表 ({breaker.retry_in():.0f} 秒後重試)",
+                fg='#f44336'
+            )
+            self.root.after(1000, self.update_service_status)
+        elif breaker.state == 'half_open':
+            self.service_label.config(text="翻譯服務: 重新連線中...", fg='#FFC107')
+        else:
+            self.service_label.config(text="翻譯服務: 正常", fg='#888')
             
     def update_preview(self, screenshot):
         """更新預覽圖片"""
@@ -1171,17 +1476,8 @@ class MultilingualGameTranslator:
         self.translation_display.insert(tk.END, "-" * 70 + "\n")
         self.translation_display.see(tk.END)
         
-        # 儲存到歷史
-        history_item = {
-            'timestamp': timestamp,
-            'date': datetime.now().strftime("%Y-%m-%d"),
-            'language': language,
-            'language_name': lang_name,
-            'source': source_text,
-            'target': target_text,
-            'confidence': confidence
-        }
-        self.translation_history.append(history_item)
+        # 儲存到歷史（顯示用的時間與語言名稱在讀取時產生）
+        self.translation_history.append(source_text, target_text, language, confidence)
         
         # 更新歷史列表
         self.history_listbox.insert(
@@ -1202,19 +1498,16 @@ class MultilingualGameTranslator:
     def update_statistics(self):
         """更新統計資訊"""
         total = len(self.translation_history)
-        today = sum(1 for item in self.translation_history 
-                   if item['date'] == datetime.now().strftime("%Y-%m-%d"))
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        today = self.translation_history.count_since(midnight.timestamp())
         
         # 語言分布
-        lang_count = {}
-        for item in self.translation_history:
-            lang = item['language_name']
-            lang_count[lang] = lang_count.get(lang, 0) + 1
+        lang_count = self.translation_history.language_counts()
             
         # 找出最常用的語言
         if lang_count:
             top_lang = max(lang_count.items(), key=lambda x: x[1])
-            lang_dist = f"{top_lang[0]} ({top_lang[1]}次)"
+            lang_dist = f"{language_name(top_lang[0])} ({top_lang[1]}次)"
         else:
             lang_dist = "--"
             
@@ -1235,8 +1528,8 @@ class MultilingualGameTranslator:
         self.history_listbox.delete(0, tk.END)
         
         for item in self.translation_history:
-            if filter_lang == "全部" or item['language_name'] == filter_lang:
-                display_text = f"{item['timestamp']} [{item['language_name']}] {item['source'][:30]}..."
+            if filter_lang == "全部" or item.language_name == filter_lang:
+                display_text = f"{item.timestamp} [{item.language_name}] {item.source[:30]}..."
                 self.history_listbox.insert(tk.END, display_text)
                 
     def show_history_detail(self, event):
@@ -1248,7 +1541,7 @@ class MultilingualGameTranslator:
             timestamp = display_text.split(' ')[0]
             
             for item in self.translation_history:
-                if item['timestamp'] == timestamp:
+                if item.timestamp == timestamp:
                     # 建立詳情視窗
                     detail_window = tk.Toplevel(self.root)
                     detail_window.title("翻譯詳情")
@@ -1265,18 +1558,18 @@ class MultilingualGameTranslator:
                     )
                     detail_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
                     
-                    detail_text.insert(tk.END, f"時間: {item['date']} {item['timestamp']}\n")
-                    detail_text.insert(tk.END, f"語言: {item['language_name']} ({item['language']})\n")
-                    detail_text.insert(tk.END, f"信心度: {item['confidence']:.1f}%\n\n")
-                    detail_text.insert(tk.END, f"原文:\n{item['source']}\n\n")
-                    detail_text.insert(tk.END, f"譯文:\n{item['target']}")
+                    detail_text.insert(tk.END, f"時間: {item.date} {item.timestamp}\n")
+                    detail_text.insert(tk.END, f"語言: {item.language_name} ({item.language})\n")
+                    detail_text.insert(tk.END, f"信心度: {item.confidence:.1f}%\n\n")
+                    detail_text.insert(tk.END, f"原文:\n{item.source}\n\n")
+                    detail_text.insert(tk.END, f"譯文:\n{item.target}")
                     detail_text.config(state=tk.DISABLED)
                     
                     # 複製按鈕
                     tk.Button(
                         detail_window,
                         text="複製譯文",
-                        command=lambda: self.copy_to_clipboard(item['target']),
+                        command=lambda: self.copy_to_clipboard(item.target),
                         bg='#4CAF50',
                         fg='white',
                         font=('Arial', 10)
@@ -1291,8 +1584,8 @@ class MultilingualGameTranslator:
         self.status_label.config(text="已複製到剪貼簿", fg='#4CAF50')
         
     def export_history(self):
-        """匯出歷史記錄"""
-        if not self.translation_history:
+        """匯出歷史記錄（背景串流寫入）"""
+        if not self.history_store.has_records():
             messagebox.showinfo("提示", "沒有可匯出的歷史記錄")
             return
             
@@ -1308,60 +1601,280 @@ class MultilingualGameTranslator:
         )
         
         if filename:
-            try:
-                if filename.endswith('.json'):
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        json.dump(list(self.translation_history), f, ensure_ascii=False, indent=2)
-                elif filename.endswith('.csv'):
-                    import csv
-                    with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
-                        writer = csv.DictWriter(f, fieldnames=['date', 'timestamp', 'language_name', 
-                                                              'source', 'target', 'confidence'])
-                        writer.writeheader()
-                        writer.writerows(self.translation_history)
-                else:  # txt
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        for item in self.translation_history:
-                            f.write(f"[{item['date']} {item['timestamp']}]\n")
-                            f.write(f"語言: {item['language_name']} (信心度: {item['confidence']:.1f}%)\n")
-                            f.write(f"原文: {item['source']}\n")
-                            f.write(f"譯文: {item['target']}\n")
-                            f.write("-" * 70 + "\n\n")
-                            
-                messagebox.showinfo("成功", "歷史記錄已匯出")
-            except Exception as e:
-                messagebox.showerror("錯誤", f"匯出失敗: {str(e)}")
+            self.status_label.config(text="匯出中...", fg='#FFC107')
+            self.history_store.export_async(
+                filename,
+                ['date', 'timestamp', 'language_name', 'source', 'target', 'confidence'],
+                self.write_history_text,
+                transform=self.history_export_item,
+                on_done=lambda count, error: self.root.after(0, self.on_export_done, count, error),
+                progress=lambda count: self.root.after(
+                    0, lambda: self.status_label.config(text=f"匯出中... {count} 筆", fg='#FFC107')
+                )
+            )
+            
+    def history_export_item(self, item):
+        """補上匯出所需的語言名稱"""
+        item['language_name'] = LANGUAGES.get(item['language'], {}).get('name', item['language'])
+        return item
+        
+    def write_history_text(self, f, item):
+        """以純文字格式寫入一筆歷史"""
+        f.write(f"[{item['date']} {item['timestamp']}]\n")
+        f.write(f"語言: {item['language_name']} (信心度: {item['confidence']:.1f}%)\n")
+        f.write(f"原文: {item['source']}\n")
+        f.write(f"譯文: {item['target']}\n")
+        f.write("-" * 70 + "\n\n")
+        
+    def on_export_done(self, count, error):
+        """匯出完成（於 UI 執行緒執行）"""
+        if error:
+            messagebox.showerror("錯誤", f"匯出失敗: {str(error)}")
+            self.status_label.config(text="匯出失敗", fg='#f44336')
+        else:
+            self.status_label.config(text=f"已匯出 {count} 筆記錄", fg='#4CAF50')
+            messagebox.showinfo("成功", "歷史記錄已匯出")
                 
     def clear_history(self):
         """清空歷史記錄"""
-        if self.translation_history:
+        if self.translation_history or self.history_store.has_records():
             if messagebox.askyesno("確認", "確定要清空所有歷史記錄嗎？"):
                 self.translation_history.clear()
+                self.history_store.clear()
                 self.history_listbox.delete(0, tk.END)
                 self.translation_display.delete(1.0, tk.END)
                 self.update_statistics()
                 self.status_label.config(text="已清空歷史記錄", fg='#4CAF50')
                 
     def save_current_session(self):
-        """儲存當前工作階段"""
-        if not self.translation_history:
+        """儲存當前工作階段（本次執行的所有記錄）"""
+        session = self.history_store.session
+        if not self.history_store.has_records(session):
             self.status_label.config(text="沒有可儲存的記錄", fg='#FFC107')
             return
             
         filename = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        self.status_label.config(text="儲存中...", fg='#FFC107')
+        
+        def on_done(count, error):
+            if error:
+                self.status_label.config(text=f"儲存失敗: {str(error)}", fg='#f44336')
+            else:
+                self.status_label.config(text=f"已儲存: {filename}", fg='#4CAF50')
+                
+        self.history_store.export_async(
+            filename,
+            None,
+            None,
+            transform=self.history_export_item,
+            session=session,
+            on_done=lambda count, error: self.root.after(0, on_done, count, error)
+        )
+            
+    def load_phrase_table(self, path):
+        """載入遊戲詞彙表索引，翻譯時優先於快取與網路"""
+        table = load_phrase_table(path)
+        old = self.engine.translation.phrases
+        self.engine.translation.phrases = table
+        if old is not None and old is not table:
+            old.close()
+            
+        self.settings['phrase_table'] = path if table else ''
+        if table:
+            self.phrase_label.config(
+                text=f"{os.path.basename(path)} ({len(table)} 筆, 譯文 {table.target_language})",
+                fg='#4CAF50'
+            )
+        else:
+            self.phrase_label.config(text="未載入", fg='#999')
+            
+    def import_phrase_table(self):
+        """從 CSV/JSON 匯入詞彙表（背景編譯為索引檔）"""
+        filename = filedialog.askopenfilename(
+            filetypes=[
+                ("CSV files", "*.csv"),
+                ("TSV files", "*.tsv"),
+                ("JSON files", "*.json"),
+                ("All files", "*.*")
+            ]
+        )
+        if not filename:
+            return
+            
+        path = phrase_table_path(os.path.splitext(os.path.basename(filename))[0])
+        target = self.get_target_code()
+        
+        # 重新匯入目前使用中的詞彙表時，先關閉舊的索引才能取代檔案
+        current = self.engine.translation.phrases
+        if current is not None and os.path.abspath(current.path) == os.path.abspath(path):
+            self.load_phrase_table('')
+            
+        self.status_label.config(text="正在編譯詞彙表...", fg='#FFC107')
+        
+        def run():
+            try:
+                count = compile_phrase_table(read_phrase_pairs(filename), path, target)
+            except Exception as e:
+                self.root.after(0, self.on_phrase_table_compiled, path, 0, e)
+                return
+            self.root.after(0, self.on_phrase_table_compiled, path, count, None)
+            
+        threading.Thread(target=run, daemon=True).start()
+        
+    def on_phrase_table_compiled(self, path, count, error):
+        """詞彙表編譯完成（於 UI 執行緒執行）"""
+        if error:
+            self.status_label.config(text="詞彙表匯入失敗", fg='#f44336')
+            messagebox.showerror("錯誤", f"匯入詞彙表失敗: {str(error)}")
+            return
+            
+        self.load_phrase_table(path)
+        self.status_label.config(text=f"已匯入 {count} 筆詞彙", fg='#4CAF50')
+        
+    def load_script_corpus(self, path):
+        """載入劇本語料索引，識別結果會先對齊到最接近的原句"""
+        corpus = load_corpus(path)
+        old = self.engine.corpus
+        self.engine.corpus = corpus
+        if old is not None and old is not corpus:
+            old.close()
+            
+        self.settings['script_corpus'] = path if corpus else ''
+        if corpus:
+            target = f", 譯文 {corpus.target_language}" if corpus.target_language else ""
+            self.corpus_label.config(
+                text=f"{os.path.basename(path)} ({len(corpus)} 行{target})",
+                fg='#4CAF50'
+            )
+        else:
+            self.corpus_label.config(text="未載入", fg='#999')
+            
+    def import_script_corpus(self):
+        """匯入遊戲劇本：TXT 每行一句，或含譯文的 CSV/JSON（背景編譯為索引檔）"""
+        filename = filedialog.askopenfilename(
+            filetypes=[
+                ("Text files", "*.txt"),
+                ("CSV files", "*.csv"),
+                ("TSV files", "*.tsv"),
+                ("JSON files", "*.json"),
+                ("All files", "*.*")
+            ]
+        )
+        if not filename:
+            return
+            
+        path = corpus_path(os.path.splitext(os.path.basename(filename))[0])
+        target = '' if filename.lower().endswith('.txt') else self.get_target_code()
+        
+        # 重新匯入目前使用中的語料時，先關閉舊的索引才能取代檔案
+        current = self.engine.corpus
+        if current is not None and os.path.abspath(current.path) == os.path.abspath(path):
+            self.load_script_corpus('')
+            
+        self.status_label.config(text="正在編譯劇本語料...", fg='#FFC107')
+        
+        def run():
+            try:
+                count = compile_corpus(read_corpus_lines(filename), path, target)
+            except Exception as e:
+                self.root.after(0, self.on_script_corpus_compiled, path, 0, e)
+                return
+            self.root.after(0, self.on_script_corpus_compiled, path, count, None)
+            
+        threading.Thread(target=run, daemon=True).start()
+        
+    def on_script_corpus_compiled(self, path, count, error):
+        """劇本語料編譯完成（於 UI 執行緒執行）"""
+        if error:
+            self.status_label.config(text="劇本匯入失敗", fg='#f44336')
+            messagebox.showerror("錯誤", f"匯入劇本失敗: {str(error)}")
+            return
+            
+        self.load_script_corpus(path)
+        self.status_label.config(text=f"已匯入 {count} 行劇本", fg='#4CAF50')
+        
+    def calibrate_text_color(self):
+        """擷取目前區域，開啟文字顏色校正視窗"""
+        if not self.capture_region:
+            messagebox.showwarning("提示", "請先選擇擷取區域！")
+            return
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(list(self.translation_history), f, ensure_ascii=False, indent=2)
-            self.status_label.config(text=f"已儲存: {filename}", fg='#4CAF50')
+            screenshot = capture_region(self.capture_region)
         except Exception as e:
-            self.status_label.config(text=f"儲存失敗: {str(e)}", fg='#f44336')
+            messagebox.showerror("錯誤", f"擷取失敗: {str(e)}")
+            return
+        TextColorCalibrator(self.root, screenshot, self.on_text_color_calibrated)
+        
+    def on_text_color_calibrated(self, model):
+        """套用校正後的文字顏色模型並啟用顏色遮罩"""
+        self.text_colors = model
+        self.settings['text_colors'] = model.to_list()
+        self.update_text_color_label()
+        self.color_mask_var.set(True)
+        self.publish_config()
+        
+    def update_text_color_label(self):
+        if self.text_colors is None:
+            self.text_color_label.config(text="未校正", fg='#999')
+        else:
+            self.text_color_label.config(text=f"已校正 {len(self.text_colors.ranges)} 種文字顏色", fg='#4CAF50')
+            
+    def load_ocr_profile(self, path):
+        """載入遊戲的 OCR 設定檔，單一語言 Tesseract 識別依設定檔的 PSM/OEM/倍率執行"""
+        profile = load_ocr_profile(path)
+        self.ocr_profile = profile
+        self.settings['ocr_profile'] = path if profile else ''
+        if profile:
+            self.ocr_profile_label.config(
+                text=(
+                    f"{os.path.basename(path)} ({profile.language}, {profile.preprocessing} x{profile.scale:g}, "
+                    f"psm {profile.psm}, 正確率 {profile.accuracy:.0%}, {profile.latency_ms:.0f} ms)"
+                ),
+                fg='#4CAF50'
+            )
+        else:
+            self.ocr_profile_label.config(text="未載入（使用預設 --psm 6）", fg='#999')
+        self.publish_config()
+        
+    def choose_ocr_profile(self):
+        """選擇 OCR 設定檔"""
+        filename = filedialog.askopenfilename(
+            initialdir=PROFILE_DIR if os.path.isdir(PROFILE_DIR) else None,
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        if filename:
+            self.load_ocr_profile(filename)
+            if self.ocr_profile is None:
+                messagebox.showerror("錯誤", "無法載入 OCR 設定檔")
+                
+    def clear_ocr_cache(self):
+        """清除 OCR 快取（更新 Tesseract 語言資料後使用）"""
+        if messagebox.askyesno("確認", "確定要清除 OCR 快取嗎？"):
+            self.ocr_cache.clear()
+            self.ocr_cache_label.config(text="0 個畫面")
+            
+    def apply_ocr_worker(self, *args):
+        """啟用或停用 OCR 工作程序；停用時立即卸載（之後在本程序識別）"""
+        try:
+            self.ocr_worker.idle_timeout = max(10, self.ocr_idle_timeout_var.get())
+        except tk.TclError:
+            pass
+        if self.ocr_worker_var.get():
+            self.engine.ocr_worker = self.ocr_worker
+        else:
+            self.engine.ocr_worker = None
+            self.ocr_worker.stop()
             
     def save_settings(self):
         """儲存設定"""
-        self.settings['source_language'] = self.source_lang_var.get()
+        self.settings['source_language'] = self.get_source_code()
         self.settings['target_language'] = self.get_target_code()
         self.settings['ocr_mode'] = self.ocr_mode_var.get()
         self.settings['preprocessing'] = self.preprocessing_var.get()
+        self.settings['color_mask'] = self.color_mask_var.get()
+        self.settings['ocr_worker'] = self.ocr_worker_var.get()
+        self.settings['ocr_idle_timeout'] = self.ocr_idle_timeout_var.get()
+        self.settings['remote_server'] = self.remote_server_var.get().strip()
         self.settings['update_interval'] = self.interval_var.get()
         self.settings['confidence_threshold'] = self.confidence_var.get()
         self.settings['auto_detect'] = self.auto_detect_var.get()
@@ -1386,7 +1899,12 @@ class MultilingualGameTranslator:
     def on_closing(self):
         """關閉程式時的處理"""
         self.is_capturing = False
+        self.session.stop(timeout=2.0)
+        self.stop_recording()
         self.save_settings()
+        self.history_store.close()
+        self.ocr_cache.close()
+        self.ocr_worker.close()
         self.root.destroy()
         """關閉程式時的處理"""
         self.is_capturing = False
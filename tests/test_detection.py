@@ -0,0 +1,58 @@
+"""自動偵測語言的區域鎖定測試"""
+from PIL import Image
+
+from translator_core import ocr
+from translator_core.detection import MAX_EMPTY
+from translator_core.engine import TranslationEngine
+
+REGION = (0, 0, 200, 50)
+
+
+def make_engine(monkeypatch, screen):
+    """screen['language'] 是畫面上文字的語言；其他語言識別不出文字"""
+    calls = []
+
+    def fake_tesseract(image, lang, config=None, parallel=True):
+        calls.append(lang)
+        if lang == screen['language']:
+            return {'text': '文字', 'language': lang, 'confidence': 90.0}
+        return {'text': '', 'language': lang, 'confidence': 0.0}
+
+    monkeypatch.setattr(ocr, 'tesseract_ocr', fake_tesseract)
+    engine = TranslationEngine()
+    engine.config.publish(
+        region=REGION, ocr_mode='multi', languages=('jpn', 'kor'),
+        confidence_threshold=60, adaptive_scale=False
+    )
+    return engine, calls
+
+
+def recognize(engine):
+    config = engine.config.current
+    return engine.process(Image.new('RGB', (200, 50), 'white'), engine.pipeline_for(config))
+
+
+def test_locked_language_skips_full_detection(monkeypatch):
+    engine, calls = make_engine(monkeypatch, {'language': 'jpn'})
+    assert recognize(engine)['language'] == 'jpn'
+    calls.clear()
+
+    for _ in range(5):
+        assert recognize(engine)['language'] == 'jpn'
+    assert calls == ['jpn'] * 5
+
+
+def test_redetects_when_locked_language_goes_empty(monkeypatch):
+    screen = {'language': 'jpn'}
+    engine, calls = make_engine(monkeypatch, screen)
+    assert recognize(engine)['language'] == 'jpn'
+
+    # 畫面換成鎖定語言認不出的文字：連續 MAX_EMPTY 次沒有文字後重新偵測
+    screen['language'] = 'kor'
+    results = [recognize(engine) for _ in range(MAX_EMPTY + 1)]
+    assert all(not result['text'] for result in results[:MAX_EMPTY])
+    assert results[-1]['language'] == 'kor'
+
+    calls.clear()
+    assert recognize(engine)['language'] == 'kor'
+    assert calls == ['kor']
@@ -0,0 +1,45 @@
+"""翻譯歷史資料庫的測試"""
+import json
+
+from translator_core.history import HistoryStore
+
+
+def test_live_duplicates_are_kept(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    try:
+        store.append('hello', '你好', 'eng', 90, ts=1000.2)
+        store.append('hello', '你好', 'eng', 90, ts=1000.7)
+        assert store.count() == 2
+    finally:
+        store.close()
+
+
+def test_reimport_skips_existing_rows(tmp_path):
+    filename = tmp_path / 'export.json'
+    record = {'source': 'hello', 'target': '你好', 'date': '2024-01-01', 'timestamp': '10:00:00'}
+    filename.write_text(json.dumps([record, record]), encoding='utf-8')
+
+    store = HistoryStore(str(tmp_path / 'history.db'))
+    try:
+        assert store.import_file(str(filename))[:2] == (2, 1)
+        assert store.import_file(str(filename))[:2] == (2, 0)
+        assert store.count() == 1
+    finally:
+        store.close()
+
+
+def test_clear_session_keeps_other_sessions(tmp_path):
+    path = str(tmp_path / 'history.db')
+    first = HistoryStore(path)
+    first.session -= 1    # 工作階段以啟動秒數區分
+    first.append('hello', '你好', 'eng', 90, ts=1000.0)
+    first.close()
+
+    second = HistoryStore(path)
+    try:
+        second.append('bye', '再見', 'eng', 90, ts=2000.0)
+        second.clear(second.session)
+        assert not second.has_records(second.session)
+        assert second.count() == 1
+    finally:
+        second.close()
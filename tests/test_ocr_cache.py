@@ -0,0 +1,69 @@
+"""OCR 快取的測試"""
+import numpy as np
+from PIL import Image, ImageDraw
+
+from translator_core.config import PipelineConfig
+from translator_core.ocr_cache import OcrCache
+
+CONFIG = PipelineConfig(region=(0, 0, 400, 120), language='eng')
+RESULT = {'text': 'Hello there', 'language': 'eng', 'confidence': 91.0}
+
+
+def textured_frame(text, seed=0):
+    """有紋理背景與文字的 400×120 畫面"""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:120, 0:400]
+    background = 60 + 40 * np.sin(xx / 7.0) * np.cos(yy / 5.0) + rng.integers(0, 30, (120, 400))
+    image = Image.fromarray(np.repeat(background[..., None], 3, axis=2).astype(np.uint8))
+    ImageDraw.Draw(image).text((20, 40), text, fill=(255, 255, 255))
+    return np.asarray(image)
+
+
+def noisy_copy(frame, rng, amount=2):
+    noise = rng.integers(-amount, amount + 1, frame.shape)
+    return np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def open_cache(tmp_path):
+    cache = OcrCache(str(tmp_path / 'ocr_cache.db'))
+    cache.loaded.wait(5)
+    return cache
+
+
+def test_noisy_copy_hits(tmp_path):
+    cache = open_cache(tmp_path)
+    try:
+        frame = textured_frame('Hello there')
+        cache.put(cache.key(frame, CONFIG), RESULT)
+
+        rng = np.random.default_rng(1)
+        hits = sum(
+            cache.get(cache.key(noisy_copy(frame, rng), CONFIG)) is not None for _ in range(20)
+        )
+        assert hits == 20
+    finally:
+        cache.close()
+
+
+def test_different_text_misses(tmp_path):
+    cache = open_cache(tmp_path)
+    try:
+        cache.put(cache.key(textured_frame('Hello there'), CONFIG), RESULT)
+        assert cache.get(cache.key(textured_frame('Hello thete'), CONFIG)) is None
+        assert cache.get(cache.key(textured_frame('Goodbye now'), CONFIG)) is None
+    finally:
+        cache.close()
+
+
+def test_entries_persist(tmp_path):
+    cache = open_cache(tmp_path)
+    frame = textured_frame('Hello there')
+    cache.put(cache.key(frame, CONFIG), RESULT)
+    cache.close()
+
+    cache = open_cache(tmp_path)
+    try:
+        rng = np.random.default_rng(2)
+        assert cache.get(cache.key(noisy_copy(frame, rng), CONFIG))['text'] == 'Hello there'
+    finally:
+        cache.close()
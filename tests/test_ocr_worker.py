@@ -0,0 +1,40 @@
+"""OCR 工作程序的測試"""
+import stat
+import sys
+
+import numpy as np
+import pytest
+
+from translator_core.ocr import pytesseract
+from translator_core.ocr_worker import OcrWorker, OcrWorkerError
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason='假的 tesseract 執行檔是 shell 腳本')
+
+
+def test_worker_uses_configured_tesseract_cmd(tmp_path, monkeypatch):
+    """工作程序使用介面程序設定的 tesseract_cmd 與 TESSDATA_PREFIX"""
+    marker = tmp_path / 'calls.txt'
+    fake = tmp_path / 'custom-tesseract'
+    fake.write_text(
+        '#!/bin/sh\n'
+        f'echo "$TESSDATA_PREFIX $@" >> "{marker}"\n'
+        'echo "tesseract 5.3.0"\n'
+    )
+    fake.chmod(fake.stat().st_mode | stat.S_IEXEC)
+
+    monkeypatch.setattr(pytesseract.pytesseract, 'tesseract_cmd', str(fake))
+    monkeypatch.setenv('TESSDATA_PREFIX', str(tmp_path / 'tessdata'))
+
+    worker = OcrWorker(idle_timeout=30)
+    try:
+        image = np.full((20, 40), 255, dtype=np.uint8)
+        try:
+            worker.recognize(('single', 'eng', None), image)
+        except OcrWorkerError:
+            pass    # 假的執行檔不產生識別結果
+    finally:
+        worker.close()
+
+    calls = marker.read_text().splitlines()
+    assert calls
+    assert all(line.startswith(str(tmp_path / 'tessdata')) for line in calls)
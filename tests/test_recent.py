@@ -0,0 +1,17 @@
+"""近期翻譯記錄的測試"""
+from translator_core.recent import RecentHistory, measure
+
+
+def test_ring_keeps_newest_entries():
+    recent = RecentHistory(maxlen=3)
+    for i in range(5):
+        recent.append(f"s{i}", f"t{i}", 'jpn', 90.0, ts=1000 + i)
+    assert [entry.source for entry in recent] == ['s2', 's3', 's4']
+    assert recent[-1].ts == 1004
+    assert recent.language_counts() == {'jpn': 3}
+
+
+def test_entry_memory():
+    old, new = measure(500)
+    assert new < 40
+    assert old > 10 * new
@@ -0,0 +1 @@
+"""遊戲翻譯器共用核心模組"""
@@ -0,0 +1,104 @@
+"""翻譯 API 的斷路器
+
+googletrans 被限流或離線時，每次呼叫都會等到逾時才失敗，擷取循環因此卡住。
+斷路器記錄最近呼叫的成敗，失敗率超過門檻時「跳開」：冷卻期間不再呼叫網路，
+翻譯只使用快取與詞彙表。冷卻結束後「半開」，只放行一次探測呼叫；成功則
+恢復，失敗則再次跳開並加倍冷卻時間（有上限）。
+"""
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """依最近 window 次呼叫的失敗率開關的斷路器（執行緒安全）"""
+
+    def __init__(self, window=20, min_calls=4, failure_rate=0.5, cooldown=15.0, max_cooldown=300.0):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.on_change = None  # on_change(狀態, 距離下次探測的秒數)，在呼叫端執行緒中執行
+
+        self.state = CLOSED
+        self.cooldown = cooldown
+        self.opened_at = 0.0
+        self._results = deque(maxlen=window)
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_in(self):
+        """距離下次探測的秒數（未跳開時為 0）"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def allow(self):
+        """是否可以呼叫網路；冷卻結束後只放行一次探測"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            if self._probing:
+                return False
+            self._probing = True
+            changed = self.state != HALF_OPEN
+            self.state = HALF_OPEN
+        if changed:
+            self._notify()
+        return True
+
+    def available(self):
+        """目前是否會放行呼叫（不消耗探測機會）"""
+        return self.state == CLOSED or (self.state == OPEN and self.retry_in() == 0.0)
+
+    def record_success(self):
+        with self._lock:
+            self._results.append(True)
+            self._probing = False
+            changed = self.state != CLOSED
+            if changed:
+                self.state = CLOSED
+                self.cooldown = self.base_cooldown
+                self._results.clear()
+        if changed:
+            self._notify()
+
+    def record_failure(self):
+        with self._lock:
+            self._results.append(False)
+            if self.state == HALF_OPEN:
+                # 探測失敗：再次跳開，冷卻時間加倍
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                trip = True
+            else:
+                failures = self._results.count(False)
+                trip = (
+                    self.state == CLOSED and
+                    len(self._results) >= self.min_calls and
+                    failures / len(self._results) >= self.failure_rate
+                )
+            self._probing = False
+            if trip:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+        if trip:
+            self._notify()
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+            self._results.clear()
+            self._probing = False
+        self._notify()
+
+    def _notify(self):
+        if self.on_change:
+            self.on_change(self.state, self.retry_in())
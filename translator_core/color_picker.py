@@ -0,0 +1,107 @@
+"""文字顏色校正視窗：在擷取畫面的文字筆畫上點選取樣"""
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+from translator_core.textcolor import calibrate_text_colors
+
+# 畫面放大倍率上限（細筆畫放大後比較容易點中）
+MAX_ZOOM = 3
+
+# 校正視窗中畫面的最大寬度
+MAX_WIDTH = 900
+
+
+class TextColorCalibrator:
+    """顯示擷取畫面，點選文字後即時預覽顏色遮罩；套用時呼叫 on_done(TextColorModel)"""
+
+    def __init__(self, parent, screenshot, on_done):
+        self.screenshot = screenshot.convert('RGB')
+        self.on_done = on_done
+        self.points = []
+        self.model = None
+
+        width, height = self.screenshot.size
+        self.zoom = max(1, min(MAX_ZOOM, MAX_WIDTH // max(1, width)))
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("校正文字顏色")
+        self.window.configure(bg='#1e1e1e')
+        self.window.transient(parent)
+
+        tk.Label(
+            self.window,
+            text="在文字筆畫上點幾下（每種文字顏色至少一下），下方預覽會顯示分離出的文字",
+            bg='#1e1e1e',
+            fg='white'
+        ).pack(padx=10, pady=(10, 5))
+
+        shown = self.screenshot.resize((width * self.zoom, height * self.zoom), Image.Resampling.NEAREST)
+        self.photo = ImageTk.PhotoImage(shown)
+        self.canvas = tk.Canvas(
+            self.window, width=shown.width, height=shown.height, bg='black', highlightthickness=0,
+            cursor='crosshair'
+        )
+        self.canvas.create_image(0, 0, image=self.photo, anchor=tk.NW)
+        self.canvas.bind('<Button-1>', self.on_click)
+        self.canvas.pack(padx=10, pady=5)
+
+        self.preview_label = tk.Label(self.window, bg='#1e1e1e')
+        self.preview_label.pack(padx=10, pady=5)
+        self.preview_photo = None
+
+        self.status_label = tk.Label(self.window, text="尚未取樣", bg='#1e1e1e', fg='#999')
+        self.status_label.pack(pady=5)
+
+        buttons = tk.Frame(self.window, bg='#1e1e1e')
+        buttons.pack(pady=10)
+        for text, command, color in (
+            ("自動取樣", self.auto_sample, '#2196F3'),
+            ("清除", self.clear, '#666'),
+            ("套用", self.apply, '#4CAF50'),
+            ("取消", self.window.destroy, '#f44336'),
+        ):
+            tk.Button(buttons, text=text, command=command, bg=color, fg='white', padx=10).pack(
+                side=tk.LEFT, padx=5
+            )
+
+    def on_click(self, event):
+        x, y = event.x // self.zoom, event.y // self.zoom
+        self.points.append((x, y))
+        r = max(2, self.zoom)
+        self.canvas.create_oval(
+            event.x - r, event.y - r, event.x + r, event.y + r, outline='red', width=2, tags='point'
+        )
+        self.update_model(calibrate_text_colors(self.screenshot, self.points))
+
+    def auto_sample(self):
+        """從像文字的連通元件自動取樣（背景單純時可用）"""
+        self.clear()
+        self.update_model(calibrate_text_colors(self.screenshot))
+
+    def clear(self):
+        self.points = []
+        self.canvas.delete('point')
+        self.update_model(None)
+
+    def update_model(self, model):
+        """更新顏色模型與遮罩預覽"""
+        self.model = model
+        if model is None:
+            self.preview_label.config(image='')
+            self.status_label.config(text="尚未取樣" if not self.points else "取樣不足", fg='#999')
+            return
+
+        mask = Image.fromarray(255 - model.mask(self.screenshot))
+        width, height = mask.size
+        mask = mask.resize((width * self.zoom, height * self.zoom), Image.Resampling.NEAREST)
+        self.preview_photo = ImageTk.PhotoImage(mask)
+        self.preview_label.config(image=self.preview_photo)
+        self.status_label.config(text=f"{len(model.ranges)} 種文字顏色", fg='#4CAF50')
+
+    def apply(self):
+        if self.model is None:
+            self.status_label.config(text="請先在文字上點選取樣", fg='#f44336')
+            return
+        self.window.destroy()
+        self.on_done(self.model)
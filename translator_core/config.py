@@ -0,0 +1,87 @@
+"""擷取管線的不可變設定
+
+Tk 介面在設定變更時發布新的 PipelineConfig（版本號遞增），擷取執行緒每次循環
+只讀取 ConfigPublisher.current 這個屬性，不需要鎖，也不再從工作執行緒呼叫
+Tk 變數的 get()。
+
+設定可轉為 JSON 相容的字典（config_to_dict），供遠端翻譯伺服器與工作階段錄製使用。
+"""
+import threading
+from dataclasses import asdict, dataclass, replace, fields
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    """擷取管線設定的快照"""
+    version: int = 0
+    region: tuple = None                # 擷取區域 (x, y, w, h)
+    preprocessing: str = 'advanced'     # 預處理方案 ('none' / 'basic' / 'advanced' / 'color')
+    ocr_engine: str = 'tesseract'       # 'tesseract' 或 'easyocr'
+    ocr_mode: str = 'single'            # 'single' 或 'multi'（多語言自動偵測）
+    language: str = 'jpn'               # 單一語言模式的 Tesseract 語言代碼
+    languages: tuple = ()               # 多語言模式要嘗試的語言代碼
+    target_language: str = 'zh-tw'      # Google 翻譯目標語言代碼
+    confidence_threshold: float = 0     # 低於此信心度的結果不翻譯
+    interval: float = 0.5               # 兩次擷取之間的間隔（秒）
+    ocr_profile: object = None          # 遊戲的 OCR 設定檔（OcrProfile，見 tuning.py）
+    adaptive_scale: bool = True         # 依字高選擇放大倍率（見 scaling.py）
+    text_colors: object = None          # 'color' 預處理使用的文字顏色模型（見 textcolor.py）
+
+    def changed_fields(self, other):
+        """與另一份設定不同的欄位名稱（不含版本號）"""
+        if other is None:
+            return {f.name for f in fields(self)} - {'version'}
+        return {
+            f.name for f in fields(self)
+            if f.name != 'version' and getattr(self, f.name) != getattr(other, f.name)
+        }
+
+
+def config_to_dict(config):
+    """PipelineConfig 轉為可 JSON 序列化的字典"""
+    data = {f.name: getattr(config, f.name) for f in fields(config)}
+    if config.ocr_profile is not None:
+        data['ocr_profile'] = asdict(config.ocr_profile)
+    if config.text_colors is not None:
+        data['text_colors'] = config.text_colors.to_list()
+    return data
+
+
+def config_from_dict(data):
+    """config_to_dict 的反向轉換（忽略不認得的欄位）"""
+    from translator_core.textcolor import TextColorModel
+    from translator_core.tuning import OcrProfile
+
+    known = {f.name for f in fields(PipelineConfig)}
+    data = {name: value for name, value in data.items() if name in known}
+    if data.get('region') is not None:
+        data['region'] = tuple(data['region'])
+    data['languages'] = tuple(data.get('languages', ()))
+    if data.get('ocr_profile') is not None:
+        data['ocr_profile'] = OcrProfile(**data['ocr_profile'])
+    if data.get('text_colors') is not None:
+        data['text_colors'] = TextColorModel.from_list(data['text_colors'])
+    return PipelineConfig(**data)
+
+
+class ConfigPublisher:
+    """發布設定快照；讀取端直接讀 current，寫入端由 UI 執行緒呼叫 publish"""
+
+    def __init__(self, config=None):
+        self.current = config or PipelineConfig()
+        self._lock = threading.Lock()
+
+    def publish(self, **changes):
+        """套用變更並發布新版本；沒有實際變更時不遞增版本"""
+        if 'languages' in changes:
+            changes['languages'] = tuple(changes['languages'])
+        if changes.get('region') is not None:
+            changes['region'] = tuple(changes['region'])
+
+        with self._lock:
+            current = self.current
+            candidate = replace(current, **changes)
+            if not candidate.changed_fields(current):
+                return current
+            self.current = replace(candidate, version=current.version + 1)
+            return self.current
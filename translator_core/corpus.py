@@ -0,0 +1,377 @@
+"""劇本語料對齊：把 OCR 結果校正為遊戲劇本中最接近的原句
+
+有遊戲劇本（文字傾印）時，可以匯入為語料（有無譯文皆可）。OCR 結果在編輯
+距離上限內對齊到最接近的原句：誤判的字被校正後才送去翻譯；原句附有譯文時
+直接使用，不經網路。
+
+索引是字元二元組（bigram）的倒排索引，匯入時編譯為一個檔案並以 mmap 開啟：
+- 每行前後加上邊界字元，單字的行也至少有兩個二元組
+- 編輯距離 k 以內的兩行，查詢句的二元組最多只有 2k 個不在原句中。因此只需取
+  出現次數最少的 2k + 1 個二元組的倒排列表作為候選，再依長度與共同二元組數
+  篩選，最後以位元平行演算法（Myers/Hyyrö）計算編輯距離確認
+比對前會去除所有空白，OCR 在中日文字間插入的空白不影響結果。
+
+索引檔格式（little-endian）：
+    檔頭 '<8sIIQ12s'：magic、行數、二元組數、倒排項目數、譯文語言
+    source_offsets  uint64[行數 + 1]    原句在原文區的位元組位移
+    target_offsets  uint64[行數 + 1]    譯文在譯文區的位元組位移（空字串表示沒有譯文）
+    lengths         uint32[行數]        去除空白後的字數
+    gram_keys       uint64[二元組數]    (前字碼位 << 21) | 後字碼位（已排序）
+    gram_starts     uint64[二元組數 + 1] 各二元組在倒排列表中的起點
+    postings        uint32[倒排項目數]  行號（每個二元組內遞增）
+    原文區、譯文區  UTF-8
+    各陣列的起點對齊 8 位元組（numpy 對未對齊的陣列會在每次搜尋時複製）。
+
+用法：
+    python -m translator_core.corpus 劇本.txt
+    python -m translator_core.corpus 劇本.csv --target zh-tw
+"""
+import argparse
+import mmap
+import os
+import re
+import struct
+import time
+
+from translator_core.lazy import lazy_import
+from translator_core.phrases import read_phrase_pairs
+
+np = lazy_import('numpy')
+
+CORPUS_DIR = 'corpus'
+CORPUS_SUFFIX = '.corpus'
+
+MAGIC = b'GTCORP01'
+_HEADER = struct.Struct('<8sIIQ12s')
+
+_CODEPOINT_BITS = 21
+_LINE_START = '\x02'
+_LINE_END = '\x03'
+
+# 編輯距離上限：字數的 25%，最多 8
+MAX_DISTANCE_RATIO = 0.25
+MAX_DISTANCE = 8
+
+# 最多以編輯距離確認的候選數（依共同二元組數排序）
+VERIFY_LIMIT = 32
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(text):
+    """比對用的字串：去除所有空白"""
+    return _WHITESPACE.sub('', text)
+
+
+def distance_bound(length):
+    """依字數決定允許的編輯距離"""
+    return min(MAX_DISTANCE, int(length * MAX_DISTANCE_RATIO))
+
+
+def corpus_path(name):
+    """遊戲名稱對應的語料索引檔路徑"""
+    return os.path.join(CORPUS_DIR, name + CORPUS_SUFFIX)
+
+
+def levenshtein(a, b):
+    """編輯距離（Myers/Hyyrö 位元平行演算法，每個字元只需幾次整數運算）"""
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+
+    peq = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv = full
+    mv = 0
+    score = len(a)
+
+    for ch in b:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+
+    return score
+
+
+def gram_keys(text):
+    """已正規化字串（含邊界字元）的二元組鍵"""
+    padded = _LINE_START + text + _LINE_END
+    return {(ord(a) << _CODEPOINT_BITS) | ord(b) for a, b in zip(padded, padded[1:])}
+
+
+def read_corpus_lines(filename):
+    """讀取劇本：.txt 每行一句（無譯文），CSV/TSV/JSON 為 (原句, 譯文)"""
+    if filename.lower().endswith('.txt'):
+        with open(filename, 'r', encoding='utf-8-sig') as f:
+            for line in f:
+                yield line.rstrip('\r\n'), ''
+        return
+    yield from read_phrase_pairs(filename)
+
+
+def compile_corpus(lines, path, target_language=''):
+    """把 (原句, 譯文) 編譯為語料索引檔（先寫入暫存檔再取代），回傳行數"""
+    sources = []
+    targets = []
+    normalized = []
+    seen = set()
+    for source, target in lines:
+        source = source.strip()
+        key = normalize(source)
+        if not key or key in seen:
+            continue
+        seen.add(key)
+        sources.append(source)
+        targets.append(target.strip())
+        normalized.append(key)
+
+    count = len(normalized)
+    lengths = np.array([len(key) for key in normalized], dtype='<u4')
+
+    # 所有行加上邊界字元後串成一個碼位陣列，一次算出全部二元組
+    padded = ''.join(_LINE_START + key + _LINE_END for key in normalized)
+    codes = np.frombuffer(padded.encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+    line_ids = np.repeat(np.arange(count, dtype=np.uint32), lengths.astype(np.int64) + 2)
+    keys = (codes[:-1] << np.uint64(_CODEPOINT_BITS)) | codes[1:]
+    keep = codes[:-1] != ord(_LINE_END)  # 去掉跨行的二元組
+    keys = keys[keep]
+    line_ids = line_ids[:-1][keep]
+
+    # 依 (二元組, 行號) 排序並去除同一行內重複的二元組
+    order = np.lexsort((line_ids, keys))
+    keys = keys[order]
+    line_ids = line_ids[order]
+    if len(keys):
+        distinct = np.concatenate(([True], (keys[1:] != keys[:-1]) | (line_ids[1:] != line_ids[:-1])))
+        keys = keys[distinct]
+        line_ids = line_ids[distinct]
+
+    unique_keys, starts = np.unique(keys, return_index=True)
+    gram_starts = np.append(starts, len(keys)).astype('<u8')
+
+    source_blob = bytearray()
+    target_blob = bytearray()
+    source_offsets = [0]
+    target_offsets = [0]
+    for source, target in zip(sources, targets):
+        source_blob += source.encode('utf-8')
+        target_blob += target.encode('utf-8')
+        source_offsets.append(len(source_blob))
+        target_offsets.append(len(target_blob))
+
+    header = _HEADER.pack(MAGIC, count, len(unique_keys), len(line_ids), target_language.encode('ascii')[:12])
+    arrays = [
+        np.array(source_offsets, dtype='<u8'),
+        np.array(target_offsets, dtype='<u8'),
+        lengths,
+        unique_keys.astype('<u8'),
+        gram_starts,
+        line_ids.astype('<u4'),
+    ]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        for array in arrays:
+            f.write(b'\0' * (-f.tell() % 8))  # 陣列對齊 8 位元組
+            f.write(array.tobytes())
+        f.write(source_blob)
+        f.write(target_blob)
+    os.replace(temp_path, path)
+    return count
+
+
+class ScriptCorpus:
+    """以 mmap 開啟的劇本語料索引（唯讀，可跨執行緒共用）"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, lines, grams, postings, target = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"不是語料索引檔: {path}")
+
+        self.target_language = target.rstrip(b'\0').decode('ascii')
+        self._count = lines
+
+        offset = _HEADER.size
+
+        def array(dtype, length):
+            nonlocal offset
+            offset += -offset % 8
+            view = np.frombuffer(self._mm, dtype=dtype, count=length, offset=offset)
+            offset += view.nbytes
+            return view
+
+        self._source_offsets = array('<u8', lines + 1)
+        self._target_offsets = array('<u8', lines + 1)
+        self._lengths = array('<u4', lines)
+        self._gram_keys = array('<u8', grams)
+        self._gram_starts = array('<u8', grams + 1)
+        self._postings = array('<u4', postings)
+        self._source_base = offset
+        self._target_base = offset + int(self._source_offsets[-1])
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """釋放陣列視圖並關閉 mmap（仍有其他參照時交給垃圾回收）"""
+        self._source_offsets = self._target_offsets = self._lengths = None
+        self._gram_keys = self._gram_starts = self._postings = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+    def source(self, line):
+        start, end = int(self._source_offsets[line]), int(self._source_offsets[line + 1])
+        return self._mm[self._source_base + start:self._source_base + end].decode('utf-8')
+
+    def target(self, line):
+        """原句的譯文，沒有譯文時回傳空字串"""
+        start, end = int(self._target_offsets[line]), int(self._target_offsets[line + 1])
+        return self._mm[self._target_base + start:self._target_base + end].decode('utf-8')
+
+    def nearest(self, text):
+        """最接近的原句，回傳 (行號, 編輯距離)；超出距離上限時回傳 None"""
+        query = normalize(text)
+        if not query or not self._count:
+            return None
+
+        bound = distance_bound(len(query))
+        keys = np.fromiter(gram_keys(query), dtype=np.uint64)
+        index = np.searchsorted(self._gram_keys, keys)
+        index = np.minimum(index, len(self._gram_keys) - 1)
+        found = self._gram_keys[index] == keys
+        index = index[found]
+
+        # 至少要共用 (二元組數 - 2k) 個二元組
+        required = len(keys) - 2 * bound
+        if required < 1 or len(index) < required:
+            return None
+
+        starts = self._gram_starts[index].astype(np.int64)
+        ends = self._gram_starts[index + 1].astype(np.int64)
+
+        # 索引中最少見的 (找到的二元組數 - 門檻 + 1) 個二元組（最多 2k + 1 個），
+        # 其倒排列表即涵蓋所有可能的原句
+        order = np.argsort(ends - starts)
+        prefix = order[:len(index) - required + 1]
+        candidates = np.unique(np.concatenate([self._postings[starts[i]:ends[i]] for i in prefix]))
+
+        lengths = self._lengths[candidates].astype(np.int64)
+        candidates = candidates[np.abs(lengths - len(query)) <= bound]
+        if not len(candidates):
+            return None
+
+        # 計算每個候選共用的二元組數
+        shared = np.zeros(len(candidates), dtype=np.int32)
+        for start, end in zip(starts, ends):
+            postings = self._postings[start:end]
+            position = np.minimum(np.searchsorted(postings, candidates), len(postings) - 1)
+            shared += postings[position] == candidates
+        keep = shared >= required
+        candidates = candidates[keep]
+        shared = shared[keep]
+
+        best = None
+        for line in candidates[np.argsort(-shared, kind='stable')[:VERIFY_LIMIT]].tolist():
+            distance = levenshtein(query, normalize(self.source(line)))
+            if distance <= bound and (best is None or distance < best[1]):
+                best = (line, distance)
+                if distance == 0:
+                    break
+        return best
+
+    def snap(self, text):
+        """整段或逐行對齊到原句，回傳 (校正後文字, 譯文或 None, 總編輯距離)；無法對齊時回傳 None
+
+        每一行都有對應譯文時才回傳譯文。
+        """
+        match = self.nearest(text)
+        if match is not None:
+            line, distance = match
+            return self.source(line), self.target(line) or None, distance
+
+        lines = [line for line in text.split('\n') if line.strip()]
+        if len(lines) < 2:
+            return None
+
+        sources = []
+        targets = []
+        total = 0
+        snapped = False
+        for line in lines:
+            match = self.nearest(line)
+            if match is None:
+                sources.append(line)
+                targets.append('')
+                continue
+            snapped = True
+            sources.append(self.source(match[0]))
+            targets.append(self.target(match[0]))
+            total += match[1]
+
+        if not snapped:
+            return None
+        translation = '\n'.join(targets) if all(targets) else None
+        return '\n'.join(sources), translation, total
+
+
+def load_corpus(path):
+    """開啟語料索引，檔案不存在或格式不符時回傳 None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return ScriptCorpus(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"無法載入劇本語料: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="將遊戲劇本編譯為語料索引檔")
+    parser.add_argument('source', help="TXT（每行一句）、CSV、TSV 或 JSON 劇本")
+    parser.add_argument('--output', help="索引檔路徑（預設為 corpus/<檔名>.corpus）")
+    parser.add_argument('--target', default='', help="譯文語言代碼（劇本附有譯文時）")
+    args = parser.parse_args()
+
+    output = args.output or corpus_path(os.path.splitext(os.path.basename(args.source))[0])
+
+    start = time.perf_counter()
+    count = compile_corpus(read_corpus_lines(args.source), output, args.target)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    corpus = ScriptCorpus(output)
+    loaded = time.perf_counter() - start
+
+    print(f"{count} 行 → {output} ({os.path.getsize(output) / 1024 / 1024:.1f} MB)")
+    print(f"編譯 {compiled:.2f} 秒，載入 {loaded * 1000:.2f} 毫秒")
+    corpus.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""自動偵測語言時，各擷取區域鎖定偵測到的語言
+
+自動偵測原本每張有文字的畫面都逐一以所有已安裝的語言識別，取信心度最高者，
+成本是單一語言的好幾倍；但同一個遊戲區域的語言幾乎不會改變。這裡記住各區域
+偵測到的語言，之後的畫面只以該語言識別一次；以下情況才重新逐一嘗試各語言：
+
+- 鎖定語言識別出文字，但信心度低於設定的門檻（可能換了語言）
+- 鎖定語言連續 MAX_EMPTY 次識別不出文字（換成不同文字系統時，鎖定的語言
+  可能完全認不出字）
+- 驗證抽樣：每識別 VERIFY_EVERY 次做一次完整偵測，確認語言沒有改變
+
+穩定狀態下自動偵測的成本與單一語言模式相同。
+"""
+
+# 鎖定語言後，每識別幾次做一次完整的多語言偵測
+VERIFY_EVERY = 30
+
+# 鎖定語言連續幾次識別不出文字時重新偵測
+MAX_EMPTY = 3
+
+
+class LanguageTracker:
+    """各擷取區域目前鎖定的語言"""
+
+    def __init__(self, verify_every=VERIFY_EVERY, max_empty=MAX_EMPTY):
+        self.verify_every = verify_every
+        self.max_empty = max_empty
+        self._languages = {}    # 區域 → [語言, 上次完整偵測後的識別次數, 連續無文字次數]
+
+    def language_for(self, region):
+        """區域鎖定的語言；尚未偵測或該做驗證抽樣時回傳 None（需要完整偵測）"""
+        entry = self._languages.get(region)
+        if entry is None or entry[1] >= self.verify_every or entry[2] >= self.max_empty:
+            return None
+        entry[1] += 1
+        return entry[0]
+
+    def recognized(self, region, has_text):
+        """記錄鎖定語言的識別結果是否有文字（連續無文字時下一次改為完整偵測）"""
+        entry = self._languages.get(region)
+        if entry is not None:
+            entry[2] = 0 if has_text else entry[2] + 1
+
+    def detected(self, region, language):
+        """記錄完整偵測的結果；沒有偵測到文字（language 為 None）時保留原本的語言"""
+        if language is None:
+            entry = self._languages.get(region)
+            if entry is not None:
+                entry[1] = entry[2] = 0
+            return
+        self._languages[region] = [language, 0, 0]
+
+    def reset(self, region=None):
+        """清除鎖定的語言，下一張畫面重新偵測"""
+        if region is None:
+            self._languages.clear()
+        else:
+            self._languages.pop(region, None)
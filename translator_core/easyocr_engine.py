@@ -0,0 +1,221 @@
+"""批次化、可調執行緒的 EasyOCR 識別
+
+EasyOCR 的 readtext 每張畫面都先跑一次文字偵測（CRAFT）再逐框辨識，torch 預設
+又會用上所有核心，和遊戲搶 CPU。這裡把兩個階段拆開：
+
+- 版面沿用：畫面上的文字像素都還落在上一次偵測到的文字框內時（對話框位置不變，
+  只是換了一句），直接沿用上次的文字框，只跑辨識；每隔一段畫面仍會重新偵測
+- 批次辨識：所有文字框以 batch_size 一批送進辨識模型，而不是一框一次
+- recognize_batch 以一次 readtext_batched 處理多張已存在的畫面；擷取流程每次只有
+  一個區域、一張畫面，沒有可以合批的輸入，所以只用於離線處理與下面的速度比較
+- torch 的運算內（intra-op）與運算間（inter-op）執行緒數可以設定
+
+量測與目前逐張 readtext 的差異：
+    python -m translator_core.easyocr_engine 畫面目錄 --langs ja en --threads 2
+"""
+import argparse
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from translator_core import ocr
+from translator_core.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+torch = lazy_import('torch')
+
+# 辨識模型一次處理的文字框數
+DEFAULT_BATCH_SIZE = 8
+
+# 沿用版面時，至少每隔這麼多張畫面重新偵測一次
+REDETECT_EVERY = 30
+
+# 版面比對的縮小倍率與文字框外擴（縮小後的格數）
+LAYOUT_CELL = 4
+LAYOUT_MARGIN = 2
+
+# 落在舊文字框外的文字像素比例超過此值時重新偵測
+LAYOUT_TOLERANCE = 0.01
+
+# 與背景亮度差超過此值的像素視為文字
+INK_THRESHOLD = 64
+
+
+def configure_torch_threads(intra_op=None, inter_op=None):
+    """設定 torch 執行緒數；inter-op 只能在 torch 開始運算前設定一次"""
+    if intra_op:
+        torch.set_num_threads(int(intra_op))
+    if inter_op:
+        try:
+            torch.set_num_interop_threads(int(inter_op))
+        except RuntimeError as e:
+            print(f"無法設定 torch inter-op 執行緒: {e}")
+
+
+def load_reader(languages, threads=None, onnx=False):
+    """建立 EasyOCR 讀取器；threads 限制 torch 使用的核心數，避免與遊戲搶 CPU
+
+    onnx 為 True 且已匯出 int8 模型時（見 onnx_easyocr.py）改以 ONNX Runtime 在 CPU 上推論，
+    模型不存在或載入失敗時使用原版模型。
+    """
+    from translator_core import onnx_easyocr
+
+    configure_torch_threads(threads, 1 if threads else None)
+    if onnx:
+        if not onnx_easyocr.has_onnx_models(languages):
+            print(f"找不到 {onnx_easyocr.model_dir(languages)} 的 ONNX 模型，使用原版 EasyOCR")
+        else:
+            try:
+                return onnx_easyocr.load_onnx_reader(languages, threads=threads)
+            except Exception as e:
+                print(f"ONNX EasyOCR 載入失敗，使用原版 EasyOCR: {e}")
+    return ocr.load_easyocr(languages)
+
+
+def ink_cells(image):
+    """縮小後的文字像素分佈（True 表示該格內有與背景不同的像素）"""
+    img = np.asarray(image)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    background = int(np.median(gray[::8, ::8]))
+    ink = (cv2.absdiff(gray, np.full_like(gray, background)) > INK_THRESHOLD).astype(np.uint8)
+    h, w = ink.shape
+    return cv2.resize(
+        ink, (max(1, w // LAYOUT_CELL), max(1, h // LAYOUT_CELL)), interpolation=cv2.INTER_AREA
+    ) > 0
+
+
+def box_cells(shape, horizontal_list, free_list):
+    """文字框（外擴後）覆蓋的格子"""
+    cells = np.zeros(shape, dtype=bool)
+    boxes = [(x_min, x_max, y_min, y_max) for x_min, x_max, y_min, y_max in horizontal_list]
+    for points in free_list:
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        boxes.append((min(xs), max(xs), min(ys), max(ys)))
+
+    for x_min, x_max, y_min, y_max in boxes:
+        x0 = max(0, int(x_min) // LAYOUT_CELL - LAYOUT_MARGIN)
+        y0 = max(0, int(y_min) // LAYOUT_CELL - LAYOUT_MARGIN)
+        x1 = int(x_max) // LAYOUT_CELL + LAYOUT_MARGIN + 1
+        y1 = int(y_max) // LAYOUT_CELL + LAYOUT_MARGIN + 1
+        cells[y0:y1, x0:x1] = True
+    return cells
+
+
+class EasyOcrRecognizer:
+    """沿用偵測結果並批次辨識的 EasyOCR 包裝（執行緒安全）"""
+
+    def __init__(self, reader, batch_size=DEFAULT_BATCH_SIZE, redetect_every=REDETECT_EVERY, metrics=None):
+        self.reader = reader
+        self.batch_size = batch_size
+        self.redetect_every = redetect_every
+        self.metrics = metrics
+        self._layout = None     # (影像大小, 水平文字框, 傾斜文字框, 覆蓋的格子)
+        self._frames = 0
+        self._lock = threading.Lock()
+
+    def _stage(self, name):
+        return self.metrics.stage(name) if self.metrics else nullcontext()
+
+    def layout_for(self, image):
+        """取得文字框：版面未變時沿用上次的偵測結果"""
+        img = np.asarray(image)
+        layout = self._layout
+        if layout is not None and layout[0] == img.shape[:2] and self._frames < self.redetect_every:
+            ink = ink_cells(img)
+            outside = np.count_nonzero(ink & ~layout[3])
+            if outside <= max(1, np.count_nonzero(ink)) * LAYOUT_TOLERANCE:
+                self._frames += 1
+                if self.metrics:
+                    self.metrics.count('layout_reuses')
+                return layout[1], layout[2]
+
+        with self._stage('ocr.easyocr.detect'):
+            horizontal, free = self.reader.detect(img)
+        horizontal, free = horizontal[0], free[0]
+        cells = box_cells(ink_cells(img).shape, horizontal, free)
+        self._layout = (img.shape[:2], horizontal, free, cells)
+        self._frames = 0
+        return horizontal, free
+
+    def recognize(self, image, lang):
+        """識別一張畫面，回傳與 ocr.easyocr_ocr 相同格式的結果"""
+        with self._lock:
+            horizontal, free = self.layout_for(image)
+            if not horizontal and not free:
+                return ocr.easyocr_result([], lang)
+            with self._stage('ocr.easyocr.recognize'):
+                results = self.reader.recognize(
+                    np.asarray(image), horizontal_list=horizontal, free_list=free,
+                    batch_size=self.batch_size, detail=1
+                )
+        return ocr.easyocr_result(results, lang)
+
+    def recognize_batch(self, images, lang):
+        """以一次 readtext_batched 識別多張畫面（不同大小時縮放到最大的尺寸；離線與量測用）"""
+        arrays = [np.asarray(image) for image in images]
+        width = max(a.shape[1] for a in arrays)
+        height = max(a.shape[0] for a in arrays)
+        with self._lock, self._stage('ocr.easyocr.batched'):
+            batches = self.reader.readtext_batched(
+                arrays, n_width=width, n_height=height, batch_size=self.batch_size, detail=1
+            )
+        return [ocr.easyocr_result(results, lang) for results in batches]
+
+    def reset(self):
+        """清除沿用的版面（擷取區域改變時）"""
+        with self._lock:
+            self._layout = None
+
+
+def _read_frames(directory):
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp'))
+    )
+    return [cv2.cvtColor(cv2.imread(os.path.join(directory, name)), cv2.COLOR_BGR2RGB) for name in names]
+
+
+def _measure(name, run, frames):
+    """執行並回報每秒畫面數與 CPU 使用率（process_time / 經過時間，100% = 一個核心）"""
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    run()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    print(f"{name:<12} {len(frames) / wall:6.2f} fps  CPU {cpu / wall * 100:5.0f}%  ({wall:.2f} 秒)")
+    return len(frames) / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較逐張 readtext 與批次化 EasyOCR 的速度")
+    parser.add_argument('frames', help="畫面目錄（依檔名順序視為連續畫面）")
+    parser.add_argument('--langs', nargs='+', default=['ja', 'en'], help="EasyOCR 語言代碼")
+    parser.add_argument('--threads', type=int, default=0, help="torch intra-op 執行緒數（0 為預設）")
+    parser.add_argument('--interop', type=int, default=0, help="torch inter-op 執行緒數（0 為預設）")
+    parser.add_argument('--batch', type=int, default=DEFAULT_BATCH_SIZE, help="辨識批次大小")
+    args = parser.parse_args()
+
+    configure_torch_threads(args.threads, args.interop)
+    frames = _read_frames(args.frames)
+    if not frames:
+        parser.error("目錄中沒有畫面")
+
+    reader = ocr.load_easyocr(args.langs)
+    reader.readtext(frames[0])  # 暖機，不列入量測
+    print(f"{len(frames)} 張畫面，torch 執行緒 {torch.get_num_threads()}，批次 {args.batch}")
+
+    baseline = _measure('readtext', lambda: [reader.readtext(frame) for frame in frames], frames)
+
+    recognizer = EasyOcrRecognizer(reader, batch_size=args.batch)
+    reused = _measure('版面沿用', lambda: [recognizer.recognize(frame, args.langs[0]) for frame in frames], frames)
+
+    batched = _measure('batched', lambda: recognizer.recognize_batch(frames, args.langs[0]), frames)
+
+    print(f"版面沿用 {reused / baseline:.2f} 倍，batched {batched / baseline:.2f} 倍（相對於逐張 readtext）")
+
+
+if __name__ == '__main__':
+    main()
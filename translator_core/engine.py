@@ -0,0 +1,428 @@
+"""擷取 → 預處理 → OCR → 翻譯 的共用管線
+
+三個入口腳本只負責介面；擷取循環、OCR、翻譯快取與歷史記錄都在這裡實作。
+管線設定是不可變的 PipelineConfig（見 config.py），由介面發布、擷取執行緒
+每次循環讀取；設定版本變更時只重建受影響的部分（預處理方案或 OCR 語言）。
+擷取循環由 CaptureSession（見 session.py）管理，在各階段之間檢查取消事件。
+載入劇本語料（見 corpus.py）時，識別結果會先對齊到最接近的原句再翻譯。
+啟用 OCR 快取（見 ocr_cache.py）時，看過的畫面在預處理之前就直接取得識別結果。
+設定中附有遊戲的 OCR 設定檔（見 tuning.py）時，依設定檔預處理與識別；
+否則 Tesseract 識別前依估計的字高選擇放大倍率（見 scaling.py）。
+自動偵測語言時，各區域鎖定偵測到的語言，只在需要時重新偵測（見 detection.py）。
+設有 OCR 工作程序（見 ocr_worker.py）時，識別在獨立程序中執行。
+"""
+import time
+from functools import partial
+
+from translator_core import ocr
+from translator_core.config import ConfigPublisher
+from translator_core.detection import LanguageTracker
+from translator_core.easyocr_engine import EasyOcrRecognizer, load_reader
+from translator_core.languages import google_code
+from translator_core.lazy import lazy_import
+from translator_core.metrics import Metrics
+from translator_core.preprocess import PREPROCESS_PROFILES, advanced_preprocess
+from translator_core.scaling import TextScaler
+from translator_core.textcolor import color_mask_preprocess
+from translator_core.translation import TranslationService, TranslationUnavailable
+
+pyautogui = lazy_import('pyautogui')
+
+# 管線需要的重量級模組，供入口腳本在背景預先載入
+ENGINE_MODULES = [
+    lazy_import('numpy'),
+    lazy_import('cv2'),
+    lazy_import('pytesseract'),
+    pyautogui,
+    lazy_import('googletrans'),
+]
+
+# 影響 OCR 識別器的設定欄位
+OCR_FIELDS = {'ocr_engine', 'ocr_mode', 'language', 'languages', 'ocr_profile'}
+
+# 影響預處理的設定欄位（OCR 設定檔只在單一語言 Tesseract 識別時套用）
+PREPROCESS_FIELDS = OCR_FIELDS | {'preprocessing', 'adaptive_scale', 'text_colors'}
+
+# 變更後需要重新翻譯目前文字的設定欄位
+TEXT_FIELDS = OCR_FIELDS | {'target_language'}
+
+# 單次翻譯從按鍵到顯示結果的目標延遲（秒）
+ONE_SHOT_TARGET = 0.3
+
+
+class CaptureCancelled(Exception):
+    """擷取循環已被要求停止"""
+
+
+def check_cancelled(cancel):
+    """取消事件已設定時中止目前的畫面"""
+    if cancel is not None and cancel.is_set():
+        raise CaptureCancelled()
+
+
+def capture_region(region):
+    """擷取螢幕指定區域"""
+    x, y, w, h = region
+    return pyautogui.screenshot(region=(x, y, w, h))
+
+
+def active_profile(config):
+    """目前設定下生效的 OCR 設定檔（只用於語言相符的單一語言 Tesseract 識別）"""
+    profile = config.ocr_profile
+    if (profile is None or config.ocr_engine != 'tesseract' or config.ocr_mode != 'single' or
+            not profile.applies_to(config.language)):
+        return None
+    return profile
+
+
+class Pipeline:
+    """依某一版本設定建立的預處理與識別函式
+
+    scaler 為各區域放大倍率的狀態（TextScaler），預設使用引擎的；之後的設定版本沿用
+    同一個，遠端伺服器的每個連線各自傳入一個，區域座標相同的用戶端不會互相影響。
+    """
+
+    def __init__(self, engine, config, previous=None, scaler=None):
+        self.config = config
+        changed = config.changed_fields(previous.config if previous else None)
+
+        profile = active_profile(config)
+        if previous and not changed & PREPROCESS_FIELDS:
+            self.preprocess = previous.preprocess
+        elif profile is not None:
+            self.preprocess = profile.preprocess
+        elif config.preprocessing == 'color' and config.text_colors is not None:
+            self.preprocess = partial(color_mask_preprocess, model=config.text_colors)
+        else:
+            self.preprocess = PREPROCESS_PROFILES.get(config.preprocessing, advanced_preprocess)
+
+        if previous is not None:
+            self.scaler = previous.scaler
+        else:
+            self.scaler = scaler if scaler is not None else engine.scaler
+
+        # 沒有設定檔時，Tesseract 識別依字高調整倍率（設定檔的倍率已經調校過）
+        self.adaptive_scale = config.adaptive_scale and profile is None and config.ocr_engine == 'tesseract'
+
+        if previous and not changed & OCR_FIELDS:
+            self.recognize = previous.recognize
+        else:
+            self.recognize = engine.build_recognizer(config)
+
+        # 自動偵測語言時各區域鎖定的語言，沿用到之後的設定版本
+        self.languages = None
+        if config.ocr_engine == 'tesseract' and config.ocr_mode == 'multi':
+            self.languages = previous.languages if previous and previous.languages else LanguageTracker()
+
+        # 語言或目標語言變更時，目前畫面的文字需要重新翻譯
+        self.resets_text = bool(changed & TEXT_FIELDS)
+
+
+class TranslationEngine:
+    """遊戲文字翻譯管線"""
+
+    def __init__(self, history_store=None, cache_size=5000, config=None, ocr_cache=None, ocr_worker=None,
+                 translator=None):
+        self.metrics = Metrics()
+        self.translation = TranslationService(cache_size, self.metrics, translator)
+        self.history = history_store
+        self.ocr_cache = ocr_cache
+        self.config = ConfigPublisher(config)
+        self.easyocr_reader = None
+        self.easyocr = None     # EasyOcrRecognizer（沿用版面、批次辨識）
+        self.corpus = None  # 目前遊戲的劇本語料（ScriptCorpus）
+        self.ocr_worker = ocr_worker    # OcrWorker；None 時在本程序識別
+        self.recorder = None            # SessionRecorder；錄製工作階段時設定
+        self.scaler = TextScaler()
+        self._pipeline = None
+
+    def load_easyocr(self, languages, threads=None, onnx=False):
+        """載入 EasyOCR 讀取器（只載入一次，參數見 easyocr_engine.load_reader）
+
+        設有 OCR 工作程序時不在介面程序載入，改由工作程序第一次識別時載入。
+        """
+        if self.ocr_worker is not None:
+            self.ocr_worker.configure_easyocr(languages, threads, onnx)
+            return None
+        if self.easyocr_reader is None:
+            self.easyocr_reader = load_reader(languages, threads, onnx)
+            self.easyocr = EasyOcrRecognizer(self.easyocr_reader, metrics=self.metrics)
+        return self.easyocr_reader
+
+    def build_recognizer(self, config):
+        """依設定建立識別函式；設有 OCR 工作程序（見 ocr_worker.py）時交給工作程序識別"""
+        metrics = self.metrics
+
+        if config.ocr_engine == 'easyocr':
+            def recognize(image, cancel=None):
+                worker = self.ocr_worker
+                if worker is not None and worker.easyocr_options is not None:
+                    with metrics.stage('ocr.easyocr'):
+                        return worker.recognize_easyocr(image, config.language)
+                if self.easyocr is None:
+                    return None
+                with metrics.stage('ocr.easyocr'):
+                    return self.easyocr.recognize(image, config.language)
+
+        elif config.ocr_mode == 'multi':
+            languages = config.languages
+
+            def recognize(image, cancel=None):
+                worker = self.ocr_worker
+                if worker is not None:
+                    with metrics.stage('ocr.multi'):
+                        return worker.recognize(('multi', languages), image)
+                return ocr.multi_language_ocr(image, languages, metrics=metrics, cancel=cancel)
+
+        else:
+            language = config.language
+            profile = active_profile(config)
+
+            def recognize(image, cancel=None):
+                return self.recognize_language(image, language, profile)
+
+        return recognize
+
+    def recognize_language(self, image, language, profile=None):
+        """以單一語言 Tesseract 識別（設有 OCR 工作程序時交給工作程序）"""
+        worker = self.ocr_worker
+        with self.metrics.stage(f'ocr.{language}'):
+            if worker is not None:
+                return worker.recognize(('single', language, profile), image)
+            return ocr.single_language_ocr(image, language, metrics=self.metrics, profile=profile)
+
+    def recognize_detected(self, image, pipeline, cancel=None):
+        """自動偵測語言：先以區域鎖定的語言識別一次，信心度低於門檻、連續識別不出文字
+        或驗證抽樣時才逐一嘗試各語言（見 detection.py）
+        """
+        config = pipeline.config
+        tracker = pipeline.languages
+        language = tracker.language_for(config.region)
+        if language is not None and language in config.languages:
+            result = self.recognize_language(image, language)
+            if result is not None and not result['text']:
+                # 可能只是畫面上沒有文字，連續幾次才重新偵測
+                tracker.recognized(config.region, False)
+                return result
+            if result is not None and self.accept(result, config):
+                tracker.recognized(config.region, True)
+                return result
+            self.metrics.count('language_redetections')
+            check_cancelled(cancel)
+
+        self.metrics.count('language_detections')
+        result = pipeline.recognize(image, cancel)
+        tracker.detected(config.region, result['language'] if result else None)
+        return result
+
+    def pipeline_for(self, config):
+        """取得對應設定版本的管線，版本變更時沿用未受影響的部分"""
+        pipeline = self._pipeline
+        if pipeline is None or pipeline.config.version != config.version:
+            pipeline = Pipeline(self, config, pipeline)
+            self._pipeline = pipeline
+        return pipeline
+
+    def warm_up(self):
+        """預先建立目前設定的管線與翻譯器，並啟動 OCR 工作程序，單次翻譯不必等待初始化"""
+        self.pipeline_for(self.config.current)
+        self.translation.translator
+        if self.ocr_worker is not None:
+            self.ocr_worker.start()
+
+    def process(self, screenshot, pipeline, cancel=None):
+        """預處理並識別一張截圖（各階段之間檢查取消事件）"""
+        result = self.recognize_cached(screenshot, pipeline, cancel)
+        if result and result['text'] and self.corpus is not None:
+            result = self.snap(result)
+        return result
+
+    def recognize_cached(self, screenshot, pipeline, cancel=None):
+        """先以畫面指紋查 OCR 快取，未命中時才預處理與識別"""
+        cache = self.ocr_cache
+        key = None
+        if cache is not None:
+            with self.metrics.stage('ocr_cache'):
+                key = cache.key(screenshot, pipeline.config)
+                result = cache.get(key)
+            if result is not None:
+                self.metrics.count('ocr_cache_hits')
+                return result
+            self.metrics.count('ocr_cache_misses')
+
+        region = pipeline.config.region
+        scale = None
+        if pipeline.adaptive_scale:
+            with self.metrics.stage('text_height'):
+                scale = pipeline.scaler.scale_for(region, screenshot)
+
+        with self.metrics.stage('preprocess'):
+            if scale is None:
+                image = pipeline.preprocess(screenshot)
+            else:
+                image = pipeline.preprocess(screenshot, scale=scale)
+        check_cancelled(cancel)
+        if pipeline.languages is not None:
+            result = self.recognize_detected(image, pipeline, cancel)
+        else:
+            result = pipeline.recognize(image, cancel)
+        check_cancelled(cancel)
+
+        # 以識別出的單字高度校正這個區域的倍率
+        if scale is not None and result and result.get('words') is not None:
+            if pipeline.scaler.observe(region, scale, result['words']):
+                self.metrics.count('scale_changes')
+
+        # 識別失敗（None）不快取，下次出現時重新識別
+        if key is not None and result is not None:
+            cache.put(key, result)
+        return result
+
+    def snap(self, result):
+        """把識別結果校正為劇本中最接近的原句，附上原句的譯文（若有）"""
+        with self.metrics.stage('corpus_snap'):
+            match = self.corpus.snap(result['text'])
+        if match is None:
+            return result
+
+        text, translation, distance = match
+        self.metrics.count('corpus_snaps')
+        if distance:
+            self.metrics.count('corpus_corrections')
+        return dict(result, text=text, ocr_text=result['text'], translation=translation, distance=distance)
+
+    def translate(self, text, language, target_language):
+        """翻譯識別結果（Tesseract 語言代碼 → Google 目標語言代碼）"""
+        return self.translation.translate(text, google_code(language), target_language)
+
+    def translate_recognized(self, result, config):
+        """翻譯識別結果；已對齊到附有譯文的劇本原句時直接使用該譯文"""
+        corpus = self.corpus
+        translation = result.get('translation')
+        if translation and corpus is not None and corpus.target_language == config.target_language:
+            self.metrics.count('corpus_translations')
+            return translation
+        return self.translate(result['text'], result['language'], config.target_language)
+
+    def record(self, result, translation):
+        """寫入持久化歷史"""
+        if self.history is not None:
+            self.history.append(result['text'], translation, result['language'], result['confidence'])
+
+    def accept(self, result, config):
+        """識別結果是否足以翻譯"""
+        return result['confidence'] >= config.confidence_threshold
+
+    def translate_result(self, result, config):
+        """翻譯並記錄識別結果；無法翻譯時回傳說明訊息（不記錄）"""
+        try:
+            translation = self.translate_recognized(result, config)
+        except TranslationUnavailable as e:
+            self.metrics.count('failed_translations')
+            return str(e)
+        self.record(result, translation)
+        return translation
+
+    def translate_once(self, config=None):
+        """單次截圖翻譯，回傳 (截圖, 識別結果, 譯文)；沒有可翻譯的文字時譯文為 None
+
+        與擷取循環共用管線，自動偵測語言時同樣使用區域鎖定的語言。
+        """
+        config = config or self.config.current
+        if self.ocr_worker is not None:
+            self.ocr_worker.start()     # 工作程序已閒置卸載時，啟動與擷取同時進行
+        pipeline = self.pipeline_for(config)
+        with self.metrics.stage('capture'):
+            screenshot = capture_region(config.region)
+        result = self.process(screenshot, pipeline)
+        if not result or not result['text'] or not self.accept(result, config):
+            return screenshot, result, None
+        return screenshot, result, self.translate_result(result, config)
+
+    def run(self, cancel, on_result, on_preview=None, on_low_confidence=None, capture=None):
+        """擷取循環：文字有變化且信心度足夠時翻譯並呼叫 on_result(截圖, 識別結果, 譯文)
+
+        cancel 為 threading.Event，設定後循環在目前階段結束時停止，進行中的結果不再回呼。
+        每次循環讀取最新發布的設定；回呼在擷取執行緒中執行，介面更新需自行轉交 UI 執行緒。
+        capture(區域) 取代螢幕擷取（重播錄製的工作階段時使用）。
+        設有錄製器（recorder，見 recorder.py）時，每張畫面的處理結果都交給錄製器。
+        """
+        metrics = self.metrics
+        breaker = self.translation.breaker
+        capture = capture or capture_region
+        pipeline = None
+        last_text = None
+        retry_failed = False
+
+        # 閒置卸載的 OCR 工作程序在擷取開始時就重新啟動
+        if self.ocr_worker is not None:
+            self.ocr_worker.start()
+
+        while not cancel.is_set():
+            config = self.config.current
+            loop_start = time.perf_counter()
+            try:
+                # 翻譯失敗的文字在服務恢復（或可以探測）時重新翻譯
+                if retry_failed and breaker.available():
+                    last_text = None
+                    retry_failed = False
+
+                if pipeline is None or pipeline.config.version != config.version:
+                    pipeline = self.pipeline_for(config)
+                    if pipeline.resets_text:
+                        last_text = None
+
+                with metrics.stage('capture'):
+                    screenshot = capture(config.region)
+                metrics.count('frames')
+                check_cancelled(cancel)
+                if on_preview:
+                    on_preview(screenshot)
+
+                result = self.process(screenshot, pipeline, cancel)
+                translation = None
+                if not result or not result['text']:
+                    status = 'empty'
+                    metrics.count('empty_frames')
+                elif result['text'] == last_text:
+                    status = 'duplicate'
+                    metrics.count('duplicate_frames')
+                else:
+                    last_text = result['text']
+
+                    if self.accept(result, config):
+                        try:
+                            translation = self.translate_recognized(result, config)
+                            status = 'translated'
+                        except TranslationUnavailable as e:
+                            translation = str(e)
+                            status = 'unavailable'
+
+                        # 停止期間才完成的翻譯不再顯示或記錄
+                        check_cancelled(cancel)
+                        if status == 'unavailable':
+                            metrics.count('failed_translations')
+                            retry_failed = True
+                        else:
+                            self.record(result, translation)
+                            metrics.count('translations')
+                        on_result(screenshot, result, translation)
+                    else:
+                        status = 'low_confidence'
+                        metrics.count('low_confidence_frames')
+                        if on_low_confidence:
+                            on_low_confidence(result)
+
+                recorder = self.recorder
+                if recorder is not None:
+                    recorder.record(screenshot, config, result, status, translation)
+
+            except CaptureCancelled:
+                metrics.count('cancelled_frames')
+                break
+            except Exception as e:
+                metrics.error('capture_loop', e)
+                print(f"擷取錯誤: {e}")
+
+            metrics.observe('loop', time.perf_counter() - loop_start)
+            cancel.wait(config.interval)
@@ -0,0 +1,391 @@
+"""翻譯歷史的持久化儲存
+
+所有翻譯記錄以只追加方式寫入 SQLite，寫入由背景執行緒批次提交；
+匯出時逐批從資料庫讀取並直接寫入檔案，記憶體用量與記錄筆數無關。
+每筆記錄附帶內容雜湊，匯入時略過雜湊已存在的記錄，重複匯入同一份檔案不會產生
+重複記錄；執行中的翻譯一律追加（同一秒內翻譯兩次同一句也是兩筆）。
+"""
+import csv
+import hashlib
+import json
+import queue
+import sqlite3
+import textwrap
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+DEFAULT_DB_PATH = 'translation_history.db'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    language TEXT NOT NULL,
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    digest BLOB
+);
+CREATE INDEX IF NOT EXISTS history_session ON history (session);
+"""
+
+_INSERT = (
+    'INSERT INTO history (session, ts, language, source, target, confidence, digest) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?)'
+)
+
+_EXISTS = 'SELECT 1 FROM history WHERE digest = ? LIMIT 1'
+
+# 匯入的記錄不屬於任何執行階段
+IMPORT_SESSION = 0
+
+# 寫入佇列的控制訊號
+_CLEAR = object()
+_STOP = object()
+
+
+def content_digest(label, language, source, target):
+    """以時間標記與內容計算去重用的雜湊"""
+    data = '\x1f'.join((label, language, source, target)).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def time_label(ts):
+    """去重雜湊使用的時間標記，與匯出的 date / timestamp 欄位一致"""
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def record_to_item(ts, language, source, target, confidence):
+    """將資料庫欄位轉換為歷史項目字典"""
+    moment = datetime.fromtimestamp(ts)
+    return {
+        'timestamp': moment.strftime("%H:%M:%S"),
+        'date': moment.strftime("%Y-%m-%d"),
+        'language': language,
+        'source': source,
+        'target': target,
+        'confidence': confidence
+    }
+
+
+class HistoryStore:
+    """只追加的翻譯歷史資料庫，寫入在背景執行緒進行"""
+
+    def __init__(self, path=DEFAULT_DB_PATH, batch_size=500):
+        self.path = path
+        self.batch_size = batch_size
+        self.session = int(time.time())
+        self._queue = queue.Queue()
+        self._closed = False
+
+        # 先建立資料表，讓讀取端不必等待寫入執行緒
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        self._migrate(conn)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @staticmethod
+    def _migrate(conn):
+        """舊版資料庫補上雜湊欄位；雜湊索引只供匯入查詢，不限制唯一"""
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(history)')}
+        if 'digest' not in columns:
+            conn.execute('ALTER TABLE history ADD COLUMN digest BLOB')
+        conn.execute('DROP INDEX IF EXISTS history_digest')
+        conn.execute('CREATE INDEX IF NOT EXISTS history_digest_lookup ON history (digest)')
+        conn.commit()
+
+    def append(self, source, target, language='', confidence=0.0, ts=None):
+        """加入一筆記錄（不阻塞，由背景執行緒寫入）"""
+        if ts is None:
+            ts = time.time()
+        digest = content_digest(time_label(ts), language, source, target)
+        self._queue.put((self.session, ts, language, source, target, float(confidence), digest))
+
+    def clear(self, session=None):
+        """清空所有記錄；指定 session 時只清空該次執行的記錄"""
+        self._queue.put((_CLEAR, session))
+
+    def flush(self):
+        """等待目前排隊中的寫入全部提交"""
+        self._queue.join()
+
+    def close(self):
+        """寫完剩餘記錄並結束背景執行緒"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_loop(self):
+        """背景寫入循環：一次取出佇列中所有項目並在同一交易中提交"""
+        conn = self._connect()
+        stop = False
+
+        while not stop:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = []
+            try:
+                for item in items:
+                    if item is _STOP:
+                        stop = True
+                    elif item[0] is _CLEAR:
+                        self._insert(conn, rows)
+                        rows = []
+                        conn.execute(*self._query('DELETE FROM history', item[1]))
+                    else:
+                        rows.append(item)
+                self._insert(conn, rows)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"歷史寫入錯誤: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+        conn.close()
+
+    @staticmethod
+    def _insert(conn, rows):
+        if rows:
+            conn.executemany(_INSERT, rows)
+
+    def _query(self, sql, session):
+        if session is not None:
+            return sql + ' WHERE session = ?', (session,)
+        return sql, ()
+
+    def count(self, session=None):
+        """記錄筆數"""
+        self.flush()
+        conn = self._connect()
+        try:
+            sql, params = self._query('SELECT COUNT(*) FROM history', session)
+            return conn.execute(sql, params).fetchone()[0]
+        finally:
+            conn.close()
+
+    def has_records(self, session=None):
+        """是否有任何記錄"""
+        self.flush()
+        conn = self._connect()
+        try:
+            sql, params = self._query('SELECT 1 FROM history', session)
+            return conn.execute(sql + ' LIMIT 1', params).fetchone() is not None
+        finally:
+            conn.close()
+
+    def iter_records(self, session=None, batch_size=1000):
+        """依寫入順序逐批讀取記錄"""
+        self.flush()
+        conn = self._connect()
+        try:
+            sql, params = self._query(
+                'SELECT ts, language, source, target, confidence FROM history', session
+            )
+            cursor = conn.execute(sql + ' ORDER BY id', params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield record_to_item(*row)
+        finally:
+            conn.close()
+
+    def export_async(self, filename, fieldnames, write_text, transform=None,
+                     session=None, on_done=None, progress=None):
+        """在背景執行緒匯出記錄，完成後以 (筆數, 錯誤) 呼叫 on_done"""
+        def run():
+            count, error = 0, None
+            try:
+                records = self.iter_records(session=session)
+                if transform:
+                    records = map(transform, records)
+                count = export_records(records, filename, fieldnames, write_text, progress)
+            except Exception as e:
+                error = e
+            if on_done:
+                on_done(count, error)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def import_file(self, filename, default_language='', on_pairs=None, progress=None, keep_last=100):
+        """串流匯入 JSON 陣列或 JSON Lines 歷史檔
+
+        依內容雜湊略過已存在的記錄；每批解析出的 (原文, 譯文) 會交給 on_pairs，
+        可用來預先填入翻譯快取。回傳 (讀取筆數, 新增筆數, 最後新增的記錄)，
+        記錄為 (時間, 語言, 原文, 譯文, 信心度)，可直接加入 RecentHistory（見 recent.py）。
+        """
+        self.flush()
+        conn = self._connect()
+        read = added = 0
+        recent = deque(maxlen=keep_last)
+
+        try:
+            with open(filename, 'r', encoding='utf-8-sig') as f:
+                batch = []
+                for item in iter_json_items(f):
+                    row = normalize_item(item, default_language)
+                    if row is None:
+                        continue
+                    batch.append(row)
+                    read += 1
+                    if len(batch) >= self.batch_size:
+                        added += self._import_batch(conn, batch, on_pairs, recent)
+                        batch = []
+                        if progress:
+                            progress(read, added)
+                added += self._import_batch(conn, batch, on_pairs, recent)
+        finally:
+            conn.close()
+
+        return read, added, list(recent)
+
+    @staticmethod
+    def _import_batch(conn, batch, on_pairs, recent):
+        added = 0
+        for row in batch:
+            if conn.execute(_EXISTS, (row[6],)).fetchone() is None:
+                conn.execute(_INSERT, row)
+                added += 1
+                recent.append(row[1:6])
+        conn.commit()
+        if on_pairs and batch:
+            on_pairs([(row[3], row[4]) for row in batch])
+        return added
+
+    def import_async(self, filename, default_language='', on_pairs=None, progress=None,
+                     on_done=None, keep_last=100):
+        """在背景執行緒匯入，完成後以 (結果, 錯誤) 呼叫 on_done"""
+        def run():
+            result, error = (0, 0, []), None
+            try:
+                result = self.import_file(filename, default_language, on_pairs, progress, keep_last)
+            except Exception as e:
+                error = e
+            if on_done:
+                on_done(result, error)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+
+def iter_json_items(f, chunk_size=1 << 16):
+    """逐項解析 JSON 陣列或 JSON Lines，不需將整個檔案載入記憶體"""
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size)
+    pos = 0
+    eof = not buffer
+
+    while True:
+        # 跳過空白、陣列括號與分隔逗號
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,[]':
+            pos += 1
+
+        if pos >= len(buffer):
+            if eof:
+                return
+            buffer = f.read(chunk_size)
+            pos = 0
+            eof = not buffer
+            continue
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # 項目跨越區塊邊界，補讀下一段
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield item
+        pos = end
+
+
+def normalize_item(item, default_language=''):
+    """將各版本匯出的歷史項目轉換為資料庫欄位，無法辨識時回傳 None"""
+    if not isinstance(item, dict):
+        return None
+
+    source = item.get('source', item.get('korean'))
+    target = item.get('target', item.get('chinese'))
+    if not isinstance(source, str) or not isinstance(target, str):
+        return None
+
+    language = item.get('language') or default_language
+    date = item.get('date', '')
+    timestamp = item.get('timestamp', '')
+    label = f"{date} {timestamp}".strip()
+
+    try:
+        ts = datetime.strptime(label, "%Y-%m-%d %H:%M:%S").timestamp()
+    except ValueError:
+        ts = time.time()
+
+    try:
+        confidence = float(item.get('confidence', 0.0))
+    except (TypeError, ValueError):
+        confidence = 0.0
+
+    digest = content_digest(label, language, source, target)
+    return (IMPORT_SESSION, ts, language, source, target, confidence, digest)
+
+
+def export_records(records, filename, fieldnames, write_text, progress=None, progress_every=5000):
+    """依副檔名將記錄串流寫入 JSON / CSV / 純文字檔，回傳筆數"""
+    count = 0
+
+    if filename.endswith('.json'):
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for item in records:
+                f.write(',\n' if count else '\n')
+                f.write(textwrap.indent(json.dumps(item, ensure_ascii=False, indent=2), '  '))
+                count += 1
+                if progress and count % progress_every == 0:
+                    progress(count)
+            f.write('\n]' if count else ']')
+    elif filename.endswith('.csv'):
+        with open(filename, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for item in records:
+                writer.writerow(item)
+                count += 1
+                if progress and count % progress_every == 0:
+                    progress(count)
+    else:  # txt
+        with open(filename, 'w', encoding='utf-8') as f:
+            for item in records:
+                write_text(f, item)
+                count += 1
+                if progress and count % progress_every == 0:
+                    progress(count)
+
+    return count
@@ -0,0 +1,104 @@
+"""語言設定與 Tesseract 語言包偵測
+
+`pytesseract.get_languages()` 需要啟動 Tesseract 子程序，改為先讀取上次的
+偵測結果，再於背景重新確認並更新快取。
+"""
+import json
+import threading
+
+LANGUAGE_CACHE_PATH = 'tesseract_languages.json'
+
+# 語言配置（Tesseract 代碼 → 名稱與 Google 翻譯代碼）
+LANGUAGES = {
+    # 東亞語言
+    'jpn': {'name': '日文', 'google_code': 'ja'},
+    'kor': {'name': '韓文', 'google_code': 'ko'},
+    'chi_sim': {'name': '簡體中文', 'google_code': 'zh-cn'},
+    'chi_tra': {'name': '繁體中文', 'google_code': 'zh-tw'},
+
+    # 歐洲語言
+    'eng': {'name': '英文', 'google_code': 'en'},
+    'fra': {'name': '法文', 'google_code': 'fr'},
+    'deu': {'name': '德文', 'google_code': 'de'},
+    'spa': {'name': '西班牙文', 'google_code': 'es'},
+    'ita': {'name': '義大利文', 'google_code': 'it'},
+    'por': {'name': '葡萄牙文', 'google_code': 'pt'},
+    'rus': {'name': '俄文', 'google_code': 'ru'},
+
+    # 其他語言
+    'ara': {'name': '阿拉伯文', 'google_code': 'ar'},
+    'tha': {'name': '泰文', 'google_code': 'th'},
+    'vie': {'name': '越南文', 'google_code': 'vi'},
+    'ind': {'name': '印尼文', 'google_code': 'id'},
+    'tur': {'name': '土耳其文', 'google_code': 'tr'},
+    'pol': {'name': '波蘭文', 'google_code': 'pl'},
+    'nld': {'name': '荷蘭文', 'google_code': 'nl'},
+    'swe': {'name': '瑞典文', 'google_code': 'sv'},
+}
+
+# 目標語言選項
+TARGET_LANGUAGES = {
+    'zh-tw': '繁體中文',
+    'zh-cn': '簡體中文',
+    'en': '英文',
+    'ja': '日文',
+    'ko': '韓文',
+    'es': '西班牙文',
+    'fr': '法文',
+    'de': '德文',
+    'ru': '俄文',
+    'ar': '阿拉伯文',
+    'th': '泰文',
+    'vi': '越南文',
+}
+
+
+def google_code(lang_code):
+    """Tesseract 語言代碼轉換為 Google 翻譯代碼"""
+    return LANGUAGES.get(lang_code, {}).get('google_code', 'auto')
+
+
+def language_name(lang_code):
+    """語言顯示名稱"""
+    return LANGUAGES.get(lang_code, {}).get('name', lang_code)
+
+
+def load_cached_languages(path=LANGUAGE_CACHE_PATH):
+    """讀取上次偵測到的語言包列表，沒有快取時回傳 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['languages']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def discover_languages(path=LANGUAGE_CACHE_PATH):
+    """向 Tesseract 查詢已安裝的語言包並寫入快取"""
+    import pytesseract
+
+    languages = pytesseract.get_languages()
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'tesseract_cmd': pytesseract.pytesseract.tesseract_cmd,
+                'languages': languages
+            }, f, indent=2)
+    except OSError as e:
+        print(f"無法寫入語言快取: {e}")
+    return languages
+
+
+def discover_languages_async(callback, path=LANGUAGE_CACHE_PATH):
+    """在背景執行緒偵測語言包，完成後以 (語言列表, 錯誤) 呼叫 callback"""
+    def run():
+        try:
+            languages = discover_languages(path)
+        except Exception as e:
+            callback(None, e)
+        else:
+            callback(languages, None)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
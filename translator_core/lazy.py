@@ -0,0 +1,58 @@
+"""延遲匯入重量級模組
+
+cv2、numpy、pytesseract、googletrans、easyocr（torch）等模組載入需要數百毫秒到數秒，
+改為首次使用時才匯入，或在視窗顯示後由背景執行緒預先載入。
+"""
+import importlib
+import threading
+import time
+
+# 背景預載時記錄的各模組匯入時間（秒）
+import_times = {}
+
+
+class LazyModule:
+    """首次存取屬性時才匯入的模組代理"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            start = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            import_times.setdefault(self._name, time.perf_counter() - start)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name):
+    """回傳延遲匯入的模組代理"""
+    return LazyModule(name)
+
+
+def warm_up(modules, then=None):
+    """在背景執行緒依序載入模組，完成後呼叫 then()"""
+    def run():
+        for module in modules:
+            try:
+                module._load()
+            except Exception as e:
+                print(f"預先載入 {module._name} 失敗: {e}")
+        if then:
+            then()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
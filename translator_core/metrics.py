@@ -0,0 +1,160 @@
+"""擷取管線的效能量測
+
+每個階段（擷取、預處理、各語言 OCR、快取查詢、翻譯、介面更新）的耗時記錄在
+滾動直方圖中：最近的樣本用來計算百分位數，累計的桶計數則可匯出為 Prometheus
+文字格式。另有事件計數（重複畫面、空白畫面、快取命中等）與最近的錯誤記錄。
+"""
+import bisect
+import json
+import threading
+import time
+from collections import deque
+
+# 直方圖桶上限（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RollingHistogram:
+    """最近 window 筆樣本的百分位數，加上自啟動以來的累計桶計數"""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self):
+        """最近樣本的統計（毫秒）"""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {'count': self.count, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0, 'mean': 0.0}
+
+        def percentile(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+        return {
+            'count': self.count,
+            'p50': percentile(0.5),
+            'p90': percentile(0.9),
+            'p99': percentile(0.99),
+            'max': self.max * 1000,
+            'mean': self.total / self.count * 1000
+        }
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """各階段耗時、事件計數與錯誤記錄（執行緒安全）"""
+
+    def __init__(self, window=500, max_errors=50):
+        self.window = window
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.errors = deque(maxlen=max_errors)
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """量測一個階段的耗時：with metrics.stage('ocr.jpn'): ..."""
+        return _StageTimer(self, name)
+
+    def observe(self, name, seconds):
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                histogram = self.stages[name] = RollingHistogram(self.window)
+            histogram.observe(seconds)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def error(self, stage, exc):
+        """記錄錯誤（保留最近幾筆）"""
+        self.count('errors')
+        with self._lock:
+            self.errors.append({
+                'time': time.time(),
+                'stage': stage,
+                'error': f"{type(exc).__name__}: {exc}"
+            })
+
+    def timed(self, name, func):
+        """包裝函式，每次呼叫都記錄耗時（用於 UI 更新等回呼）"""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages.clear()
+            self.counters.clear()
+            self.errors.clear()
+
+    def snapshot(self):
+        """目前統計的字典（毫秒）"""
+        with self._lock:
+            return {
+                'uptime': time.time() - self.started,
+                'stages': {name: h.summary() for name, h in sorted(self.stages.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'errors': list(self.errors)
+            }
+
+    def to_prometheus(self):
+        """Prometheus 文字格式"""
+        lines = [
+            '# HELP translator_stage_seconds Pipeline stage latency.',
+            '# TYPE translator_stage_seconds histogram'
+        ]
+        with self._lock:
+            for name, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS, histogram.bucket_counts):
+                    cumulative += n
+                    lines.append(f'translator_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'translator_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'translator_stage_seconds_sum{{stage="{name}"}} {histogram.total:.6f}')
+                lines.append(f'translator_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+
+            lines.append('# HELP translator_events_total Pipeline event counters.')
+            lines.append('# TYPE translator_events_total counter')
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'translator_events_total{{event="{name}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    def export(self, filename):
+        """依副檔名匯出為 JSON 或 Prometheus 文字格式"""
+        if filename.endswith('.json'):
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(self.to_prometheus())
@@ -0,0 +1,172 @@
+"""OCR 識別（Tesseract / EasyOCR）
+
+所有識別函式都回傳相同格式的結果字典：
+    {'text': 文字, 'language': Tesseract 語言代碼, 'confidence': 平均信心度 (0-100)}
+Tesseract 的結果另有 'words'（WordBoxes，見 words.py），保存各單字的邊框與行號。
+從 OCR 快取（見 ocr_cache.py）取得的結果沒有 'words'。
+
+大影像在文字行之間的空白處切成條帶（見 strips.py），由多個 Tesseract 程序
+同時識別後依閱讀順序合併；信心度以合併後的所有單字平均。條帶的 Tesseract
+子程序各自限制為單一 OpenMP 執行緒（只影響條帶，不修改本程序的環境變數）。
+"""
+import os
+import re
+import shlex
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from translator_core.lazy import lazy_import
+from translator_core.strips import split_strips, strip_workers
+from translator_core.words import WordBoxes, parse_tesseract_tsv
+
+pytesseract = lazy_import('pytesseract')
+easyocr = lazy_import('easyocr')
+
+DEFAULT_TESSERACT_CONFIG = '--psm 6'
+
+# 不以空白分詞的語言，單字直接相連
+NO_SPACE_LANGUAGES = {'jpn', 'chi_sim', 'chi_tra'}
+
+# 單行、單字模式的頁面分割不切條帶
+_SINGLE_LINE_PSM = re.compile(r'--psm\s+(7|8|10|13)\b')
+
+_strip_pool = None
+_strip_pool_lock = threading.Lock()
+
+
+def word_separator(lang):
+    """組合單字時使用的分隔字元（中日文不以空白分詞）"""
+    codes = lang.split('+')
+    return '' if all(code.split('_vert')[0] in NO_SPACE_LANGUAGES for code in codes) else ' '
+
+
+def strip_pool():
+    """條帶識別共用的執行緒池（每個執行緒等待一個 Tesseract 子程序）"""
+    global _strip_pool
+    with _strip_pool_lock:
+        if _strip_pool is None:
+            _strip_pool = ThreadPoolExecutor(max_workers=strip_workers(), thread_name_prefix='ocr-strip')
+        return _strip_pool
+
+
+def strip_environment():
+    """條帶子程序的環境變數：多個 Tesseract 同時執行時，各自的 OpenMP 執行緒只會互相搶核心"""
+    env = dict(os.environ)
+    env.setdefault('OMP_THREAD_LIMIT', '1')
+    return env
+
+
+def recognize_words(image, lang, config=DEFAULT_TESSERACT_CONFIG, env=None):
+    """Tesseract 識別一張影像，回傳 WordBoxes；env 指定子程序的環境變數"""
+    if env is None:
+        return parse_tesseract_tsv(pytesseract.image_to_data(image, lang=lang, config=config))
+    return parse_tesseract_tsv(tesseract_tsv(image, lang, config, env))
+
+
+def tesseract_tsv(image, lang, config, env):
+    """以指定的環境變數執行 Tesseract 並回傳 TSV（pytesseract 無法逐次指定環境變數）"""
+    tess = pytesseract.pytesseract
+    with tess.save(image) as (output_base, input_filename):
+        args = [tess.tesseract_cmd, input_filename, output_base, '-l', lang, '-c', 'tessedit_create_tsv=1']
+        args += shlex.split(config, posix=os.name != 'nt')
+        kwargs = tess.subprocess_args()
+        kwargs['env'] = env
+        try:
+            proc = subprocess.Popen(args, **kwargs)
+        except FileNotFoundError:
+            raise tess.TesseractNotFoundError()
+        _, errors = proc.communicate()
+        if proc.returncode:
+            raise tess.TesseractError(proc.returncode, tess.get_errors(errors))
+        with open(f'{output_base}.tsv', 'rb') as f:
+            return f.read().decode('utf-8')
+
+
+def tesseract_ocr(image, lang, config=DEFAULT_TESSERACT_CONFIG, parallel=True):
+    """單一語言 Tesseract 識別，保留原始分行與單字邊框（words）
+
+    parallel 為 True 時大影像切成條帶同時識別。
+    """
+    strips = split_strips(image) if parallel and not _SINGLE_LINE_PSM.search(config) else None
+    if strips and len(strips) > 1:
+        pool = strip_pool()
+        env = strip_environment()
+        futures = [(top, pool.submit(recognize_words, strip, lang, config, env)) for top, strip in strips]
+        words = WordBoxes.concatenate([(future.result(), top) for top, future in futures])
+    else:
+        words = recognize_words(image, lang, config)
+
+    return {
+        'text': words.text_block(word_separator(lang)).strip(),
+        'language': lang,
+        'confidence': words.mean_confidence(),
+        'words': words
+    }
+
+
+def single_language_ocr(image, lang, config=None, metrics=None, profile=None):
+    """單一語言 OCR，失敗時回傳 None
+
+    未指定 config 時使用遊戲的 OCR 設定檔（profile，見 tuning.py）；
+    設定檔的語言不同或沒有設定檔時使用預設的 '--psm 6'。
+    """
+    if config is None:
+        if profile is not None and profile.applies_to(lang):
+            config = profile.tesseract_config()
+        else:
+            config = DEFAULT_TESSERACT_CONFIG
+    try:
+        return tesseract_ocr(image, lang, config)
+    except Exception as e:
+        if metrics:
+            metrics.error('ocr', e)
+        print(f"OCR 錯誤: {e}")
+        return None
+
+
+def multi_language_ocr(image, languages, config=DEFAULT_TESSERACT_CONFIG, metrics=None, cancel=None):
+    """多語言 OCR (自動偵測)：逐一嘗試各語言，取信心度最高者
+
+    cancel（threading.Event）設定後不再嘗試其餘語言。
+    """
+    best_result = None
+    best_confidence = 0
+
+    for lang_code in languages:
+        if cancel is not None and cancel.is_set():
+            break
+        try:
+            with metrics.stage(f'ocr.{lang_code}') if metrics else nullcontext():
+                result = tesseract_ocr(image, lang_code, config)
+        except Exception:
+            continue
+
+        if result['confidence'] > best_confidence and result['text']:
+            best_confidence = result['confidence']
+            best_result = result
+
+    return best_result
+
+
+def load_easyocr(languages):
+    """建立 EasyOCR 讀取器（會載入 torch，耗時數秒）"""
+    return easyocr.Reader(languages)
+
+
+def easyocr_ocr(reader, image, lang):
+    """EasyOCR 識別"""
+    return easyocr_result(reader.readtext(image), lang)
+
+
+def easyocr_result(results, lang):
+    """EasyOCR 的 (文字框, 文字, 信心度) 列表轉為結果字典"""
+    text = ' '.join([result[1] for result in results])
+    confidence = sum(result[2] for result in results) / len(results) * 100 if results else 0
+
+    return {
+        'text': text.strip(),
+        'language': lang,
+        'confidence': confidence
+    }
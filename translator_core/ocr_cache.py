@@ -0,0 +1,346 @@
+"""以畫面縮圖比對的持久化 OCR 快取
+
+遊戲的選單、提示框與對話框會反覆出現，每次出現都要重新預處理與識別。
+這裡在預處理之前先把擷取畫面轉為灰階、以區域平均縮成每格 THUMB_CELL 像素的
+縮圖：抖色、壓縮雜訊與漸層背景的細微變化在格內平均掉，文字不同時則有格子的
+亮度明顯改變。縮圖最多 96×48 格，400×120 的對話框約 3 KB。查詢分兩步：
+
+- 縮圖完全相同（同一張畫面）時以雜湊直接命中
+- 否則在同一組（設定與縮圖大小相同）的項目中找逐格亮度差最大值最小者，
+  不超過 MAX_CELL_DIFF 即視為同一個畫面
+
+影響識別的設定（預處理方案、OCR 引擎、語言與 OCR 設定檔）是分組的一部分，
+對應到識別結果的文字、語言與信心度。
+
+快取寫入 SQLite（WAL 模式，由背景執行緒批次提交），下次啟動仍然有效；記憶體中
+保留 LRU 順序，超過容量時淘汰最久未使用的項目。與前一畫面的去重不同，任何曾經看過的畫面都能命中。
+"""
+import hashlib
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from translator_core.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+DEFAULT_OCR_CACHE_PATH = 'ocr_cache.db'
+
+# 亮度量化位移：右移 5 位元 → 8 階（只用於判斷畫面是否改變的 image_fingerprint）
+QUANTIZE_SHIFT = 5
+
+# 縮圖每格的邊長（像素）與格數上限（欄, 列），大區域的格子放大以限制記憶體
+THUMB_CELL = 4
+THUMB_MAX_CELLS = (96, 48)
+
+# 縮圖任一格的亮度差（0-255）超過此值即視為不同畫面：±5 雜訊、JPEG 壓縮與抖色的
+# 格差不超過 3，換掉一個字母（11 像素高的字）時至少有一格相差 8 以上
+MAX_CELL_DIFF = 6
+
+# 比對時先只比較每隔幾格的取樣，排除明顯不同的項目後再比較全部的格子
+SAMPLE_STEP = 16
+
+# 寫入佇列的控制訊號
+_CLEAR = object()
+_STOP = object()
+_DELETE = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    key BLOB PRIMARY KEY,
+    bucket BLOB NOT NULL,
+    thumb BLOB NOT NULL,
+    text TEXT NOT NULL,
+    language TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    used REAL NOT NULL
+);
+"""
+
+
+def image_fingerprint(image):
+    """擷取畫面（PIL 圖片或 RGB 陣列）的精確指紋，用於判斷畫面是否與上一張相同
+
+    亮度量化後取雜湊，任何一個像素跨過量化邊界都會改變指紋；
+    有雜訊的畫面要比對是否相同時使用 image_thumbnail 與 thumbnail_distance。
+    """
+    img = np.asarray(image)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    h, w = gray.shape
+    small = cv2.resize(gray, (max(1, w // 2), max(1, h // 2)), interpolation=cv2.INTER_AREA)
+    quantized = np.ascontiguousarray(small >> QUANTIZE_SHIFT)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array(quantized.shape, dtype=np.int32).tobytes())
+    digest.update(quantized.tobytes())
+    return digest.digest()
+
+
+def image_thumbnail(image):
+    """灰階並以區域平均縮小的縮圖（uint8 二維陣列）"""
+    img = np.asarray(image)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    h, w = gray.shape
+    cols = min(THUMB_MAX_CELLS[0], max(1, w // THUMB_CELL))
+    rows = min(THUMB_MAX_CELLS[1], max(1, h // THUMB_CELL))
+    return cv2.resize(gray, (cols, rows), interpolation=cv2.INTER_AREA)
+
+
+def thumbnail_distance(thumbs, thumb):
+    """各縮圖（N×格數）與 thumb（格數）逐格亮度差的最大值"""
+    return np.abs(thumbs.astype(np.int16) - thumb.astype(np.int16)).max(axis=1)
+
+
+class CacheKey:
+    """快取鍵：縮圖雜湊（完全相同時直接命中）、分組與縮圖"""
+
+    __slots__ = ('digest', 'bucket', 'thumb')
+
+    def __init__(self, digest, bucket, thumb):
+        self.digest = digest
+        self.bucket = bucket
+        self.thumb = thumb
+
+
+class _Bucket:
+    """設定與縮圖大小相同的項目，比對時把縮圖疊成一個陣列"""
+
+    def __init__(self):
+        self.thumbs = {}    # 雜湊 → 縮圖（一維）
+        self._keys = None
+        self._stack = None
+        self._samples = None
+
+    def add(self, digest, thumb):
+        self.thumbs[digest] = thumb
+        self._stack = None
+
+    def remove(self, digest):
+        if self.thumbs.pop(digest, None) is not None:
+            self._stack = None
+
+    def nearest(self, thumb, max_diff):
+        """最接近且逐格差不超過 max_diff 的項目雜湊，沒有時回傳 None"""
+        if not self.thumbs:
+            return None
+        if self._stack is None:
+            self._keys = list(self.thumbs)
+            self._stack = np.stack([self.thumbs[key] for key in self._keys])
+            self._samples = np.ascontiguousarray(self._stack[:, ::SAMPLE_STEP])
+        candidates = np.flatnonzero(thumbnail_distance(self._samples, thumb[::SAMPLE_STEP]) <= max_diff)
+        if not len(candidates):
+            return None
+        distances = thumbnail_distance(self._stack[candidates], thumb)
+        index = int(distances.argmin())
+        return self._keys[candidates[index]] if distances[index] <= max_diff else None
+
+
+def config_signature(config):
+    """影響識別結果的設定欄位"""
+    languages = '+'.join(config.languages) if config.ocr_mode == 'multi' else config.language
+    return '|'.join((
+        config.preprocessing, config.ocr_engine, config.ocr_mode, languages,
+        repr(config.ocr_profile), repr(config.text_colors)
+    )).encode('utf-8')
+
+
+class OcrCache:
+    """有容量上限的持久化 LRU OCR 快取（執行緒安全）
+
+    資料庫的讀取與寫入都在背景執行緒進行：建立時不讀取資料庫（不拖慢介面啟動），
+    背景載入完成前只有本次執行新增的項目能命中；寫入放進佇列，由背景執行緒
+    批次提交，擷取執行緒不必等待磁碟。
+    """
+
+    def __init__(self, path=DEFAULT_OCR_CACHE_PATH, max_entries=20000, batch_size=500):
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.loaded = threading.Event()
+        self._entries = OrderedDict()   # 雜湊 → (文字, 語言, 信心度, 分組)
+        self._buckets = {}              # 分組 → _Bucket
+        self._touched = {}  # 命中但尚未寫回的項目 → 使用時間
+        self._cleared = False  # 載入完成前清空過，不再載入舊項目
+        self._on_loaded = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._closed = False
+
+        self._writer = threading.Thread(target=self._write_loop, name='ocr-cache', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(ocr_cache)')}
+        if columns and 'thumb' not in columns:
+            # 舊版以精確指紋為鍵的項目無法與縮圖比對，直接捨棄
+            conn.execute('DROP TABLE ocr_cache')
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def _load(self, conn):
+        """讀入資料庫中的項目，排在本次執行新增的項目之前（較舊）"""
+        try:
+            rows = conn.execute(
+                'SELECT key, bucket, thumb, text, language, confidence FROM ocr_cache ORDER BY used'
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"OCR 快取載入錯誤: {e}")
+            rows = []
+        with self._lock:
+            if not self._cleared:
+                entries = OrderedDict()
+                for key, bucket, thumb, text, language, confidence in rows:
+                    if key not in self._entries:
+                        entries[key] = (text, language, confidence, bucket)
+                        self._bucket(bucket).add(key, np.frombuffer(thumb, dtype=np.uint8))
+                entries.update(self._entries)
+                self._entries = entries
+                self._evict()
+            callbacks, self._on_loaded = self._on_loaded, []
+            self.loaded.set()
+        for callback in callbacks:
+            callback(len(self._entries))
+
+    def when_loaded(self, callback):
+        """載入完成後以 (項目數) 呼叫 callback（於背景執行緒）；已載入時立即呼叫"""
+        with self._lock:
+            if not self.loaded.is_set():
+                self._on_loaded.append(callback)
+                return
+        callback(len(self._entries))
+
+    def key(self, image, config):
+        """畫面與設定對應的快取鍵（CacheKey）"""
+        thumb = image_thumbnail(image)
+        signature = config_signature(config)
+        bucket = hashlib.blake2b(
+            signature + np.array(thumb.shape, dtype=np.int32).tobytes(), digest_size=16
+        ).digest()
+        thumb = np.ascontiguousarray(thumb).ravel()
+        digest = hashlib.blake2b(bucket + thumb.tobytes(), digest_size=16).digest()
+        return CacheKey(digest, bucket, thumb)
+
+    def _bucket(self, bucket):
+        """取得分組（呼叫端持有鎖）"""
+        group = self._buckets.get(bucket)
+        if group is None:
+            group = self._buckets[bucket] = _Bucket()
+        return group
+
+    def get(self, key):
+        """取得識別結果字典，未命中時回傳 None"""
+        with self._lock:
+            digest = key.digest
+            if digest not in self._entries:
+                group = self._buckets.get(key.bucket)
+                digest = group.nearest(key.thumb, MAX_CELL_DIFF) if group is not None else None
+                if digest is None:
+                    return None
+            self._entries.move_to_end(digest)
+            self._touched[digest] = time.time()
+            entry = self._entries[digest]
+
+        text, language, confidence, _ = entry
+        return {'text': text, 'language': language, 'confidence': confidence}
+
+    def put(self, key, result):
+        """儲存識別結果（只保存文字、語言與信心度），資料庫寫入由背景執行緒進行"""
+        entry = (result['text'], result['language'], float(result['confidence']), key.bucket)
+        with self._lock:
+            self._entries[key.digest] = entry
+            self._entries.move_to_end(key.digest)
+            self._bucket(key.bucket).add(key.digest, key.thumb)
+            self._touched.pop(key.digest, None)
+            self._queue.put((key.digest, key.bucket, key.thumb.tobytes(), *entry[:3], time.time()))
+            self._evict()
+
+    def _evict(self):
+        """淘汰最久未使用的項目（呼叫端持有鎖）"""
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            key, entry = self._entries.popitem(last=False)
+            group = self._buckets[entry[3]]
+            group.remove(key)
+            if not group.thumbs:
+                del self._buckets[entry[3]]
+            self._touched.pop(key, None)
+            evicted.append((key,))
+        if evicted:
+            self._queue.put((_DELETE, evicted))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._touched.clear()
+            if not self.loaded.is_set():
+                self._cleared = True
+            self._queue.put(_CLEAR)
+
+    def flush(self):
+        """等待目前排隊中的寫入全部提交"""
+        self._queue.join()
+
+    def close(self):
+        """寫完剩餘項目與使用時間並結束背景執行緒"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_loop(self):
+        """背景執行緒：先載入資料庫，再一次取出佇列中所有寫入並在同一交易中提交"""
+        conn = self._connect()
+        self._load(conn)
+
+        stop = False
+        while not stop:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                for item in items:
+                    if item is _STOP:
+                        stop = True
+                    elif item is _CLEAR:
+                        conn.execute('DELETE FROM ocr_cache')
+                    elif item[0] is _DELETE:
+                        conn.executemany('DELETE FROM ocr_cache WHERE key = ?', item[1])
+                    else:
+                        conn.execute(
+                            'INSERT OR REPLACE INTO ocr_cache (key, bucket, thumb, text, language, confidence, used) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?)', item
+                        )
+                self._flush_touched(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"OCR 快取寫入錯誤: {e}")
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+        conn.close()
+
+    def _flush_touched(self, conn):
+        """把命中項目的使用時間寫回資料庫"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            conn.executemany(
+                'UPDATE ocr_cache SET used = ? WHERE key = ?',
+                [(used, key) for key, used in touched.items()]
+            )
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,252 @@
+"""在獨立程序中執行 OCR
+
+EasyOCR（torch）或多個 Tesseract 語言的識別會讓介面程序整個工作階段都佔著
+數百 MB 到數 GB 的記憶體，識別時的 CPU 運算也和 Tk 搶同一把 GIL。這裡把
+OCR 放到獨立的工作程序：
+
+- 預處理後的影像寫入共用記憶體，管道（Pipe）只傳送區塊名稱、形狀與識別請求
+- 工作程序閒置超過 idle_timeout 秒後自行結束，釋放模型與語言資料
+- 下一次識別時自動重新啟動（開始擷取時即預先啟動，不必等到第一張畫面）
+
+工作程序以 spawn 方式啟動，不繼承介面程序的 Tk 與執行緒狀態；介面程序設定的
+Tesseract 執行檔路徑（pytesseract.tesseract_cmd）與 TESSDATA_PREFIX 在啟動時傳入。識別請求為
+    ('single', 語言, OCR 設定檔) / ('multi', 語言列表) / ('easyocr', 語言)
+回傳與 ocr.py 相同格式的結果字典。多語言識別在工作程序內不檢查取消事件。
+"""
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import shared_memory
+
+from translator_core.lazy import lazy_import
+
+np = lazy_import('numpy')
+pytesseract = lazy_import('pytesseract')
+
+# 預設閒置多久（秒）後卸載工作程序
+DEFAULT_IDLE_TIMEOUT = 120
+
+# 共用記憶體不足時，新區塊比目前影像多配置的比例（避免影像稍大就重新配置）
+SHARED_MEMORY_HEADROOM = 1.5
+
+
+class OcrWorkerError(Exception):
+    """工作程序無法完成識別"""
+
+
+def tesseract_settings():
+    """介面程序目前的 Tesseract 設定：(執行檔路徑, TESSDATA_PREFIX 或 None)"""
+    return pytesseract.pytesseract.tesseract_cmd, os.environ.get('TESSDATA_PREFIX')
+
+
+def apply_tesseract_settings(settings):
+    """在工作程序內套用介面程序的 Tesseract 設定"""
+    cmd, tessdata = settings
+    pytesseract.pytesseract.tesseract_cmd = cmd
+    if tessdata:
+        os.environ['TESSDATA_PREFIX'] = tessdata
+
+
+def _attach(attached, name):
+    """連接介面程序建立的共用記憶體（只保留最新的區塊）"""
+    shm = attached.get(name)
+    if shm is None:
+        for old in attached.values():
+            old.close()
+        attached.clear()
+        shm = attached[name] = shared_memory.SharedMemory(name=name)
+    return shm
+
+
+class _Engines:
+    """工作程序內的 OCR 引擎（EasyOCR 第一次使用時才載入）"""
+
+    def __init__(self):
+        self.easyocr = None
+        self.easyocr_options = None
+
+    def recognize(self, request, image):
+        from translator_core import ocr
+
+        kind = request[0]
+        if kind == 'single':
+            _, language, profile = request
+            return ocr.single_language_ocr(image, language, profile=profile)
+        if kind == 'multi':
+            return ocr.multi_language_ocr(image, request[1])
+        if kind == 'easyocr':
+            _, language, options = request
+            return self.easyocr_for(options).recognize(image, language)
+        raise ValueError(f"未知的識別請求: {kind}")
+
+    def easyocr_for(self, options):
+        """options 為 (語言列表, 執行緒數, 是否使用 ONNX)；語言改變時重新載入"""
+        from translator_core.easyocr_engine import EasyOcrRecognizer, load_reader
+
+        if self.easyocr is None or self.easyocr_options[0] != options[0]:
+            languages, threads, onnx = options
+            self.easyocr = EasyOcrRecognizer(load_reader(list(languages), threads, onnx))
+            self.easyocr_options = options
+        return self.easyocr
+
+
+def serve(conn, idle_timeout, tesseract=None):
+    """工作程序主迴圈：閒置超過 idle_timeout 秒或收到 'stop' 時結束
+
+    tesseract 為 tesseract_settings() 的結果，在第一次識別前套用。
+    """
+    if tesseract is not None:
+        apply_tesseract_settings(tesseract)
+    engines = _Engines()
+    attached = {}
+    try:
+        while conn.poll(idle_timeout):
+            try:
+                message = conn.recv()
+            except EOFError:
+                break
+            if message[0] == 'stop':
+                break
+
+            _, request, (name, shape, dtype), idle_timeout = message
+            start = time.perf_counter()
+            try:
+                shm = _attach(attached, name)
+                image = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                try:
+                    result = engines.recognize(request, image)
+                finally:
+                    del image
+                conn.send(('ok', result, time.perf_counter() - start))
+            except Exception as e:
+                conn.send(('error', f"{type(e).__name__}: {e}", time.perf_counter() - start))
+    finally:
+        for shm in attached.values():
+            shm.close()
+        conn.close()
+
+
+class OcrWorker:
+    """介面程序端的工作程序代理（執行緒安全，同一時間只處理一個請求）"""
+
+    def __init__(self, idle_timeout=DEFAULT_IDLE_TIMEOUT, metrics=None):
+        self.idle_timeout = idle_timeout
+        self.metrics = metrics
+        self.easyocr_options = None     # (語言, 執行緒數, 是否使用 ONNX)，見 configure_easyocr
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._conn = None
+        self._shm = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self):
+        return self._process is not None and self._process.is_alive()
+
+    def configure_easyocr(self, languages, threads=None, onnx=False):
+        """設定工作程序載入 EasyOCR 的方式（第一次 EasyOCR 識別時才在工作程序內載入）"""
+        self.easyocr_options = (tuple(languages), threads, onnx)
+
+    def start(self):
+        """確保工作程序已啟動（閒置卸載後重新啟動）"""
+        with self._lock:
+            self._ensure_process()
+
+    def _ensure_process(self):
+        if self.is_running:
+            return
+        self._shutdown_process()
+
+        parent_conn, child_conn = self._context.Pipe()
+        # 每次啟動都讀取目前的設定，main() 之後才指定的執行檔路徑也會生效
+        process = self._context.Process(
+            target=serve, args=(child_conn, self.idle_timeout, tesseract_settings()),
+            name='ocr-worker', daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._process = process
+        self._conn = parent_conn
+        if self.metrics:
+            self.metrics.count('ocr_worker_starts')
+
+    def _shutdown_process(self):
+        """回收已結束（或要結束）的工作程序"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+    def _write_frame(self, image):
+        """把影像寫入共用記憶體，回傳 (區塊名稱, 形狀, dtype)"""
+        array = np.ascontiguousarray(np.asarray(image))
+        shm = self._shm
+        if shm is None or shm.size < array.nbytes:
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+            shm = self._shm = shared_memory.SharedMemory(
+                create=True, size=max(1, int(array.nbytes * SHARED_MEMORY_HEADROOM))
+            )
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        view[...] = array
+        del view
+        return shm.name, array.shape, array.dtype.str
+
+    def _request(self, message):
+        self._ensure_process()
+        self._conn.send(message)
+        return self._conn.recv()
+
+    def recognize(self, request, image):
+        """送出識別請求並等待結果；工作程序剛好閒置結束時重新啟動並重試一次"""
+        with self._lock:
+            start = time.perf_counter()
+            frame = self._write_frame(image)
+            message = ('ocr', request, frame, self.idle_timeout)
+            try:
+                reply = self._request(message)
+            except (EOFError, OSError):
+                self._shutdown_process()
+                try:
+                    reply = self._request(message)
+                except (EOFError, OSError) as e:
+                    self._shutdown_process()
+                    raise OcrWorkerError(f"OCR 工作程序無回應: {e}") from e
+
+        status, payload, seconds = reply
+        if self.metrics:
+            # 工作程序外的額外耗時（共用記憶體寫入、管道往返、結果序列化）
+            self.metrics.observe('ocr_worker_ipc', max(0.0, time.perf_counter() - start - seconds))
+        if status == 'error':
+            raise OcrWorkerError(payload)
+        return payload
+
+    def recognize_easyocr(self, image, language):
+        if self.easyocr_options is None:
+            return None
+        return self.recognize(('easyocr', language, self.easyocr_options), image)
+
+    def stop(self):
+        """立即卸載工作程序（下次識別時重新啟動）"""
+        with self._lock:
+            if self.is_running:
+                try:
+                    self._conn.send(('stop',))
+                except OSError:
+                    pass
+            self._shutdown_process()
+
+    def close(self):
+        """結束工作程序並釋放共用記憶體"""
+        self.stop()
+        with self._lock:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
@@ -0,0 +1,229 @@
+"""EasyOCR 模型的 ONNX 匯出與 int8 量化
+
+EasyOCR 的偵測（CRAFT）與辨識模型以全精度 PyTorch 執行，載入要數秒、佔用大量
+記憶體，在沒有 GPU 的電腦上也很慢。這裡把兩個模型匯出為 ONNX，再以
+onnxruntime 的動態量化把權重轉成 int8，執行時以 ONNX Runtime 在 CPU 上推論：
+
+- 匯出：載入一般的 Reader（不使用 torch 量化），以動態的批次與寬高匯出兩個
+  模型，再各產生一份 int8 版本
+- 載入：建立不載入模型權重的 Reader（detector=False, recognizer=False），
+  補上 CTC 轉換器後把偵測器與辨識器換成 ONNX Runtime 工作階段的包裝；
+  EasyOCR 其餘的前後處理（切框、排序、解碼）維持不變
+
+需要額外安裝 onnx 與 onnxruntime。以 EasyOCR 1.7 的內部介面實作。
+
+用法：
+    python -m translator_core.onnx_easyocr export --langs ko en
+    python -m translator_core.onnx_easyocr compare 樣本目錄 --langs ko en
+"""
+import argparse
+import os
+import statistics
+import time
+
+from translator_core import ocr
+from translator_core.corpus import levenshtein
+from translator_core.lazy import lazy_import
+
+np = lazy_import('numpy')
+torch = lazy_import('torch')
+easyocr = lazy_import('easyocr')
+ort = lazy_import('onnxruntime')
+
+ONNX_DIR = 'easyocr_onnx'
+
+DETECTOR = 'detector'
+RECOGNIZER = 'recognizer'
+
+# EasyOCR 辨識模型的輸入高度
+RECOGNIZER_HEIGHT = 64
+
+OPSET = 17
+
+
+def model_dir(languages):
+    """語言組合對應的模型目錄"""
+    return os.path.join(ONNX_DIR, '+'.join(languages))
+
+
+def model_path(languages, name, quantized=True):
+    return os.path.join(model_dir(languages), name + ('_int8' if quantized else '') + '.onnx')
+
+
+def has_onnx_models(languages, quantized=True):
+    return all(os.path.exists(model_path(languages, name, quantized)) for name in (DETECTOR, RECOGNIZER))
+
+
+def _unwrap(model):
+    """取出 DataParallel 包裝內的模型"""
+    return model.module if isinstance(model, torch.nn.DataParallel) else model
+
+
+def _recognizer_wrapper(model):
+    """辨識模型的 forward 需要 text 參數（CTC 模型不使用），匯出時固定為 None"""
+    class RecognizerExport(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, image):
+            return self.model(image, None)
+
+    return RecognizerExport()
+
+
+def export_models(languages):
+    """匯出目前語言組合的偵測與辨識模型（fp32 與 int8），回傳模型目錄"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    directory = model_dir(languages)
+    os.makedirs(directory, exist_ok=True)
+
+    # torch 動態量化過的模型無法匯出，載入全精度版本
+    reader = easyocr.Reader(languages, gpu=False, quantize=False, verbose=False)
+    detector = _unwrap(reader.detector).eval()
+    recognizer = _recognizer_wrapper(_unwrap(reader.recognizer)).eval()
+
+    with torch.no_grad():
+        torch.onnx.export(
+            detector, torch.zeros(1, 3, 640, 640), model_path(languages, DETECTOR, False),
+            input_names=['image'], output_names=['score', 'feature'],
+            dynamic_axes={'image': {0: 'batch', 2: 'height', 3: 'width'}},
+            opset_version=OPSET
+        )
+        torch.onnx.export(
+            recognizer, torch.zeros(1, 1, RECOGNIZER_HEIGHT, 256), model_path(languages, RECOGNIZER, False),
+            input_names=['image'], output_names=['logits'],
+            dynamic_axes={'image': {0: 'batch', 3: 'width'}, 'logits': {0: 'batch', 1: 'steps'}},
+            opset_version=OPSET
+        )
+
+    for name in (DETECTOR, RECOGNIZER):
+        quantize_dynamic(model_path(languages, name, False), model_path(languages, name, True),
+                         weight_type=QuantType.QInt8)
+    return directory
+
+
+class OnnxModel:
+    """ONNX Runtime 工作階段，輸入輸出都是 torch 張量，可以直接替換 EasyOCR 的模型"""
+
+    def __init__(self, path, threads=None):
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = int(threads)
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def run(self, tensor):
+        outputs = self.session.run(None, {self.input_name: tensor.detach().cpu().numpy()})
+        return [torch.from_numpy(output) for output in outputs]
+
+
+class OnnxDetector(OnnxModel):
+    def __call__(self, image):
+        score, feature = self.run(image)
+        return score, feature
+
+
+class OnnxRecognizer(OnnxModel):
+    def __call__(self, image, text=None):
+        return self.run(image)[0]
+
+
+def load_onnx_reader(languages, quantized=True, threads=None):
+    """建立使用 ONNX 模型的 EasyOCR Reader（需先匯出模型）"""
+    from easyocr import detection
+    from easyocr.utils import CTCLabelConverter
+
+    reader = easyocr.Reader(languages, gpu=False, detector=False, recognizer=False, verbose=False)
+
+    # 不載入模型時 Reader 不會設定偵測函式與 CTC 轉換器，依 Reader 的做法補上
+    reader.get_textbox = detection.get_textbox
+    base = os.path.dirname(easyocr.__file__)
+    dict_list = {lang: os.path.join(base, 'dict', lang + '.txt') for lang in reader.lang_list}
+    reader.converter = CTCLabelConverter(reader.character, {}, dict_list)
+
+    reader.detector = OnnxDetector(model_path(languages, DETECTOR, quantized), threads)
+    reader.recognizer = OnnxRecognizer(model_path(languages, RECOGNIZER, quantized), threads)
+    return reader
+
+
+def _compact(text):
+    """比對用：EasyOCR 以空白串接文字框，比較時忽略所有空白"""
+    return ''.join(text.split())
+
+
+def evaluate(name, load, samples):
+    """量測載入時間、每張耗時與字元正確率"""
+    start = time.perf_counter()
+    reader = load()
+    loaded = time.perf_counter() - start
+
+    reader.readtext(np.asarray(samples[0][1]))  # 暖機
+    latencies = []
+    distance = 0
+    length = 0
+    for _, image, reference in samples:
+        array = np.asarray(image)
+        start = time.perf_counter()
+        result = ocr.easyocr_ocr(reader, array, '')
+        latencies.append(time.perf_counter() - start)
+        reference = _compact(reference)
+        distance += levenshtein(reference, _compact(result['text']))
+        length += max(len(reference), 1)
+
+    accuracy = max(0.0, 1.0 - distance / length)
+    latency = statistics.mean(latencies) * 1000
+    print(f"{name:<12} 載入 {loaded:5.2f} 秒  {latency:7.1f} ms/張  正確率 {accuracy:.1%}")
+    return latency, accuracy
+
+
+def main():
+    from translator_core.tuning import read_samples
+
+    parser = argparse.ArgumentParser(description="EasyOCR 模型的 ONNX 匯出與速度/正確率比較")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help="匯出 ONNX 模型並量化為 int8")
+    export.add_argument('--langs', nargs='+', required=True, help="EasyOCR 語言代碼，例如 ko en")
+
+    compare = sub.add_parser('compare', help="在樣本上比較原版、ONNX 與 int8 ONNX")
+    compare.add_argument('samples', help="樣本目錄（圖片與同名 .txt 正確文字）")
+    compare.add_argument('--langs', nargs='+', required=True)
+    compare.add_argument('--threads', type=int, default=0, help="推論執行緒數（0 為預設）")
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        start = time.perf_counter()
+        directory = export_models(args.langs)
+        print(f"已匯出 → {directory} ({time.perf_counter() - start:.1f} 秒)")
+        for name in (DETECTOR, RECOGNIZER):
+            for quantized in (False, True):
+                path = model_path(args.langs, name, quantized)
+                print(f"  {os.path.basename(path):<20} {os.path.getsize(path) / 1024 / 1024:6.1f} MB")
+        return
+
+    samples = read_samples(args.samples)
+    if not samples:
+        parser.error("樣本目錄中沒有可用的圖片與正確文字")
+    if not has_onnx_models(args.langs, False) or not has_onnx_models(args.langs, True):
+        parser.error("尚未匯出 ONNX 模型，請先執行 export")
+
+    threads = args.threads or None
+    if threads:
+        torch.set_num_threads(threads)
+
+    stock_latency, stock_accuracy = evaluate(
+        'PyTorch', lambda: easyocr.Reader(args.langs, gpu=False, verbose=False), samples
+    )
+    for name, quantized in (('ONNX fp32', False), ('ONNX int8', True)):
+        latency, accuracy = evaluate(
+            name, lambda: load_onnx_reader(args.langs, quantized, threads), samples
+        )
+        print(f"{'':<12} 速度 {stock_latency / latency:.2f} 倍，正確率差 {accuracy - stock_accuracy:+.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""遊戲畫面上的翻譯覆蓋視窗"""
+import tkinter as tk
+
+
+class OverlayWindow:
+    """透明覆蓋視窗，用於在遊戲上顯示翻譯"""
+    def __init__(self, parent_app):
+        self.parent_app = parent_app
+        self.window = None
+        self.is_showing = False
+
+    def create_overlay(self):
+        """建立覆蓋視窗"""
+        self.window = tk.Toplevel()
+        self.window.title("翻譯覆蓋")
+
+        # 設定視窗屬性
+        self.window.attributes('-topmost', True)
+        self.window.attributes('-alpha', 0.8)
+        self.window.overrideredirect(True)
+
+        # 設定視窗樣式
+        self.window.configure(bg='black')
+
+        # 翻譯文字標籤
+        self.text_label = tk.Label(
+            self.window,
+            text="",
+            bg='black',
+            fg='yellow',
+            font=('Microsoft JhengHei', 14, 'bold'),
+            wraplength=400,
+            justify=tk.LEFT
+        )
+        self.text_label.pack(padx=10, pady=10)
+
+        # 使視窗可拖動
+        self.window.bind('<Button-1>', self.start_move)
+        self.window.bind('<B1-Motion>', self.on_move)
+        # 右鍵隱藏
+        self.window.bind('<Button-3>', lambda event: self.hide())
+
+        # 初始位置
+        self.window.geometry("+100+100")
+
+    def start_move(self, event):
+        self.x = event.x
+        self.y = event.y
+
+    def on_move(self, event):
+        deltax = event.x - self.x
+        deltay = event.y - self.y
+        x = self.window.winfo_x() + deltax
+        y = self.window.winfo_y() + deltay
+        self.window.geometry(f"+{x}+{y}")
+
+    def update_text(self, text):
+        """更新覆蓋文字"""
+        if not self.window:
+            self.create_overlay()
+        self.text_label.config(text=text)
+
+    def show_text(self, text):
+        """顯示文字（覆蓋視窗隱藏時一併顯示），並立即重繪"""
+        self.update_text(text)
+        if not self.is_showing:
+            self.window.deiconify()
+            self.is_showing = True
+        self.window.update_idletasks()
+
+    def hide(self):
+        """隱藏覆蓋視窗"""
+        if self.window and self.is_showing:
+            self.window.withdraw()
+            self.is_showing = False
+
+    def toggle(self):
+        """切換顯示/隱藏"""
+        if not self.window:
+            self.create_overlay()
+            self.is_showing = True
+        else:
+            if self.is_showing:
+                self.window.withdraw()
+            else:
+                self.window.deiconify()
+            self.is_showing = not self.is_showing
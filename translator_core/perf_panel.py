@@ -0,0 +1,194 @@
+"""「效能」分頁：即時顯示管線各階段耗時與事件計數"""
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from datetime import datetime
+
+# 階段顯示名稱，未列出的階段直接顯示原名（例如 ocr.jpn）
+STAGE_LABELS = {
+    'loop': '整體循環',
+    'capture': '擷取',
+    'ocr_cache': 'OCR 快取查詢',
+    'text_height': '字高估計',
+    'preprocess': '預處理',
+    'ocr_worker_ipc': 'OCR 工作程序傳輸',
+    'change_gate': '畫面變化檢查',
+    'remote_encode': '畫面壓縮',
+    'remote_roundtrip': '遠端處理 (往返)',
+    'cache_lookup': '快取查詢',
+    'translate': '翻譯 (網路)',
+    'ui_render': '介面更新',
+    'ui_preview': '預覽更新',
+    'corpus_snap': '劇本對齊',
+    'stop_latency': '停止延遲',
+    'one_shot': '單次翻譯 (按鍵→顯示)',
+}
+
+COUNTER_LABELS = {
+    'frames': '畫面數',
+    'duplicate_frames': '重複畫面',
+    'empty_frames': '無文字畫面',
+    'low_confidence_frames': '低信心度畫面',
+    'cancelled_frames': '停止時取消的畫面',
+    'translations': '翻譯次數',
+    'failed_translations': '翻譯失敗',
+    'breaker_rejected': '離線略過',
+    'ocr_cache_hits': 'OCR 快取命中',
+    'ocr_cache_misses': 'OCR 快取未命中',
+    'cache_hits': '快取命中',
+    'cache_misses': '快取未命中',
+    'segments': '翻譯片段',
+    'phrase_hits': '詞彙表命中',
+    'corpus_snaps': '劇本對齊',
+    'corpus_corrections': '劇本校正',
+    'corpus_translations': '劇本譯文',
+    'batch_fallbacks': '批次改逐句',
+    'scale_changes': '放大倍率調整',
+    'layout_reuses': 'EasyOCR 版面沿用',
+    'ocr_worker_starts': 'OCR 工作程序啟動',
+    'unchanged_frames': '未變化畫面（未送出）',
+    'remote_bytes': '送出位元組',
+    'remote_connects': '伺服器連線次數',
+    'language_detections': '完整語言偵測',
+    'language_redetections': '信心度下降重新偵測',
+    'errors': '錯誤',
+}
+
+
+class PerformancePanel:
+    """顯示 Metrics 統計並支援匯出的分頁內容"""
+
+    def __init__(self, parent, metrics, refresh_ms=1000):
+        self.metrics = metrics
+        self.refresh_ms = refresh_ms
+
+        self.frame = tk.Frame(parent, bg='#1e1e1e')
+        self.frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        # 工具列
+        toolbar = tk.Frame(self.frame, bg='#2d2d2d')
+        toolbar.pack(fill=tk.X, pady=(0, 10))
+
+        tk.Button(
+            toolbar,
+            text="匯出統計",
+            command=self.export,
+            bg='#4CAF50',
+            fg='white',
+            font=('Arial', 9),
+            padx=15,
+            pady=5
+        ).pack(side=tk.LEFT, padx=5)
+
+        tk.Button(
+            toolbar,
+            text="重設",
+            command=self.metrics.reset,
+            bg='#f44336',
+            fg='white',
+            font=('Arial', 9),
+            padx=15,
+            pady=5
+        ).pack(side=tk.LEFT, padx=5)
+
+        self.summary_label = tk.Label(
+            toolbar,
+            text="--",
+            bg='#2d2d2d',
+            fg='white',
+            font=('Arial', 10)
+        )
+        self.summary_label.pack(side=tk.RIGHT, padx=10)
+
+        # 各階段耗時表格
+        style = ttk.Style()
+        style.configure('Perf.Treeview', background='#0d0d0d', fieldbackground='#0d0d0d', foreground='white')
+        style.configure('Perf.Treeview.Heading', background='#2d2d2d', foreground='white')
+
+        columns = ('count', 'p50', 'p90', 'p99', 'max')
+        self.stage_tree = ttk.Treeview(self.frame, columns=columns, style='Perf.Treeview', height=12)
+        self.stage_tree.heading('#0', text="階段")
+        for column, text in zip(columns, ("次數", "p50 (ms)", "p90 (ms)", "p99 (ms)", "最大 (ms)")):
+            self.stage_tree.heading(column, text=text)
+            self.stage_tree.column(column, width=90, anchor=tk.E)
+        self.stage_tree.pack(fill=tk.BOTH, expand=True)
+
+        # 事件計數與最近錯誤
+        self.counter_label = tk.Label(
+            self.frame,
+            text="",
+            bg='#1e1e1e',
+            fg='#FFB74D',
+            font=('Arial', 10),
+            justify=tk.LEFT,
+            anchor=tk.W
+        )
+        self.counter_label.pack(fill=tk.X, pady=5)
+
+        self.error_label = tk.Label(
+            self.frame,
+            text="",
+            bg='#1e1e1e',
+            fg='#f44336',
+            font=('Arial', 9),
+            justify=tk.LEFT,
+            anchor=tk.W
+        )
+        self.error_label.pack(fill=tk.X)
+
+        self.frame.after(self.refresh_ms, self.refresh)
+
+    def refresh(self):
+        """定期更新（分頁未顯示時略過）"""
+        if self.frame.winfo_ismapped():
+            self.render(self.metrics.snapshot())
+        self.frame.after(self.refresh_ms, self.refresh)
+
+    def render(self, snapshot):
+        self.stage_tree.delete(*self.stage_tree.get_children())
+        for name, stats in snapshot['stages'].items():
+            self.stage_tree.insert('', tk.END, text=STAGE_LABELS.get(name, name), values=(
+                stats['count'],
+                f"{stats['p50']:.1f}",
+                f"{stats['p90']:.1f}",
+                f"{stats['p99']:.1f}",
+                f"{stats['max']:.1f}"
+            ))
+
+        counters = snapshot['counters']
+        self.counter_label.config(text=" | ".join(
+            f"{COUNTER_LABELS.get(name, name)}: {value}" for name, value in counters.items()
+        ))
+
+        frames = counters.get('frames', 0)
+        uptime = max(snapshot['uptime'], 1e-6)
+        hits = counters.get('cache_hits', 0)
+        lookups = hits + counters.get('cache_misses', 0)
+        hit_rate = f"{hits / lookups * 100:.0f}%" if lookups else "--"
+        self.summary_label.config(text=f"{frames / uptime:.2f} 畫面/秒 | 快取命中率 {hit_rate}")
+
+        if snapshot['errors']:
+            latest = snapshot['errors'][-1]
+            moment = time.strftime("%H:%M:%S", time.localtime(latest['time']))
+            self.error_label.config(text=f"最近錯誤 [{moment}] {latest['stage']}: {latest['error']}")
+        else:
+            self.error_label.config(text="")
+
+    def export(self):
+        """匯出統計為 JSON 或 Prometheus 文字格式"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[
+                ("JSON files", "*.json"),
+                ("Prometheus text", "*.prom"),
+                ("All files", "*.*")
+            ],
+            initialfile=f"translator_metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+
+        if filename:
+            try:
+                self.metrics.export(filename)
+                messagebox.showinfo("成功", "效能統計已匯出")
+            except Exception as e:
+                messagebox.showerror("錯誤", f"匯出失敗: {str(e)}")
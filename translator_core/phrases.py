@@ -0,0 +1,375 @@
+"""遊戲介面字串的本地詞彙表
+
+選單、道具名稱與系統訊息不斷重複出現，不需要每次都送到網路翻譯。
+每款遊戲一份詞彙表（使用者自行整理，或從 CSV/JSON 匯入），匯入時編譯為
+一個索引檔，執行時以 mmap 開啟：
+
+- 完全比對：原文的 64 位元雜湊排序後存放，查詢時二分搜尋再核對原文
+- 句中詞彙：較短的詞條另外編成 Aho-Corasick 自動機（轉移表、失敗連結、
+  輸出連結都存成陣列），整句只由詞彙與數字、標點組成時直接在本地組出譯文
+
+開啟索引只需讀取檔頭並建立陣列視圖，與詞條數量無關，數十萬筆也只要幾毫秒。
+
+索引檔格式（little-endian）：
+    檔頭 '<8sIII12s'：magic、詞條數、狀態數、轉移數、目標語言
+    hashes      uint64[詞條數]     原文雜湊（已排序）
+    entries     uint32[詞條數, 4]  原文位移、原文長度、譯文位移、譯文長度（位元組）
+    trans_keys  uint64[轉移數]     (狀態 << 21) | 字元碼位（已排序）
+    trans_next  uint32[轉移數]     轉移後的狀態
+    fail        uint32[狀態數]     失敗連結
+    output      int32[狀態數]      在此狀態結束的詞條（-1 表示無）
+    output_link int32[狀態數]      沿失敗連結最近的輸出狀態（-1 表示無）
+    depth       uint32[狀態數]     狀態深度（詞條字數）
+    blob        UTF-8 原文與譯文
+
+用法：
+    python -m translator_core.phrases 詞彙表.csv --target zh-tw
+"""
+import argparse
+import csv
+import hashlib
+import json
+import mmap
+import os
+import string
+import struct
+import time
+from collections import deque
+
+from translator_core.history import iter_json_items
+from translator_core.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+PHRASE_DIR = 'phrases'
+PHRASE_SUFFIX = '.phrases'
+
+MAGIC = b'GTPHRS01'
+_HEADER = struct.Struct('<8sIII12s')
+
+# 編入自動機的詞條長度（太短容易誤判，太長幾乎不會出現在句中）
+TERM_MIN_LENGTH = 2
+TERM_MAX_LENGTH = 16
+
+_CODEPOINT_BITS = 21
+
+# 詞彙之間允許出現的字元；整句只剩這些字元時不需連網
+_FILLER = set(
+    string.digits + string.punctuation + string.whitespace +
+    '０１２３４５６７８９xX×ｘ：・、。，！？（）「」『』［］【】／～…　'
+)
+
+
+def phrase_hash(text):
+    """原文的 64 位元雜湊"""
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def phrase_table_path(name):
+    """遊戲名稱對應的索引檔路徑"""
+    return os.path.join(PHRASE_DIR, name + PHRASE_SUFFIX)
+
+
+def read_phrase_pairs(filename):
+    """讀取 CSV/TSV 或 JSON 詞彙表，逐筆產生 (原文, 譯文)
+
+    CSV 有標題列時使用 source/target（或 korean/chinese）欄，否則取前兩欄；
+    JSON 可以是 {原文: 譯文} 物件，或含 source/target 的項目陣列（例如匯出的歷史記錄）。
+    """
+    if filename.lower().endswith('.json'):
+        with open(filename, 'r', encoding='utf-8') as f:
+            head = f.read(1)
+            while head and head.isspace():
+                head = f.read(1)
+            f.seek(0)
+            if head == '{':
+                for source, target in json.load(f).items():
+                    if isinstance(target, str):
+                        yield source, target
+                return
+            for item in iter_json_items(f):
+                if isinstance(item, dict):
+                    source = item.get('source', item.get('korean'))
+                    target = item.get('target', item.get('chinese'))
+                    if isinstance(source, str) and isinstance(target, str):
+                        yield source, target
+        return
+
+    delimiter = '\t' if filename.lower().endswith('.tsv') else ','
+    with open(filename, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        first = next(reader, None)
+        if first is None:
+            return
+
+        names = [name.strip().lower() for name in first]
+        source_names = [n for n in ('source', 'korean') if n in names]
+        target_names = [n for n in ('target', 'chinese') if n in names]
+        if source_names and target_names:
+            source_col = names.index(source_names[0])
+            target_col = names.index(target_names[0])
+        else:
+            source_col, target_col = 0, 1
+            if len(first) > 1:
+                yield first[0], first[1]
+
+        for row in reader:
+            if len(row) > max(source_col, target_col):
+                yield row[source_col], row[target_col]
+
+
+def _build_automaton(terms):
+    """以 (原文, 詞條索引) 建立 Aho-Corasick 自動機，回傳各陣列的 list"""
+    goto = {}
+    children = [[]]
+    depth = [0]
+    output = [-1]
+
+    for source, index in terms:
+        state = 0
+        for ch in source:
+            nxt = goto.get((state, ch))
+            if nxt is None:
+                nxt = len(depth)
+                goto[(state, ch)] = nxt
+                children[state].append((ch, nxt))
+                children.append([])
+                depth.append(depth[state] + 1)
+                output.append(-1)
+            state = nxt
+        output[state] = index
+
+    # 依廣度優先順序計算失敗連結與輸出連結
+    fail = [0] * len(depth)
+    output_link = [-1] * len(depth)
+    queue = deque(child for _, child in children[0])
+    while queue:
+        state = queue.popleft()
+        for ch, child in children[state]:
+            f = fail[state]
+            while f and (f, ch) not in goto:
+                f = fail[f]
+            target = goto.get((f, ch), 0)
+            fail[child] = target
+            output_link[child] = target if output[target] >= 0 else output_link[target]
+            queue.append(child)
+
+    transitions = sorted(((state << _CODEPOINT_BITS) | ord(ch), nxt) for (state, ch), nxt in goto.items())
+    return transitions, fail, output, output_link, depth
+
+
+def compile_phrase_table(pairs, path, target_language):
+    """把 (原文, 譯文) 編譯為索引檔（先寫入暫存檔再取代），回傳詞條數"""
+    entries = {}
+    for source, target in pairs:
+        source = source.strip()
+        target = target.strip()
+        if source and target:
+            entries[source] = target  # 重複的原文以後出現的為準
+
+    items = sorted((phrase_hash(source), source, target) for source, target in entries.items())
+
+    blob = bytearray()
+    rows = []
+    terms = []
+    for index, (_, source, target) in enumerate(items):
+        source_bytes = source.encode('utf-8')
+        target_bytes = target.encode('utf-8')
+        rows.append((len(blob), len(source_bytes), len(blob) + len(source_bytes), len(target_bytes)))
+        blob += source_bytes + target_bytes
+        if TERM_MIN_LENGTH <= len(source) <= TERM_MAX_LENGTH:
+            terms.append((source, index))
+
+    transitions, fail, output, output_link, depth = _build_automaton(terms)
+
+    header = _HEADER.pack(
+        MAGIC, len(items), len(depth), len(transitions), target_language.encode('ascii')[:12]
+    )
+    arrays = [
+        np.array([h for h, _, _ in items], dtype='<u8'),
+        np.array(rows, dtype='<u4').reshape(len(items), 4),
+        np.array([key for key, _ in transitions], dtype='<u8'),
+        np.array([nxt for _, nxt in transitions], dtype='<u4'),
+        np.array(fail, dtype='<u4'),
+        np.array(output, dtype='<i4'),
+        np.array(output_link, dtype='<i4'),
+        np.array(depth, dtype='<u4'),
+    ]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        for array in arrays:
+            f.write(array.tobytes())
+        f.write(blob)
+    os.replace(temp_path, path)
+    return len(items)
+
+
+class PhraseTable:
+    """以 mmap 開啟的詞彙表索引（唯讀，可跨執行緒共用）"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, states, transitions, target = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"不是詞彙表索引檔: {path}")
+
+        self.target_language = target.rstrip(b'\0').decode('ascii')
+        self._count = count
+
+        offset = _HEADER.size
+
+        def array(dtype, length, shape=None):
+            nonlocal offset
+            view = np.frombuffer(self._mm, dtype=dtype, count=length, offset=offset)
+            offset += view.nbytes
+            return view.reshape(shape) if shape else view
+
+        self._hashes = array('<u8', count)
+        self._entries = array('<u4', count * 4, (count, 4))
+        self._trans_keys = array('<u8', transitions)
+        self._trans_next = array('<u4', transitions)
+        self._fail = array('<u4', states)
+        self._output = array('<i4', states)
+        self._output_link = array('<i4', states)
+        self._depth = array('<u4', states)
+        self._blob = offset
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """釋放陣列視圖並關閉 mmap（仍有其他參照時交給垃圾回收）"""
+        self._hashes = self._entries = self._trans_keys = self._trans_next = None
+        self._fail = self._output = self._output_link = self._depth = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+    def _text(self, offset, length):
+        start = self._blob + int(offset)
+        return self._mm[start:start + int(length)].decode('utf-8')
+
+    def target(self, index):
+        """詞條的譯文"""
+        _, _, offset, length = self._entries[index]
+        return self._text(offset, length)
+
+    def get(self, text):
+        """完全比對，找不到時回傳 None"""
+        key = np.uint64(phrase_hash(text))
+        hashes = self._hashes
+        i = int(hashes.searchsorted(key))
+        while i < self._count and hashes[i] == key:
+            source_offset, source_length, _, _ = self._entries[i]
+            if self._text(source_offset, source_length) == text:
+                return self.target(i)
+            i += 1
+        return None
+
+    def find_terms(self, text):
+        """找出句中的詞條，回傳不重疊的 (起點, 終點, 詞條索引)，同一起點取最長者"""
+        keys = self._trans_keys
+        if not len(keys):
+            return []
+
+        nexts, fail, output, output_link, depth = (
+            self._trans_next, self._fail, self._output, self._output_link, self._depth
+        )
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            code = ord(ch)
+            while True:
+                key = np.uint64((state << _CODEPOINT_BITS) | code)
+                j = int(keys.searchsorted(key))
+                if j < len(keys) and keys[j] == key:
+                    state = int(nexts[j])
+                    break
+                if state == 0:
+                    break
+                state = int(fail[state])
+
+            match = state if output[state] >= 0 else int(output_link[state])
+            while match >= 0:
+                matches.append((i + 1 - int(depth[match]), i + 1, int(output[match])))
+                match = int(output_link[match])
+
+        matches.sort(key=lambda m: (m[0], m[0] - m[1]))
+        selected = []
+        end = 0
+        for match in matches:
+            if match[0] >= end:
+                selected.append(match)
+                end = match[1]
+        return selected
+
+    def translate_terms(self, text):
+        """整句只由詞條與數字、標點組成時回傳本地組出的譯文，否則回傳 None"""
+        parts = []
+        position = 0
+        for start, end, index in self.find_terms(text):
+            gap = text[position:start]
+            if not _FILLER.issuperset(gap):
+                return None
+            parts.append(gap)
+            parts.append(self.target(index))
+            position = end
+
+        if not parts or not _FILLER.issuperset(text[position:]):
+            return None
+        parts.append(text[position:])
+        return ''.join(parts)
+
+    def lookup(self, text):
+        """先完全比對，再嘗試以詞條組出整句"""
+        value = self.get(text)
+        if value is None:
+            value = self.translate_terms(text)
+        return value
+
+
+def load_phrase_table(path):
+    """開啟詞彙表索引，檔案不存在或格式不符時回傳 None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return PhraseTable(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"無法載入詞彙表: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="將 CSV/JSON 詞彙表編譯為索引檔")
+    parser.add_argument('source', help="CSV、TSV 或 JSON 詞彙表")
+    parser.add_argument('--output', help="索引檔路徑（預設為 phrases/<檔名>.phrases）")
+    parser.add_argument('--target', default='zh-tw', help="譯文語言代碼（預設 zh-tw）")
+    args = parser.parse_args()
+
+    output = args.output or phrase_table_path(os.path.splitext(os.path.basename(args.source))[0])
+
+    start = time.perf_counter()
+    count = compile_phrase_table(read_phrase_pairs(args.source), output, args.target)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    table = PhraseTable(output)
+    loaded = time.perf_counter() - start
+
+    print(f"{count} 筆詞條 → {output} ({os.path.getsize(output) / 1024:.0f} KB)")
+    print(f"編譯 {compiled:.2f} 秒，載入 {loaded * 1000:.2f} 毫秒")
+    table.close()
+
+
+if __name__ == '__main__':
+    main()
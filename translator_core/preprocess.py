@@ -0,0 +1,80 @@
+"""OCR 前的影像預處理"""
+from translator_core.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+
+def to_array(image):
+    """PIL 圖片轉換為 RGB numpy 陣列"""
+    return np.array(image)
+
+
+def no_preprocess(image, scale=1):
+    """不處理，只依倍率縮放"""
+    img = to_array(image)
+    if scale == 1:
+        return img
+    return cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+
+
+def basic_preprocess(image, scale=2):
+    """灰階、放大、二值化、去噪（適合單色文字）"""
+    img = to_array(image)
+
+    # 轉換為灰階
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+
+    # 放大影像
+    scaled = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+
+    # 應用二值化
+    _, binary = cv2.threshold(scaled, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # 去噪
+    return cv2.medianBlur(binary, 3)
+
+
+def advanced_preprocess(image, scale=2):
+    """進階預處理：對比增強、去噪、放大、銳化、二值化"""
+    img = to_array(image)
+
+    # 轉換為灰階
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+
+    # 提高對比度
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+    enhanced = clahe.apply(gray)
+
+    # 去噪
+    denoised = cv2.fastNlMeansDenoising(enhanced)
+
+    # 放大
+    scaled = cv2.resize(denoised, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+
+    # 銳化
+    kernel = np.array([[-1,-1,-1],
+                      [-1, 9,-1],
+                      [-1,-1,-1]])
+    sharpened = cv2.filter2D(scaled, -1, kernel)
+
+    # 二值化
+    _, binary = cv2.threshold(sharpened, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    return binary
+
+
+# 預處理方案名稱 → 處理函式
+PREPROCESS_PROFILES = {
+    'none': no_preprocess,
+    'basic': basic_preprocess,
+    'advanced': advanced_preprocess,
+}
+
+
+def preprocess(image, profile='advanced', scale=None):
+    """依方案名稱預處理影像；scale 為 None 時使用各方案的預設倍率"""
+    function = PREPROCESS_PROFILES.get(profile, advanced_preprocess)
+    if scale is None:
+        return function(image)
+    return function(image, scale=scale)
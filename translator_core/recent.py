@@ -0,0 +1,185 @@
+"""介面顯示用的近期翻譯記錄（欄位式儲存）
+
+原本每筆記錄是一個字典，日期、時間、語言代碼與語言名稱各存一份字串，
+再加上浮點數信心度，不算原文與譯文本身每筆約 420 位元組。這裡改為固定容量的
+環狀欄位，每筆約 31 位元組（含原文與譯文的參照）：
+
+- 時間：array('q') 的整數 epoch 秒
+- 語言：array('H') 中的編號，對應內部化（intern）的語言代碼表
+- 信心度：array('f')
+- 原文與譯文：list，只存字串參照
+
+顯示用的時間、日期與語言名稱在讀取時才由 HistoryEntry 產生。新增是 O(1)，
+以索引讀取是 O(1)，切片只與取出的筆數有關；統計直接掃描欄位，不建立項目。
+完整歷史仍由 history.py 的資料庫保存。
+
+量測兩種儲存方式每筆的記憶體（以 tracemalloc，不含原文與譯文本身）：
+    python -m translator_core.recent
+"""
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import Counter
+from datetime import datetime
+
+from translator_core.languages import language_name
+
+
+class HistoryEntry:
+    """一筆記錄的唯讀檢視，顯示用的欄位在存取時才產生"""
+
+    __slots__ = ('ts', 'language', 'source', 'target', 'confidence')
+
+    def __init__(self, ts, language, source, target, confidence):
+        self.ts = ts
+        self.language = language
+        self.source = source
+        self.target = target
+        self.confidence = confidence
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.ts).strftime("%H:%M:%S")
+
+    @property
+    def date(self):
+        return datetime.fromtimestamp(self.ts).strftime("%Y-%m-%d")
+
+    @property
+    def language_name(self):
+        return language_name(self.language)
+
+
+class RecentHistory:
+    """固定容量的近期翻譯記錄，滿了之後覆蓋最舊的一筆（同 deque(maxlen=...)）"""
+
+    def __init__(self, maxlen=500):
+        self.maxlen = maxlen
+        self._ts = array('q', [0]) * maxlen
+        self._languages = array('H', [0]) * maxlen
+        self._confidence = array('f', [0.0]) * maxlen
+        self._source = [None] * maxlen
+        self._target = [None] * maxlen
+        self._codes = []        # 編號 → 語言代碼
+        self._code_ids = {}     # 語言代碼 → 編號
+        self._start = 0
+        self._len = 0
+
+    def append(self, source, target, language='', confidence=0.0, ts=None):
+        """加入一筆記錄；已滿時丟棄最舊的一筆"""
+        code = self._code_ids.get(language)
+        if code is None:
+            code = len(self._codes)
+            self._codes.append(sys.intern(language))
+            self._code_ids[language] = code
+
+        slot = (self._start + self._len) % self.maxlen
+        if self._len == self.maxlen:
+            self._start = (self._start + 1) % self.maxlen
+        else:
+            self._len += 1
+
+        self._ts[slot] = int(time.time() if ts is None else ts)
+        self._languages[slot] = code
+        self._confidence[slot] = confidence
+        self._source[slot] = source
+        self._target[slot] = target
+
+    def clear(self):
+        """清空記錄（語言代碼表保留）"""
+        self._source = [None] * self.maxlen
+        self._target = [None] * self.maxlen
+        self._start = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for index in range(self._len):
+            yield self._entry((self._start + index) % self.maxlen)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry((self._start + i) % self.maxlen) for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('history index out of range')
+        return self._entry((self._start + index) % self.maxlen)
+
+    def _entry(self, slot):
+        return HistoryEntry(
+            self._ts[slot], self._codes[self._languages[slot]],
+            self._source[slot], self._target[slot], self._confidence[slot]
+        )
+
+    def _slots(self):
+        """目前使用中的欄位位置（由舊到新）"""
+        end = self._start + self._len
+        if end <= self.maxlen:
+            return range(self._start, end)
+        return list(range(self._start, self.maxlen)) + list(range(end - self.maxlen))
+
+    def count_since(self, ts):
+        """時間不早於 ts（epoch 秒）的筆數"""
+        times = self._ts
+        return sum(1 for slot in self._slots() if times[slot] >= ts)
+
+    def language_counts(self):
+        """各語言代碼的筆數"""
+        languages = self._languages
+        counts = Counter(languages[slot] for slot in self._slots())
+        return {self._codes[code]: count for code, count in counts.items()}
+
+
+def _allocated(build):
+    """build() 執行期間新配置且仍存活的位元組數"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def measure(count=500):
+    """回傳 (字典, RecentHistory) 每筆記錄的位元組數；原文與譯文事先建立，不列入計算"""
+    texts = [(f"source {i}", f"target {i}") for i in range(count)]
+    start = time.time()
+
+    def build_dicts():
+        items = []
+        for i, (source, target) in enumerate(texts):
+            moment = datetime.fromtimestamp(start + i)
+            items.append({
+                'timestamp': moment.strftime("%H:%M:%S"),
+                'date': moment.strftime("%Y-%m-%d"),
+                'language': 'jpn',
+                'language_name': language_name('jpn'),
+                'source': source,
+                'target': target,
+                'confidence': 80.0 + i % 20,
+            })
+        return items
+
+    def build_recent():
+        recent = RecentHistory(maxlen=count)
+        for i, (source, target) in enumerate(texts):
+            recent.append(source, target, 'jpn', 80.0 + i % 20, ts=start + i)
+        return recent
+
+    return _allocated(build_dicts) / count, _allocated(build_recent) / count
+
+
+def main():
+    old, new = measure()
+    print(f"字典 {old:.1f} 位元組/筆，RecentHistory {new:.1f} 位元組/筆")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,408 @@
+"""工作階段錄製與重播
+
+遊戲中遇到的效能或識別問題很難事後重現。錄製時擷取循環把每張畫面的處理結果
+交給 SessionRecorder（見 engine.py 的 run）：
+
+- 只保存有變化的畫面（畫面指紋與上一張不同，見 ocr_cache.py），附上相對時間、
+  擷取區域與當時的管線設定
+- 畫面以內容雜湊去重（對話框切回同一句時只存一份），以 PNG 無損壓縮
+- 同時保存當時的識別文字、語言、信心度、處理狀態與譯文
+
+錄製檔是單一 SQLite 檔案（.gtrec），寫入在背景執行緒進行，不拖慢擷取循環。
+
+重播時把錄製的畫面依序送回同一個擷取循環（TranslationEngine.run），可以照原本
+的時間間隔或全速執行；翻譯改用不連網的替身：錄製時的原文直接取得錄製的譯文，
+識別結果不同時回傳標記過的原文。最後逐張比對識別結果與譯文，列出差異。
+
+用法：
+    python -m translator_core.recorder info 錄製檔.gtrec
+    python -m translator_core.recorder replay 錄製檔.gtrec [--realtime] [--report 差異.json]
+"""
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from translator_core.config import config_from_dict, config_to_dict
+from translator_core.engine import CaptureCancelled, TranslationEngine
+from translator_core.languages import google_code
+from translator_core.lazy import lazy_import
+from translator_core.ocr_cache import image_fingerprint
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+RECORDING_DIR = 'recordings'
+RECORDING_EXTENSION = '.gtrec'
+FORMAT_VERSION = 1
+
+# PNG 壓縮等級（寫入在背景執行緒，取壓縮率較好的等級）
+PNG_COMPRESSION = 6
+
+# 替身翻譯器對沒有錄製譯文的原文加上的標記
+STUB_PREFIX = '[stub] '
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frames (
+    digest BLOB PRIMARY KEY,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS configs (
+    id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY,
+    t REAL NOT NULL,
+    x INTEGER, y INTEGER, w INTEGER, h INTEGER,
+    config INTEGER NOT NULL,
+    frame BLOB NOT NULL,
+    status TEXT NOT NULL,
+    text TEXT,
+    language TEXT,
+    confidence REAL,
+    translation TEXT
+);
+"""
+
+_STOP = object()
+
+
+def recording_path(directory=RECORDING_DIR):
+    """以目前時間命名的新錄製檔路徑"""
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, datetime.now().strftime('%Y%m%d-%H%M%S') + RECORDING_EXTENSION)
+
+
+def frame_digest(array):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array(array.shape, dtype=np.int32).tobytes())
+    digest.update(array.tobytes())
+    return digest.digest()
+
+
+def encode_frame(array):
+    """RGB（或灰階）畫面以 PNG 無損壓縮"""
+    image = cv2.cvtColor(array, cv2.COLOR_RGB2BGR) if array.ndim == 3 else array
+    ok, data = cv2.imencode('.png', image, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+    if not ok:
+        raise ValueError("畫面編碼失敗")
+    return data.tobytes()
+
+
+def decode_frame(data):
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2RGB) if image.ndim == 3 else image
+
+
+class SessionRecorder:
+    """錄製擷取循環的畫面與處理結果（record 不阻塞，寫入由背景執行緒進行）"""
+
+    def __init__(self, path):
+        self.path = path
+        self.events = 0
+        self._start = time.perf_counter()
+        self._last_fingerprint = None
+        self._queue = queue.Queue()
+        self._closed = False
+
+        conn = sqlite3.connect(path)
+        conn.executescript(_SCHEMA)
+        conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', [
+            ('format', str(FORMAT_VERSION)),
+            ('started', datetime.now().isoformat(timespec='seconds')),
+        ])
+        conn.commit()
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name='session-recorder', daemon=True)
+        self._writer.start()
+
+    def record(self, screenshot, config, result, status, translation):
+        """記錄一張畫面的處理結果；畫面與上一張相同時略過"""
+        if self._closed:
+            return
+        array = np.asarray(screenshot)
+        fingerprint = image_fingerprint(array)
+        if fingerprint == self._last_fingerprint:
+            return
+        self._last_fingerprint = fingerprint
+        self.events += 1
+        self._queue.put((time.perf_counter() - self._start, config, array, result, status, translation))
+
+    def close(self):
+        """寫完剩餘的畫面並結束背景執行緒"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_loop(self):
+        conn = sqlite3.connect(self.path)
+        configs = {}
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            try:
+                self._write(conn, configs, *item)
+                # 佇列清空時才提交，畫面密集時合併成一次交易
+                if self._queue.empty():
+                    conn.commit()
+            except (sqlite3.Error, ValueError) as e:
+                print(f"錄製寫入錯誤: {e}")
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def _write(conn, configs, t, config, array, result, status, translation):
+        data = json.dumps(config_to_dict(config), ensure_ascii=False, sort_keys=True)
+        config_id = configs.get(data)
+        if config_id is None:
+            conn.execute('INSERT OR IGNORE INTO configs (data) VALUES (?)', (data,))
+            config_id = configs[data] = conn.execute(
+                'SELECT id FROM configs WHERE data = ?', (data,)
+            ).fetchone()[0]
+
+        digest = frame_digest(array)
+        if conn.execute('SELECT 1 FROM frames WHERE digest = ?', (digest,)).fetchone() is None:
+            conn.execute(
+                'INSERT INTO frames (digest, width, height, data) VALUES (?, ?, ?, ?)',
+                (digest, array.shape[1], array.shape[0], encode_frame(array))
+            )
+
+        x, y, w, h = config.region or (None, None, None, None)
+        result = result or {}
+        conn.execute(
+            'INSERT INTO events (t, x, y, w, h, config, frame, status, text, language, confidence, translation) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (t, x, y, w, h, config_id, digest, status, result.get('text'), result.get('language'),
+             result.get('confidence'), translation)
+        )
+
+
+class Recording:
+    """讀取錄製檔"""
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.meta = dict(self.conn.execute('SELECT key, value FROM meta'))
+        if int(self.meta.get('format', 0)) != FORMAT_VERSION:
+            raise ValueError(f"不支援的錄製檔格式: {self.meta.get('format')}")
+        self.configs = {
+            config_id: config_from_dict(json.loads(data))
+            for config_id, data in self.conn.execute('SELECT id, data FROM configs')
+        }
+
+    def events(self):
+        """依序回傳每張畫面的記錄字典（不含畫面本身）"""
+        cursor = self.conn.execute(
+            'SELECT seq, t, config, frame, status, text, language, confidence, translation '
+            'FROM events ORDER BY seq'
+        )
+        for seq, t, config_id, frame, status, text, language, confidence, translation in cursor:
+            yield {
+                'seq': seq,
+                't': t,
+                'config': self.configs[config_id],
+                'frame': frame,
+                'status': status,
+                'text': text,
+                'language': language,
+                'confidence': confidence,
+                'translation': translation
+            }
+
+    def frame(self, digest):
+        data = self.conn.execute('SELECT data FROM frames WHERE digest = ?', (digest,)).fetchone()[0]
+        return decode_frame(data)
+
+    def stats(self):
+        events, duration = self.conn.execute('SELECT COUNT(*), MAX(t) FROM events').fetchone()
+        frames, stored = self.conn.execute('SELECT COUNT(*), SUM(LENGTH(data)) FROM frames').fetchone()
+        raw = self.conn.execute(
+            'SELECT SUM(f.width * f.height * 3) FROM events e JOIN frames f ON e.frame = f.digest'
+        ).fetchone()[0]
+        return {
+            'events': events,
+            'unique_frames': frames,
+            'duration': duration or 0.0,
+            'stored_bytes': stored or 0,
+            'raw_bytes': raw or 0,
+            'file_bytes': os.path.getsize(self.path)
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+class _StubResult:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubTranslator:
+    """不連網的翻譯器（替換 TranslationService 的 googletrans 翻譯器）"""
+
+    def translate(self, text, src=None, dest=None):
+        return _StubResult('\n'.join(STUB_PREFIX + line for line in text.split('\n')))
+
+
+class _ReplayCollector:
+    """重播時取代錄製器，依錄製序號收集每張畫面的處理結果"""
+
+    def __init__(self):
+        self.current = None     # 目前處理中的錄製序號（由重播的擷取函式設定）
+        self.outcomes = {}
+
+    def record(self, screenshot, config, result, status, translation):
+        result = result or {}
+        self.outcomes[self.current] = {
+            'status': status,
+            'text': result.get('text'),
+            'language': result.get('language'),
+            'confidence': result.get('confidence'),
+            'translation': translation
+        }
+
+
+def replay(path, realtime=False, engine=None):
+    """以擷取循環重播錄製檔，回傳 (錄製的記錄, {序號: 重播的結果}, 耗時秒數)
+
+    錄製時的譯文預先放入翻譯快取，網路翻譯以 StubTranslator 取代，重播不連網。
+    """
+    recording = Recording(path)
+    events = list(recording.events())
+    engine = engine or TranslationEngine()
+    engine.translation.translator = StubTranslator()
+    for event in events:
+        if event['status'] == 'translated':
+            engine.translation.cache.put(
+                event['text'], google_code(event['language']), event['config'].target_language,
+                event['translation']
+            )
+
+    collector = _ReplayCollector()
+    engine.recorder = collector
+    cancel = threading.Event()
+    position = 0
+    start = time.perf_counter()
+
+    def publish(config):
+        # 依錄製時的設定處理畫面；全速重播時不等待擷取間隔
+        changes = {name: getattr(config, name) for name in config.__dataclass_fields__ if name != 'version'}
+        if not realtime:
+            changes['interval'] = 0
+        engine.config.publish(**changes)
+
+    def capture(region):
+        nonlocal position
+        if position >= len(events):
+            cancel.set()
+            raise CaptureCancelled()
+        event = events[position]
+        position += 1
+        # 擷取循環在擷取之前讀取設定，因此先發布下一張畫面的設定
+        if position < len(events):
+            publish(events[position]['config'])
+        if realtime:
+            delay = start + event['t'] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        collector.current = event['seq']
+        return recording.frame(event['frame'])
+
+    if events:
+        publish(events[0]['config'])
+    try:
+        engine.run(cancel, on_result=lambda screenshot, result, translation: None, capture=capture)
+    finally:
+        recording.close()
+    return events, collector.outcomes, time.perf_counter() - start
+
+
+def diff_outcomes(events, outcomes):
+    """逐張比對錄製與重播的結果，回傳差異列表"""
+    differences = []
+    for event in events:
+        outcome = outcomes.get(event['seq'])
+        if outcome is None:
+            differences.append({'seq': event['seq'], 't': round(event['t'], 3), 'fields': ['missing']})
+            continue
+        changed = [
+            field for field in ('status', 'text', 'translation')
+            if event[field] != outcome[field]
+        ]
+        if changed:
+            differences.append({
+                'seq': event['seq'],
+                't': round(event['t'], 3),
+                'fields': changed,
+                'recorded': {field: event[field] for field in ('status', 'text', 'translation')},
+                'replayed': {field: outcome[field] for field in ('status', 'text', 'translation')}
+            })
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作階段錄製檔的資訊與重播比對")
+    sub = parser.add_subparsers(dest='command', required=True)
+    info = sub.add_parser('info', help="顯示錄製檔內容")
+    info.add_argument('path')
+    run = sub.add_parser('replay', help="以擷取循環重播並比對結果")
+    run.add_argument('path')
+    run.add_argument('--realtime', action='store_true', help="依錄製時的時間間隔重播（預設全速）")
+    run.add_argument('--report', help="差異報告輸出路徑（JSON）")
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        recording = Recording(args.path)
+        stats = recording.stats()
+        recording.close()
+        print(f"{stats['events']} 張畫面（{stats['unique_frames']} 張不重複），共 {stats['duration']:.1f} 秒")
+        print(f"畫面 {stats['raw_bytes'] / 1024 / 1024:.1f} MB → 壓縮後 {stats['stored_bytes'] / 1024 / 1024:.2f} MB，"
+              f"檔案 {stats['file_bytes'] / 1024 / 1024:.2f} MB")
+        return
+
+    engine = TranslationEngine()
+    events, outcomes, elapsed = replay(args.path, realtime=args.realtime, engine=engine)
+    differences = diff_outcomes(events, outcomes)
+
+    stages = engine.metrics.snapshot()['stages']
+    print(f"重播 {len(outcomes)}/{len(events)} 張畫面，{elapsed:.2f} 秒")
+    for name in ('preprocess', 'loop'):
+        if name in stages:
+            summary = stages[name]
+            print(f"  {name:<12} p50 {summary['p50']:7.1f} ms  p99 {summary['p99']:7.1f} ms")
+    for difference in differences[:20]:
+        print(f"#{difference['seq']} ({difference['t']:.2f}s) {', '.join(difference['fields'])}: "
+              f"{difference.get('recorded')} → {difference.get('replayed')}")
+    if len(differences) > 20:
+        print(f"... 另有 {len(differences) - 20} 筆差異")
+    print(f"{len(differences)} 張畫面與錄製結果不同")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'events': len(events), 'elapsed': elapsed, 'stages': stages,
+                       'differences': differences}, f, ensure_ascii=False, indent=2)
+        print(f"差異報告 → {args.report}")
+    return 1 if differences else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
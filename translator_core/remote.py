@@ -0,0 +1,451 @@
+"""遠端翻譯：遊戲電腦只擷取畫面，預處理、OCR 與翻譯交給翻譯伺服器
+
+遊戲電腦上的 RemoteCaptureClient 擷取畫面後先以畫面指紋（見 ocr_cache.py）
+過濾沒有變化的畫面，只把有變化的畫面送到伺服器；伺服器的 TranslationServer
+以共用的 TranslationEngine 預處理、識別並翻譯，回傳結果給遊戲電腦顯示。
+每個連線有自己的管線設定與「上一句」，識別與翻譯在固定大小的工作執行緒池中
+進行，多個用戶端可以同時連線。
+
+傳輸協定（TCP，網路位元組順序）：
+    訊息標頭  magic 'GT' | 版本 (1B) | 類型 (1B) | 請求編號 (4B) | 內容長度 (4B)
+    CONFIG   管線設定（JSON），不回覆
+    FRAME    寬 (2B) | 高 (2B) | 色版數 (1B) | 編碼 (1B) | zlib 壓縮的像素
+             編碼 1 表示與同一連線上一張畫面的 XOR 差異（只有對話框文字改變時
+             幾乎全是 0，壓縮後很小），0 表示完整畫面；兩者都是無損的
+    RESULT   識別與翻譯結果（JSON）
+    ERROR    錯誤訊息（UTF-8）
+
+伺服器：
+    python -m translator_core.remote --host 0.0.0.0 --port 7373 --workers 4
+在多語言翻譯器的設定分頁填入伺服器位址（host:port）後，開始偵測即改由伺服器處理。
+劇本語料與詞彙表使用伺服器上載入的版本（--corpus / --phrases）。
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from translator_core.config import config_from_dict, config_to_dict
+from translator_core.engine import (
+    CaptureCancelled, Pipeline, TranslationEngine, capture_region, check_cancelled
+)
+from translator_core.lazy import lazy_import
+from translator_core.ocr_cache import image_fingerprint
+from translator_core.scaling import TextScaler
+from translator_core.translation import TranslationUnavailable
+
+np = lazy_import('numpy')
+
+DEFAULT_PORT = 7373
+
+MAGIC = b'GT'
+PROTOCOL_VERSION = 1
+
+# magic、版本、類型、請求編號、內容長度
+HEADER = struct.Struct('!2sBBII')
+# 寬、高、色版數、編碼
+FRAME_HEADER = struct.Struct('!HHBB')
+
+MSG_CONFIG = 1
+MSG_FRAME = 2
+MSG_RESULT = 3
+MSG_ERROR = 4
+
+ENCODING_FULL = 0
+ENCODING_DELTA = 1
+
+# zlib 壓縮等級（1 最快；畫面大多是單色背景，壓縮率已經足夠）
+COMPRESSION_LEVEL = 1
+
+# 單一訊息的內容上限，超過視為協定錯誤
+MAX_PAYLOAD = 64 * 1024 * 1024
+
+# 連線中斷後重新連線前的等待（秒）
+RECONNECT_DELAY = 2.0
+
+
+class ProtocolError(Exception):
+    """收到格式錯誤或版本不符的訊息"""
+
+
+def parse_address(address, default_port=DEFAULT_PORT):
+    """'host:port' 或 'host' 轉為 (host, port)"""
+    address = address.strip()
+    if ':' not in address:
+        return address, default_port
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def send_message(sock, kind, request_id, payload=b''):
+    sock.sendall(HEADER.pack(MAGIC, PROTOCOL_VERSION, kind, request_id, len(payload)) + payload)
+
+
+def read_message(stream):
+    """讀取一則訊息，回傳 (類型, 請求編號, 內容)；連線結束時回傳 None"""
+    header = stream.read(HEADER.size)
+    if not header:
+        return None
+    if len(header) < HEADER.size:
+        raise ProtocolError("連線在訊息標頭中斷")
+    magic, version, kind, request_id, length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ProtocolError("不是翻譯伺服器的協定")
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"協定版本不符（{version}，需要 {PROTOCOL_VERSION}）")
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"訊息過大 ({length} bytes)")
+    payload = stream.read(length)
+    if len(payload) < length:
+        raise ProtocolError("連線在訊息內容中斷")
+    return kind, request_id, payload
+
+
+class FrameEncoder:
+    """畫面編碼（同大小的連續畫面送 XOR 差異）"""
+
+    def __init__(self):
+        self.previous = None
+
+    def encode(self, image):
+        array = np.ascontiguousarray(np.asarray(image, dtype=np.uint8))
+        height, width = array.shape[:2]
+        channels = 1 if array.ndim == 2 else array.shape[2]
+        previous = self.previous
+        if previous is not None and previous.shape == array.shape:
+            encoding, data = ENCODING_DELTA, np.bitwise_xor(array, previous)
+        else:
+            encoding, data = ENCODING_FULL, array
+        self.previous = array
+        header = FRAME_HEADER.pack(width, height, channels, encoding)
+        return header + zlib.compress(data.tobytes(), COMPRESSION_LEVEL)
+
+
+class FrameDecoder:
+    """FrameEncoder 的解碼端（每個連線一個）"""
+
+    def __init__(self):
+        self.previous = None
+
+    def decode(self, payload):
+        width, height, channels, encoding = FRAME_HEADER.unpack_from(payload)
+        try:
+            raw = zlib.decompress(payload[FRAME_HEADER.size:])
+        except zlib.error as e:
+            raise ProtocolError(f"畫面解壓縮失敗: {e}") from e
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        if len(raw) != height * width * channels:
+            raise ProtocolError("畫面大小與內容不符")
+        array = np.frombuffer(raw, dtype=np.uint8).reshape(shape)
+
+        if encoding == ENCODING_DELTA:
+            if self.previous is None or self.previous.shape != shape:
+                raise ProtocolError("收到差異畫面，但沒有可對照的上一張畫面")
+            array = np.bitwise_xor(array, self.previous)
+        elif encoding != ENCODING_FULL:
+            raise ProtocolError(f"未知的畫面編碼: {encoding}")
+        self.previous = array
+        return array
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.translation_server.serve_client(self.request, self.rfile)
+
+
+class _TcpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class TranslationServer:
+    """翻譯伺服器：每個連線一個執行緒收發，識別與翻譯在共用的工作執行緒池中進行"""
+
+    def __init__(self, engine, host='127.0.0.1', port=DEFAULT_PORT, workers=None):
+        self.engine = engine
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='remote-worker')
+        self.tcp = _TcpServer((host, port), _Handler)
+        self.tcp.translation_server = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.tcp.server_address[:2]
+
+    def serve_forever(self):
+        self.tcp.serve_forever()
+
+    def start(self):
+        """在背景執行緒開始服務"""
+        self._thread = threading.Thread(target=self.serve_forever, name='translation-server', daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self.tcp.shutdown()
+        self.tcp.server_close()
+        self.pool.shutdown(wait=False)
+
+    def serve_client(self, sock, stream):
+        """處理一個連線直到用戶端斷線"""
+        metrics = self.engine.metrics
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        metrics.count('remote_clients')
+        decoder = FrameDecoder()
+        scaler = TextScaler()   # 各連線的放大倍率分開，不同用戶端的相同區域座標互不影響
+        pipeline = None
+        last_text = None
+
+        while True:
+            try:
+                message = read_message(stream)
+            except (ProtocolError, OSError) as e:
+                print(f"遠端連線錯誤: {e}")
+                break
+            if message is None:
+                break
+            kind, request_id, payload = message
+
+            try:
+                if kind == MSG_CONFIG:
+                    config = config_from_dict(json.loads(payload))
+                    pipeline = Pipeline(self.engine, config, pipeline, scaler=scaler)
+                    if pipeline.resets_text:
+                        last_text = None
+                    continue
+                if kind != MSG_FRAME:
+                    raise ProtocolError(f"未知的訊息類型: {kind}")
+                if pipeline is None:
+                    raise ProtocolError("尚未收到管線設定")
+
+                frame = decoder.decode(payload)
+                metrics.count('remote_frames')
+                reply = self.pool.submit(self.process_frame, frame, pipeline, last_text).result()
+                if reply['status'] in ('translated', 'low_confidence'):
+                    last_text = reply['text']
+                send_message(sock, MSG_RESULT, request_id, json.dumps(reply, ensure_ascii=False).encode('utf-8'))
+            except ProtocolError as e:
+                send_message(sock, MSG_ERROR, request_id, str(e).encode('utf-8'))
+                break
+            except OSError:
+                break
+            except Exception as e:
+                metrics.error('remote', e)
+                send_message(sock, MSG_ERROR, request_id, f"{type(e).__name__}: {e}".encode('utf-8'))
+
+    def process_frame(self, frame, pipeline, last_text):
+        """識別並翻譯一張畫面（於工作執行緒池執行），回傳結果字典
+
+        status 為 'empty'（無文字）、'duplicate'（與上一句相同）、'low_confidence'、
+        'translated' 或 'unavailable'（翻譯服務中斷，translation 為說明訊息）。
+        """
+        engine = self.engine
+        config = pipeline.config
+        result = engine.process(frame, pipeline)
+        if not result or not result['text']:
+            return {'status': 'empty'}
+
+        reply = {
+            'text': result['text'],
+            'language': result['language'],
+            'confidence': result['confidence']
+        }
+        if result['text'] == last_text:
+            reply['status'] = 'duplicate'
+        elif not engine.accept(result, config):
+            reply['status'] = 'low_confidence'
+        else:
+            try:
+                reply['translation'] = engine.translate_recognized(result, config)
+                reply['status'] = 'translated'
+            except TranslationUnavailable as e:
+                reply['translation'] = str(e)
+                reply['status'] = 'unavailable'
+        return reply
+
+
+class RemoteCaptureClient:
+    """在遊戲電腦上擷取畫面並交給翻譯伺服器處理
+
+    介面與 TranslationEngine.run 相同，可直接交給 CaptureSession；管線設定、
+    效能統計與歷史記錄使用本機的 engine。
+    """
+
+    def __init__(self, engine, address, timeout=30.0):
+        self.engine = engine
+        self.metrics = engine.metrics
+        self.address = parse_address(address) if isinstance(address, str) else tuple(address)
+        self.timeout = timeout
+        self._sock = None
+        self._stream = None
+        self._encoder = None
+        self._request_id = 0
+
+    def connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._stream = sock.makefile('rb')
+        # 伺服器的解碼狀態跟著連線，重新連線後先送完整畫面
+        self._encoder = FrameEncoder()
+        self.metrics.count('remote_connects')
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._stream.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._stream = None
+
+    def send_config(self, config):
+        payload = json.dumps(config_to_dict(config), ensure_ascii=False).encode('utf-8')
+        send_message(self._sock, MSG_CONFIG, 0, payload)
+
+    def request(self, image):
+        """送出一張畫面並等待結果"""
+        self._request_id = (self._request_id + 1) & 0xFFFFFFFF
+        with self.metrics.stage('remote_encode'):
+            payload = self._encoder.encode(image)
+        self.metrics.count('remote_bytes', len(payload))
+
+        with self.metrics.stage('remote_roundtrip'):
+            send_message(self._sock, MSG_FRAME, self._request_id, payload)
+            message = read_message(self._stream)
+        if message is None:
+            raise ProtocolError("伺服器已關閉連線")
+        kind, request_id, payload = message
+        if kind == MSG_ERROR:
+            raise RuntimeError(f"伺服器錯誤: {payload.decode('utf-8', 'replace')}")
+        if kind != MSG_RESULT or request_id != self._request_id:
+            raise ProtocolError("收到不對應的回覆")
+        return json.loads(payload)
+
+    def run(self, cancel, on_result, on_preview=None, on_low_confidence=None):
+        """擷取循環：只把有變化的畫面送到伺服器，回呼方式與 TranslationEngine.run 相同"""
+        metrics = self.metrics
+        sent_version = None
+        last_fingerprint = None
+
+        try:
+            while not cancel.is_set():
+                config = self.engine.config.current
+                loop_start = time.perf_counter()
+                try:
+                    if self._sock is None:
+                        self.connect()
+                        sent_version = None
+                    if sent_version != config.version:
+                        self.send_config(config)
+                        sent_version = config.version
+                        last_fingerprint = None
+
+                    with metrics.stage('capture'):
+                        screenshot = capture_region(config.region)
+                    metrics.count('frames')
+                    check_cancelled(cancel)
+                    if on_preview:
+                        on_preview(screenshot)
+
+                    # 畫面沒有變化時不送出（伺服器也只會回覆同一句）
+                    with metrics.stage('change_gate'):
+                        fingerprint = image_fingerprint(screenshot)
+                    if fingerprint == last_fingerprint:
+                        metrics.count('unchanged_frames')
+                    else:
+                        reply = self.request(screenshot)
+                        check_cancelled(cancel)
+                        last_fingerprint = fingerprint
+                        # 翻譯服務中斷時同一畫面之後要重送
+                        if reply['status'] == 'unavailable':
+                            last_fingerprint = None
+                        self.dispatch(reply, screenshot, config, on_result, on_low_confidence)
+
+                except CaptureCancelled:
+                    metrics.count('cancelled_frames')
+                    break
+                except (OSError, ProtocolError) as e:
+                    metrics.error('remote', e)
+                    print(f"翻譯伺服器連線錯誤: {e}")
+                    self.close()
+                    cancel.wait(RECONNECT_DELAY)
+                except Exception as e:
+                    metrics.error('capture_loop', e)
+                    print(f"擷取錯誤: {e}")
+
+                metrics.observe('loop', time.perf_counter() - loop_start)
+                cancel.wait(config.interval)
+        finally:
+            self.close()
+
+    def dispatch(self, reply, screenshot, config, on_result, on_low_confidence):
+        """依伺服器回覆的狀態計數並呼叫回呼（與本機擷取循環一致）"""
+        metrics = self.metrics
+        status = reply['status']
+        if status == 'empty':
+            metrics.count('empty_frames')
+            return
+        if status == 'duplicate':
+            metrics.count('duplicate_frames')
+            return
+
+        result = {key: reply[key] for key in ('text', 'language', 'confidence')}
+        if status == 'low_confidence':
+            metrics.count('low_confidence_frames')
+            if on_low_confidence:
+                on_low_confidence(result)
+            return
+
+        translation = reply['translation']
+        if status == 'unavailable':
+            metrics.count('failed_translations')
+        else:
+            self.engine.record(result, translation)
+            metrics.count('translations')
+        on_result(screenshot, result, translation)
+
+
+def main():
+    from translator_core.corpus import load_corpus
+    from translator_core.phrases import load_phrase_table
+
+    parser = argparse.ArgumentParser(description="遊戲翻譯伺服器（預處理、OCR 與翻譯）")
+    parser.add_argument('--host', default='127.0.0.1', help="監聽位址（區網連線請用 0.0.0.0）")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=0, help="同時處理的畫面數（0 為核心數的一半）")
+    parser.add_argument('--easyocr', nargs='*', metavar='LANG', help="載入 EasyOCR（語言代碼）")
+    parser.add_argument('--corpus', help="劇本語料索引檔 (.corpus)")
+    parser.add_argument('--phrases', help="詞彙表索引檔 (.phrases)")
+    args = parser.parse_args()
+
+    engine = TranslationEngine()
+    if args.easyocr:
+        engine.load_easyocr(args.easyocr)
+    if args.corpus:
+        engine.corpus = load_corpus(args.corpus)
+    if args.phrases:
+        engine.translation.phrases = load_phrase_table(args.phrases)
+
+    server = TranslationServer(engine, args.host, args.port, args.workers or None)
+    host, port = server.address
+    print(f"翻譯伺服器 {host}:{port}，工作執行緒 {server.workers}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        counters = engine.metrics.snapshot()['counters']
+        print(f"已處理 {counters.get('remote_frames', 0)} 張畫面，{counters.get('remote_clients', 0)} 個連線")
+
+
+if __name__ == '__main__':
+    main()
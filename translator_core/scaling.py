@@ -0,0 +1,107 @@
+"""依文字高度選擇預處理放大倍率
+
+預處理原本固定放大 2 倍，畫素數變成 4 倍；遊戲文字本來就有 40 像素高時，
+Tesseract 在原尺寸甚至縮小後一樣準確，卻要多花數倍時間。Tesseract 在字高
+約 32 像素（TARGET_TEXT_HEIGHT）時效果最好，這裡估計擷取區域的字高，選擇讓文字落在這個高度的倍率：
+
+- 第一次：灰階二值化後取連通元件，以較高的元件（完整的字，而不是偏旁或筆畫）
+  的高度估計字高
+- 之後：以 OCR 結果的單字邊框高度校正
+
+倍率只取幾個固定值，並依擷取區域快取，同一區域不必每張畫面重新估計。
+"""
+import math
+
+from translator_core.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Tesseract 最適合的字高（像素）
+TARGET_TEXT_HEIGHT = 32
+
+# 可選的倍率，避免估計值的小幅變動造成倍率頻繁改變
+SCALE_STEPS = (0.5, 0.75, 1.0, 1.5, 2.0, 2.5, 3.0)
+
+# 估計字高至少需要的連通元件數
+MIN_COMPONENTS = 5
+
+# 取元件高度的百分位數：中日文的字常拆成數個元件，較高的元件才是整個字
+HEIGHT_PERCENTILE = 80
+
+
+def find_glyphs(image):
+    """二值化後找出像文字的連通元件，回傳 (標籤影像, 元件編號陣列, 元件高度陣列)"""
+    img = np.asarray(image)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    # 文字是前景，通常比背景少；亮字暗底與暗字亮底都轉成白字
+    if np.count_nonzero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+
+    _, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+
+    # 排除雜點、框線與整塊背景
+    keep = (
+        (heights >= 4) & (areas >= 6) &
+        (heights <= gray.shape[0] * 0.8) &
+        (widths <= heights * 4)
+    )
+    return labels, np.flatnonzero(keep) + 1, heights[keep]
+
+
+def estimate_text_height(image):
+    """以連通元件估計擷取畫面（PIL 圖片或 RGB 陣列）中的字高，無法估計時回傳 None"""
+    _, _, heights = find_glyphs(image)
+    if len(heights) < MIN_COMPONENTS:
+        return None
+    return float(np.percentile(heights, HEIGHT_PERCENTILE))
+
+
+def choose_scale(text_height, target=TARGET_TEXT_HEIGHT):
+    """讓字高最接近目標的倍率（以對數距離比較）"""
+    ideal = math.log(target / text_height)
+    return min(SCALE_STEPS, key=lambda step: abs(math.log(step) - ideal))
+
+
+class TextScaler:
+    """各擷取區域目前使用的放大倍率"""
+
+    def __init__(self, target=TARGET_TEXT_HEIGHT):
+        self.target = target
+        self._scales = {}
+
+    def scale_for(self, region, image):
+        """取得區域的倍率；尚未決定時從畫面估計，估計不出來時回傳 None（使用預設倍率）"""
+        scale = self._scales.get(region)
+        if scale is None:
+            height = estimate_text_height(image)
+            if height is None:
+                return None
+            scale = choose_scale(height, self.target)
+            self._scales[region] = scale
+        return scale
+
+    def observe(self, region, scale, words):
+        """以 OCR 單字邊框（預處理後的座標）校正倍率，倍率改變時回傳 True"""
+        if not len(words):
+            return False
+        height = float(np.median(words.height)) / scale
+        if height <= 0:
+            return False
+        corrected = choose_scale(height, self.target)
+        if corrected == self._scales.get(region):
+            return False
+        self._scales[region] = corrected
+        return True
+
+    def reset(self, region=None):
+        """清除倍率快取（區域內容改變時使用）"""
+        if region is None:
+            self._scales.clear()
+        else:
+            self._scales.pop(region, None)
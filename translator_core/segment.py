@@ -0,0 +1,63 @@
+"""OCR 文字的句子切分
+
+對話框常常只有最後一句改變；整段當成一個快取鍵時整段都會重新翻譯。
+這裡把文字依行與句尾切成片段，每個片段各自查快取，並記住片段之間的
+分隔，翻譯後可以依原本的分行組回。
+
+切分規則依文字種類而定：
+- 中日文：。！？… 等全形句尾（含其後的右引號、右括號）
+- 韓文：句尾標點，以及 습니다、어요、세요 等常見終結語尾後接空白
+- 拉丁文字：. ! ? 後接空白（小數點與 Mr. 等稱謂縮寫不切）
+"""
+import re
+
+# 句尾標點後可能接的右引號、右括號
+_CLOSERS = '」』）)〕】》"\'”’'
+
+# 中日文句尾
+_CJK_END = rf'[。！？!?．…]+[{_CLOSERS}]*'
+
+# 拉丁文字句尾：標點後必須接空白或行尾，常見稱謂縮寫不切
+_ABBREVIATIONS = ('Mr', 'Mrs', 'Ms', 'Dr', 'St', 'vs', 'No')
+_NOT_ABBREVIATION = ''.join(rf'(?<!\b{word})' for word in _ABBREVIATIONS)
+_LATIN_END = rf'(?:[!?]|{_NOT_ABBREVIATION}\.)[.!?]*[{_CLOSERS}]*(?=\s|$)'
+
+# 韓文常見的終結語尾（沒有標點時也視為句尾），後面必須接空白
+_KOREAN_END = r'(?:습니다|니다|습니까|니까|세요|어요|아요|에요|예요|해요|네요|군요|지요|죠)(?=\s)'
+
+_SENTENCE = re.compile(rf'\S.*?(?:{_CJK_END}|{_LATIN_END}|{_KOREAN_END}|$)')
+
+# 譯文不以空白分隔句子的目標語言
+SPACELESS_LANGUAGES = {'zh-tw', 'zh-cn', 'ja', 'th'}
+
+
+def split_segments(text):
+    """切分文字，回傳 (片段列表, 分隔列表)；分隔列表比片段少一個，'\\n' 表示換行"""
+    segments = []
+    separators = []
+
+    for line in text.split('\n'):
+        sentences = [s.strip() for s in _SENTENCE.findall(line)]
+        sentences = [s for s in sentences if s]
+        if not sentences:
+            continue
+        if segments:
+            separators.append('\n')
+        segments.append(sentences[0])
+        for sentence in sentences[1:]:
+            separators.append(' ')
+            segments.append(sentence)
+
+    return segments, separators
+
+
+def join_segments(segments, separators, language):
+    """依原本的分隔組回譯文；同一行內的句子依目標語言決定是否以空白分隔"""
+    if not segments:
+        return ''
+    inline = '' if language in SPACELESS_LANGUAGES else ' '
+    parts = [segments[0]]
+    for separator, segment in zip(separators, segments[1:]):
+        parts.append(separator if separator == '\n' else inline)
+        parts.append(segment)
+    return ''.join(parts)
@@ -0,0 +1,77 @@
+"""擷取工作階段：同一時間只執行一個擷取循環
+
+每次開始都建立新的取消事件，停止時設定事件並（可選擇）等待工作執行緒結束。
+舊的循環只看自己的事件，快速切換開始/停止時不會因為共用旗標又被「喚醒」；
+新的工作執行緒先等舊的結束才開始循環，因此不會同時跑兩個循環，開始時也不會
+卡住介面執行緒。擷取循環在各階段之間檢查取消事件，停止期間完成的
+OCR 或翻譯結果直接丟棄；停止延遲記錄在效能統計的 stop_latency 階段。
+"""
+import threading
+import time
+
+
+class CaptureSession:
+    """管理唯一的擷取工作執行緒"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._thread = None
+        self._cancel = None
+        self._stop_requested = {}  # 取消事件 → 要求停止的時間
+        self._lock = threading.Lock()
+
+    @property
+    def is_running(self):
+        """擷取循環是否執行中（已要求停止的不算）"""
+        thread = self._thread
+        return thread is not None and thread.is_alive() and not self._cancel.is_set()
+
+    def start(self, on_result, on_preview=None, on_low_confidence=None, on_stopped=None):
+        """開始擷取；已在執行時不重複啟動，回傳是否啟動了新的循環
+
+        on_stopped(停止延遲秒數) 在工作執行緒結束時呼叫（於工作執行緒中執行）。
+        """
+        with self._lock:
+            if self.is_running:
+                return False
+
+            # 前一個循環已被取消，但可能還在完成目前的階段；由新的工作執行緒等它結束
+            previous = self._thread
+
+            cancel = threading.Event()
+            self._cancel = cancel
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(previous, cancel, on_result, on_preview, on_low_confidence, on_stopped),
+                name='capture-session',
+                daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self, wait=True, timeout=None):
+        """要求停止；wait 為 True 時等待工作執行緒結束，回傳是否已結束"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return True
+            if not self._cancel.is_set():
+                self._stop_requested[self._cancel] = time.perf_counter()
+                self._cancel.set()
+
+        if wait and thread is not threading.current_thread():
+            thread.join(timeout)
+        return not thread.is_alive()
+
+    def _run(self, previous, cancel, on_result, on_preview, on_low_confidence, on_stopped):
+        try:
+            if previous is not None:
+                previous.join()
+            self.engine.run(cancel, on_result, on_preview, on_low_confidence)
+        finally:
+            with self._lock:
+                requested = self._stop_requested.pop(cancel, None)
+            latency = time.perf_counter() - requested if requested is not None else 0.0
+            self.engine.metrics.observe('stop_latency', latency)
+            if on_stopped:
+                on_stopped(latency)
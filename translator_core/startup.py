@@ -0,0 +1,108 @@
+"""啟動時間量測工具
+
+在獨立子程序中分別量測各入口腳本（不執行 main）與各重量級模組的匯入時間，
+入口腳本超過預算時以非零狀態結束，可放在 CI 或發佈前檢查。
+
+    python -m translator_core.startup [--budget 0.5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_SCRIPTS = [
+    'game-korean-translator.py',
+    'game-translator-enhanced.py',
+    'multilingual-game-translator.py',
+]
+
+HEAVY_MODULES = [
+    'numpy',
+    'cv2',
+    'pytesseract',
+    'googletrans',
+    'pyautogui',
+    'keyboard',
+    'easyocr',
+]
+
+_SCRIPT_PROBE = """
+import importlib.util, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('entry', {path!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+print(time.perf_counter() - start)
+"""
+
+_MODULE_PROBE = """
+import time
+start = time.perf_counter()
+import {name}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code, timeout=120):
+    """在新的直譯器中執行量測程式，回傳 (秒數, 錯誤訊息)"""
+    try:
+        result = subprocess.run(
+            [sys.executable, '-c', code],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            cwd=ROOT
+        )
+    except subprocess.TimeoutExpired:
+        return None, 'timeout'
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return None, lines[-1] if lines else f'exit {result.returncode}'
+    return float(result.stdout.strip().splitlines()[-1]), None
+
+
+def measure_script(script):
+    return measure(_SCRIPT_PROBE.format(root=ROOT, path=os.path.join(ROOT, script)))
+
+
+def measure_module(name):
+    return measure(_MODULE_PROBE.format(name=name))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="量測入口腳本與重量級模組的匯入時間")
+    parser.add_argument('--budget', type=float, default=0.5,
+                        help="入口腳本匯入時間上限（秒）")
+    args = parser.parse_args(argv)
+
+    over_budget = []
+
+    print("入口腳本匯入時間:")
+    for script in ENTRY_SCRIPTS:
+        seconds, error = measure_script(script)
+        if error:
+            print(f"  {script:<36} 無法量測 ({error})")
+            continue
+        mark = 'OK' if seconds <= args.budget else '超出預算'
+        print(f"  {script:<36} {seconds * 1000:8.1f} ms  {mark}")
+        if seconds > args.budget:
+            over_budget.append(script)
+
+    print("\n重量級模組匯入時間 (延遲載入):")
+    for name in HEAVY_MODULES:
+        seconds, error = measure_module(name)
+        if error:
+            print(f"  {name:<36} 未安裝或無法載入 ({error})")
+        else:
+            print(f"  {name:<36} {seconds * 1000:8.1f} ms")
+
+    if over_budget:
+        print(f"\n超出 {args.budget:.2f} 秒預算: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""大區域 OCR 的水平條帶切分
+
+全寬的聊天視窗或 4K 擷取放大 2 倍後是非常大的影像，單一 Tesseract 程序只能
+用一個核心慢慢處理。這裡以列投影找出文字行之間的空白間隔，把影像在間隔處
+切成數個高度相近的條帶，交給多個 Tesseract 程序同時識別（見 ocr.py）。
+只在空白處切開，每行文字完整落在某一條帶內，條帶上下保留一半的間隔作為邊距。
+"""
+import os
+
+from translator_core.lazy import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# 超過此畫素數（預處理後）才切分，小影像切分的額外程序成本不划算
+STRIP_MIN_PIXELS = 1_000_000
+
+# 視為行間空白的最少連續空白列數
+MIN_GUTTER = 6
+
+# 與背景亮度差超過此值的像素視為文字
+INK_THRESHOLD = 64
+
+
+def strip_workers():
+    """同時識別的條帶數上限"""
+    return max(1, os.cpu_count() or 1)
+
+
+def find_gutters(image):
+    """空白間隔的中心列，回傳 [(中心列, 間隔高度)]（不含影像上下緣的空白）"""
+    img = np.asarray(image)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+
+    # 背景亮度：取樣後的中位數（文字只佔少數像素）
+    background = int(np.median(gray[::8, ::8]))
+    # 每列的最亮與最暗值偏離背景即為有字的列（不必建立整張差值影像）
+    row_max = gray.max(axis=1).astype(np.int16)
+    row_min = gray.min(axis=1).astype(np.int16)
+    row_ink = (row_max - background > INK_THRESHOLD) | (background - row_min > INK_THRESHOLD)
+
+    ink_rows = np.flatnonzero(row_ink)
+    if len(ink_rows) < 2:
+        return []
+
+    # 相鄰有字列之間的距離大於 MIN_GUTTER 即為間隔
+    gaps = np.diff(ink_rows) - 1
+    starts = np.flatnonzero(gaps >= MIN_GUTTER)
+    return [
+        (int(ink_rows[i] + 1 + gaps[i] // 2), int(gaps[i]))
+        for i in starts
+    ]
+
+
+def split_strips(image, workers=None):
+    """把影像切成最多 workers 個條帶，回傳 [(y 起點, 條帶影像)]；不需切分時只有一個"""
+    img = np.asarray(image)
+    height = img.shape[0]
+    workers = workers or strip_workers()
+    if workers < 2 or img.shape[0] * img.shape[1] < STRIP_MIN_PIXELS:
+        return [(0, img)]
+
+    gutters = [center for center, _ in find_gutters(img)]
+    if not gutters:
+        return [(0, img)]
+
+    # 在最接近等分位置的間隔處切開，讓各條帶高度相近
+    cuts = set()
+    for k in range(1, min(workers, len(gutters) + 1)):
+        target = height * k / workers
+        available = [g for g in gutters if g not in cuts]
+        if not available:
+            break
+        cuts.add(min(available, key=lambda g: abs(g - target)))
+
+    bounds = [0] + sorted(cuts) + [height]
+    return [(top, img[top:bottom]) for top, bottom in zip(bounds, bounds[1:]) if bottom > top]
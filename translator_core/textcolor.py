@@ -0,0 +1,139 @@
+"""以文字顏色分離文字的快速預處理
+
+大部分遊戲的對話文字顏色固定（白字加描邊、彩色的說話者名稱），背景則是
+複雜的美術圖。進階預處理每張畫面都要對整張圖做 CLAHE、NL-means 去噪與 Otsu，
+這裡改為事先校正一次文字顏色：
+
+- 校正：使用者在目前畫面的文字筆畫上點幾下，取點選位置附近同色的像素
+  （或自動從像文字的連通元件取樣，見 scaling.find_glyphs），轉成 Lab 後以
+  k-means 分成最多 3 種顏色，各自記錄 Lab 範圍
+- 預處理：整張圖轉 Lab 後以 cv2.inRange 取出落在任一範圍內的像素，放大後
+  做一次開運算去除雜點，輸出白底黑字的二值圖
+
+顏色模型存在設定檔中，同一款遊戲只需校正一次。
+"""
+from dataclasses import dataclass
+
+from translator_core.lazy import lazy_import
+from translator_core.scaling import find_glyphs
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# 最多分出的文字顏色數
+MAX_COLORS = 3
+
+# 像素數少於此比例的顏色群視為雜訊
+MIN_CLUSTER_SHARE = 0.05
+
+# Lab 範圍在 2%–98% 百分位數之外再放寬的量
+COLOR_MARGIN = 8
+
+# k-means 最多使用的取樣像素數
+MAX_SAMPLES = 20000
+
+# 點選取樣：點選位置周圍的半徑（像素）與視為同色的 Lab 距離
+SAMPLE_RADIUS = 3
+SAMPLE_DISTANCE = 20
+
+
+@dataclass(frozen=True)
+class TextColorModel:
+    """文字顏色模型：各顏色在 Lab 空間（OpenCV 8 位元尺度）的範圍"""
+    ranges: tuple       # ((L 下限, a 下限, b 下限), (L 上限, a 上限, b 上限)) 的 tuple
+
+    def mask(self, image):
+        """文字像素為 255 的遮罩"""
+        lab = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2LAB)
+        mask = None
+        for lower, upper in self.ranges:
+            part = cv2.inRange(lab, np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8))
+            mask = part if mask is None else cv2.bitwise_or(mask, part)
+        return mask
+
+    def to_list(self):
+        return [[list(lower), list(upper)] for lower, upper in self.ranges]
+
+    @classmethod
+    def from_list(cls, ranges):
+        """從設定檔讀取，格式不符時回傳 None"""
+        try:
+            return cls(tuple(
+                (tuple(int(v) for v in lower), tuple(int(v) for v in upper))
+                for lower, upper in ranges
+            )) if ranges else None
+        except (TypeError, ValueError):
+            return None
+
+
+def sample_points(lab, points, radius=SAMPLE_RADIUS):
+    """點選位置附近與點選像素同色的像素（點在筆畫上，周圍可能是描邊或背景）"""
+    h, w = lab.shape[:2]
+    samples = []
+    for x, y in points:
+        if not (0 <= x < w and 0 <= y < h):
+            continue
+        window = lab[max(0, y - radius):y + radius + 1, max(0, x - radius):x + radius + 1].reshape(-1, 3)
+        distance = np.linalg.norm(window.astype(np.float32) - lab[y, x].astype(np.float32), axis=1)
+        samples.append(window[distance <= SAMPLE_DISTANCE])
+    return np.concatenate(samples) if samples else np.zeros((0, 3), dtype=np.uint8)
+
+
+def sample_glyphs(img, lab):
+    """自動取樣：像文字的連通元件內部的像素（適合背景單純的畫面）"""
+    labels, glyphs, _ = find_glyphs(img)
+    if not len(glyphs):
+        return np.zeros((0, 3), dtype=np.uint8)
+
+    glyph_mask = np.isin(labels, glyphs).astype(np.uint8)
+
+    # 只取筆畫內部，避開反鋸齒的邊緣與描邊
+    inner = cv2.erode(glyph_mask, np.ones((3, 3), np.uint8))
+    if np.count_nonzero(inner) >= np.count_nonzero(glyph_mask) // 4:
+        glyph_mask = inner
+    return lab[glyph_mask.astype(bool)]
+
+
+def calibrate_text_colors(image, points=None, max_colors=MAX_COLORS):
+    """學習擷取畫面中的文字顏色，取樣不到像素時回傳 None
+
+    points 為使用者在文字筆畫上點選的 (x, y) 列表；未提供時自動從像文字的
+    連通元件取樣（背景複雜時自動取樣容易取到背景，應改用點選）。
+    """
+    img = np.asarray(image)
+    lab = cv2.cvtColor(img, cv2.COLOR_RGB2LAB)
+    pixels = sample_points(lab, points) if points else sample_glyphs(img, lab)
+    pixels = pixels.astype(np.float32)
+    if len(pixels) < max_colors:
+        return None
+    if len(pixels) > MAX_SAMPLES:
+        pixels = pixels[np.random.default_rng(0).choice(len(pixels), MAX_SAMPLES, replace=False)]
+
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
+    _, assignment, _ = cv2.kmeans(pixels, max_colors, None, criteria, 3, cv2.KMEANS_PP_CENTERS)
+    assignment = assignment.ravel()
+
+    ranges = []
+    for cluster in range(max_colors):
+        members = pixels[assignment == cluster]
+        if len(members) < len(pixels) * MIN_CLUSTER_SHARE:
+            continue
+        lower = np.clip(np.percentile(members, 2, axis=0) - COLOR_MARGIN, 0, 255)
+        upper = np.clip(np.percentile(members, 98, axis=0) + COLOR_MARGIN, 0, 255)
+        ranges.append((tuple(int(v) for v in lower), tuple(int(v) for v in upper)))
+
+    return TextColorModel(tuple(ranges)) if ranges else None
+
+
+def color_mask_preprocess(image, model, scale=2):
+    """依文字顏色模型取出文字，輸出白底黑字的二值圖"""
+    mask = model.mask(image)
+
+    if scale != 1:
+        mask = cv2.resize(mask, None, fx=scale, fy=scale, interpolation=cv2.INTER_LINEAR)
+        _, mask = cv2.threshold(mask, 127, 255, cv2.THRESH_BINARY)
+
+    # 放大後筆畫至少 2 像素寬，開運算只去除與文字同色的零星背景像素
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((2, 2), np.uint8))
+
+    return cv2.bitwise_not(mask)
@@ -0,0 +1,160 @@
+"""翻譯服務與翻譯快取
+
+文字先切成句子片段（見 segment.py），各片段依序查詢遊戲詞彙表（見 phrases.py）
+與快取；未命中的片段以換行串成一次請求送出，回來後再依行拆開，因此只改了
+一句的對話框只會翻譯那一句。
+
+網路呼叫經過斷路器（見 breaker.py）；斷路器跳開時只使用詞彙表與快取，
+無法在本地完成的翻譯以 TranslationUnavailable 回報，失敗結果一律不寫入快取。
+"""
+import threading
+from collections import OrderedDict
+
+from translator_core.breaker import CircuitBreaker
+from translator_core.lazy import lazy_import
+from translator_core.metrics import Metrics
+from translator_core.segment import join_segments, split_segments
+
+googletrans = lazy_import('googletrans')
+
+# 單次翻譯請求的逾時（秒），避免網路異常時擷取循環長時間卡住
+TRANSLATE_TIMEOUT = 5.0
+
+
+class TranslationUnavailable(Exception):
+    """無法取得譯文（網路錯誤或斷路器跳開），訊息可直接顯示給使用者"""
+
+
+class TranslationCache:
+    """有容量上限的 LRU 翻譯快取，鍵為 (原文, 來源語言, 目標語言)"""
+
+    def __init__(self, max_size=5000):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text, src, dest):
+        key = (text, src, dest)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, text, src, dest, value):
+        key = (text, src, dest)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def update(self, pairs, src, dest):
+        """批次加入 (原文, 譯文)，例如從匯入的歷史記錄"""
+        for text, value in pairs:
+            self.put(text, src, dest, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TranslationService:
+    """Google 翻譯的包裝，先查快取再呼叫網路
+
+    translator 可替換網路翻譯器（需有 googletrans 的 translate(text, src=, dest=) 介面），
+    例如重播錄製檔時使用不連網的翻譯器；預設第一次使用時建立 googletrans 翻譯器。
+    """
+
+    def __init__(self, cache_size=5000, metrics=None, translator=None):
+        self.cache = TranslationCache(cache_size)
+        self.metrics = metrics or Metrics()
+        self.phrases = None  # 目前遊戲的詞彙表（PhraseTable）
+        self.breaker = CircuitBreaker()
+        self._translator = translator
+
+    @property
+    def translator(self):
+        """首次使用時才建立翻譯器"""
+        if self._translator is None:
+            self._translator = googletrans.Translator(timeout=TRANSLATE_TIMEOUT)
+        return self._translator
+
+    @translator.setter
+    def translator(self, translator):
+        """替換網路翻譯器（介面同 googletrans）"""
+        self._translator = translator
+
+    def lookup(self, text, src, dest):
+        """本地查詢：先查詞彙表（目標語言相符時），再查快取"""
+        phrases = self.phrases
+        if phrases is not None and phrases.target_language == dest:
+            value = phrases.lookup(text)
+            if value is not None:
+                self.metrics.count('phrase_hits')
+                return value
+        return self.cache.get(text, src, dest)
+
+    def translate(self, text, src, dest):
+        """翻譯文字；無法取得譯文時拋出 TranslationUnavailable（不寫入快取）"""
+        with self.metrics.stage('cache_lookup'):
+            # 整段命中（詞彙表或從歷史記錄匯入的譯文）時不必切分
+            cached = self.lookup(text, src, dest)
+            if cached is None:
+                segments, separators = split_segments(text)
+                translations = [self.lookup(segment, src, dest) for segment in segments]
+
+        if cached is not None:
+            self.metrics.count('cache_hits')
+            return cached
+
+        misses = list(dict.fromkeys(
+            segment for segment, translation in zip(segments, translations) if translation is None
+        ))
+        self.metrics.count('segments', len(segments))
+        self.metrics.count('cache_hits', len(segments) - len(misses))
+        self.metrics.count('cache_misses', len(misses))
+
+        if misses:
+            if not self.breaker.allow():
+                # 離線模式：能在本地翻譯的片段照常顯示，其餘保留原文
+                self.metrics.count('breaker_rejected')
+                partial = join_segments(
+                    [translation or segment for segment, translation in zip(segments, translations)],
+                    separators, dest
+                )
+                raise TranslationUnavailable(
+                    f"翻譯服務暫停中（{self.breaker.retry_in():.0f} 秒後重試），僅顯示快取內容:\n{partial}"
+                )
+
+            try:
+                with self.metrics.stage('translate'):
+                    translated = dict(zip(misses, self.translate_batch(misses, src, dest)))
+            except Exception as e:
+                self.breaker.record_failure()
+                self.metrics.error('translate', e)
+                raise TranslationUnavailable(f"翻譯錯誤: {str(e)}") from e
+            self.breaker.record_success()
+
+            for segment, value in translated.items():
+                self.cache.put(segment, src, dest, value)
+            translations = [
+                translation if translation is not None else translated[segment]
+                for segment, translation in zip(segments, translations)
+            ]
+
+        return join_segments(translations, separators, dest)
+
+    def translate_batch(self, segments, src, dest):
+        """以換行串接片段一次翻譯；譯文行數不符時改為逐句翻譯"""
+        if len(segments) > 1:
+            result = self.translator.translate('\n'.join(segments), src=src, dest=dest)
+            lines = result.text.split('\n')
+            if len(lines) == len(segments):
+                return [line.strip() for line in lines]
+            self.metrics.count('batch_fallbacks')
+
+        return [self.translator.translate(segment, src=src, dest=dest).text for segment in segments]
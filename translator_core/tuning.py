@@ -0,0 +1,300 @@
+"""Tesseract 設定自動調校
+
+每款遊戲的字型、字級與背景都不同，固定的 '--psm 6' 與 2 倍放大不一定是最佳組合。
+調校工具讀取一組樣本畫面與對應的正確文字，逐一嘗試頁面分割模式（PSM）、
+引擎模式（OEM）、放大倍率與預處理方案，量測每組設定的耗時與字元正確率，
+把達到正確率目標中最快的一組存成該遊戲的 OCR 設定檔（JSON）。
+
+載入設定檔後，單一語言 Tesseract 識別（single_language_ocr）與預處理都會
+依設定檔執行；設定檔的語言與目前識別語言不同時不套用。
+
+樣本目錄中每張圖片（.png / .jpg / .bmp）旁放一個同名的 .txt 作為正確文字：
+    samples/
+        menu.png    menu.txt
+        dialog1.png dialog1.txt
+
+用法：
+    python -m translator_core.tuning samples/ --lang jpn --game 遊戲名稱 --accuracy 0.95
+"""
+import argparse
+import itertools
+import json
+import os
+import re
+import statistics
+import time
+from dataclasses import asdict, dataclass, fields
+
+from translator_core import ocr
+from translator_core.corpus import levenshtein
+from translator_core.lazy import lazy_import
+from translator_core.preprocess import PREPROCESS_PROFILES, preprocess
+
+Image = lazy_import('PIL.Image')
+
+PROFILE_DIR = 'ocr_profiles'
+PROFILE_SUFFIX = '.json'
+
+# 擷取畫面的解析度約為 96 DPI，放大後告訴 Tesseract 對應的 DPI
+BASE_DPI = 96
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.bmp')
+
+# 預設的搜尋範圍
+DEFAULT_PSMS = (3, 4, 6, 7, 11)
+DEFAULT_OEMS = (1, 0)
+DEFAULT_SCALES = (1.0, 1.5, 2.0, 3.0)
+
+_WHITESPACE = re.compile(r'\s+')
+
+# tessedit_char_whitelist 不能包含空白與引號（pytesseract 以 shlex 切分設定字串）
+_WHITELIST_EXCLUDED = set('"\'\\')
+
+
+@dataclass(frozen=True)
+class OcrProfile:
+    """一款遊戲調校後的 Tesseract 設定"""
+    language: str                       # 調校時使用的 Tesseract 語言代碼
+    psm: int = 6
+    oem: int = 3
+    scale: float = 2.0                  # 預處理的放大倍率
+    preprocessing: str = 'advanced'     # 預處理方案
+    whitelist: str = ''                 # 允許的字元（空字串表示不限制）
+    accuracy: float = 0.0               # 調校時量得的字元正確率
+    latency_ms: float = 0.0             # 調校時量得的每張平均耗時
+
+    @property
+    def dpi(self):
+        return int(round(BASE_DPI * self.scale))
+
+    def tesseract_config(self):
+        """傳給 pytesseract 的設定字串"""
+        config = f'--psm {self.psm} --oem {self.oem} --dpi {self.dpi}'
+        if self.whitelist:
+            config += f' -c tessedit_char_whitelist={self.whitelist}'
+        return config
+
+    def preprocess(self, image):
+        return preprocess(image, self.preprocessing, self.scale)
+
+    def applies_to(self, language):
+        return language == self.language
+
+
+def profile_path(name):
+    """遊戲名稱對應的設定檔路徑"""
+    return os.path.join(PROFILE_DIR, name + PROFILE_SUFFIX)
+
+
+def save_ocr_profile(profile, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(asdict(profile), f, ensure_ascii=False, indent=2)
+
+
+def load_ocr_profile(path):
+    """讀取設定檔，檔案不存在或格式不符時回傳 None"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        names = {f.name for f in fields(OcrProfile)}
+        return OcrProfile(**{key: value for key, value in data.items() if key in names})
+    except (OSError, ValueError, TypeError) as e:
+        print(f"無法載入 OCR 設定檔: {e}")
+        return None
+
+
+def normalize_text(text, language):
+    """比對用的文字：不以空白分詞的語言去除所有空白，其餘合併連續空白"""
+    separator = ocr.word_separator(language)
+    return _WHITESPACE.sub(separator, text).strip()
+
+
+def character_whitelist(references):
+    """正確文字中出現過的字元（排序後串接）"""
+    chars = set(''.join(references)) - _WHITELIST_EXCLUDED
+    return ''.join(sorted(ch for ch in chars if not ch.isspace()))
+
+
+def read_samples(directory):
+    """讀取樣本目錄，回傳 [(名稱, PIL 圖片, 正確文字)]"""
+    samples = []
+    for filename in sorted(os.listdir(directory)):
+        stem, suffix = os.path.splitext(filename)
+        if suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        reference = os.path.join(directory, stem + '.txt')
+        if not os.path.exists(reference):
+            print(f"略過 {filename}：找不到 {stem}.txt")
+            continue
+        with open(reference, 'r', encoding='utf-8') as f:
+            text = f.read()
+        image = Image.open(os.path.join(directory, filename)).convert('RGB')
+        samples.append((stem, image, text))
+    return samples
+
+
+class Candidate:
+    """一組待評估的設定與量測結果"""
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.distance = 0
+        self.length = 0
+        self.latencies = []
+        self.error = None
+        self.aborted = False
+
+    @property
+    def accuracy(self):
+        return max(0.0, 1.0 - self.distance / self.length) if self.length else 0.0
+
+    @property
+    def latency_ms(self):
+        return statistics.mean(self.latencies) * 1000 if self.latencies else float('inf')
+
+
+def tune(samples, language, psms=DEFAULT_PSMS, oems=DEFAULT_OEMS, scales=DEFAULT_SCALES,
+         profiles=tuple(PREPROCESS_PROFILES), whitelist=False, accuracy_target=0.95,
+         repeat=1, progress=None):
+    """評估所有設定組合，回傳 (最佳 Candidate, 全部 Candidate 列表)
+
+    最佳設定為正確率達標者中平均耗時最短的一組；都未達標時取正確率最高者。
+    耗時包含預處理與識別；已確定比目前最佳者慢的組合提前停止量測。
+    """
+    references = [normalize_text(text, language) for _, _, text in samples]
+    whitelists = ('', character_whitelist(references)) if whitelist else ('',)
+
+    # 預處理結果與耗時只依方案與倍率而定，先算好供各組 PSM/OEM 共用
+    prepared = {}
+    for profile_name, scale in itertools.product(profiles, scales):
+        images = []
+        for _, image, _ in samples:
+            start = time.perf_counter()
+            processed = preprocess(image, profile_name, scale)
+            images.append((processed, time.perf_counter() - start))
+        prepared[(profile_name, scale)] = images
+
+    combos = list(itertools.product(profiles, scales, psms, oems, whitelists))
+    candidates = []
+    best = None
+
+    for index, (profile_name, scale, psm, oem, chars) in enumerate(combos, 1):
+        candidate = Candidate(OcrProfile(
+            language=language, psm=psm, oem=oem, scale=scale,
+            preprocessing=profile_name, whitelist=chars
+        ))
+        config = candidate.profile.tesseract_config()
+        budget = best.latency_ms * len(samples) / 1000 if best is not None else float('inf')
+        elapsed = 0.0
+
+        for (processed, prep_time), reference in zip(prepared[(profile_name, scale)], references):
+            try:
+                times = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    result = ocr.tesseract_ocr(processed, language, config)
+                    times.append(time.perf_counter() - start)
+            except Exception as e:
+                # 例如 OEM 0 需要舊版引擎的語言資料
+                candidate.error = str(e).strip().splitlines()[-1] if str(e).strip() else repr(e)
+                break
+
+            latency = prep_time + min(times)
+            candidate.latencies.append(latency)
+            candidate.distance += levenshtein(reference, normalize_text(result['text'], language))
+            candidate.length += max(len(reference), 1)
+
+            elapsed += latency
+            if elapsed > budget:
+                candidate.aborted = True
+                break
+
+        candidates.append(candidate)
+        if candidate.error is None and not candidate.aborted and candidate.accuracy >= accuracy_target:
+            if best is None or candidate.latency_ms < best.latency_ms:
+                best = candidate
+
+        if progress:
+            progress(index, len(combos), candidate)
+
+    if best is None:
+        finished = [c for c in candidates if c.error is None and not c.aborted]
+        if finished:
+            best = max(finished, key=lambda c: (c.accuracy, -c.latency_ms))
+
+    return best, candidates
+
+
+def _describe(candidate):
+    p = candidate.profile
+    name = f"{p.preprocessing:<8} x{p.scale:<4} psm {p.psm:<2} oem {p.oem}{' 白名單' if p.whitelist else ''}"
+    if candidate.error:
+        return f"{name}  錯誤: {candidate.error}"
+    if candidate.aborted:
+        return f"{name}  較慢，已略過"
+    return f"{name}  正確率 {candidate.accuracy:.1%}  {candidate.latency_ms:.0f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="以樣本畫面調校遊戲的 Tesseract 設定")
+    parser.add_argument('samples', help="樣本目錄（圖片與同名 .txt 正確文字）")
+    parser.add_argument('--lang', required=True, help="Tesseract 語言代碼，例如 jpn、kor")
+    parser.add_argument('--game', help="遊戲名稱（預設為樣本目錄名稱）")
+    parser.add_argument('--output', help="設定檔路徑（預設為 ocr_profiles/<遊戲名稱>.json）")
+    parser.add_argument('--accuracy', type=float, default=0.95, help="字元正確率目標（預設 0.95）")
+    parser.add_argument('--psm', type=int, nargs='+', default=DEFAULT_PSMS)
+    parser.add_argument('--oem', type=int, nargs='+', default=DEFAULT_OEMS)
+    parser.add_argument('--scale', type=float, nargs='+', default=DEFAULT_SCALES)
+    parser.add_argument('--preprocessing', nargs='+', default=list(PREPROCESS_PROFILES),
+                        choices=list(PREPROCESS_PROFILES))
+    parser.add_argument('--whitelist', action='store_true', help="另外嘗試以正確文字的字元集作為白名單")
+    parser.add_argument('--repeat', type=int, default=1, help="每張樣本量測次數（取最快一次）")
+    args = parser.parse_args()
+
+    samples = read_samples(args.samples)
+    if not samples:
+        parser.error("樣本目錄中沒有可用的圖片與正確文字")
+
+    game = args.game or os.path.basename(os.path.normpath(args.samples))
+    output = args.output or profile_path(game)
+
+    def progress(index, total, candidate):
+        print(f"[{index}/{total}] {_describe(candidate)}")
+
+    best, candidates = tune(
+        samples, args.lang, psms=args.psm, oems=args.oem, scales=args.scale,
+        profiles=args.preprocessing, whitelist=args.whitelist,
+        accuracy_target=args.accuracy, repeat=args.repeat, progress=progress
+    )
+    if best is None:
+        print("沒有任何設定成功完成識別")
+        return
+
+    if best.accuracy < args.accuracy:
+        print(f"沒有設定達到 {args.accuracy:.0%} 正確率，改用正確率最高的設定")
+
+    default = next((
+        c for c in candidates
+        if c.profile.psm == 6 and c.profile.scale == 2.0 and c.profile.preprocessing == 'advanced'
+        and not c.profile.whitelist and not c.error and not c.aborted
+    ), None)
+
+    profile = OcrProfile(**dict(
+        asdict(best.profile), accuracy=round(best.accuracy, 4), latency_ms=round(best.latency_ms, 1)
+    ))
+    save_ocr_profile(profile, output)
+
+    print(f"\n最佳設定: {_describe(best)}")
+    print(f"Tesseract 設定: {profile.tesseract_config()}")
+    if default is not None:
+        print(f"原本的設定: {_describe(default)}")
+    print(f"已儲存 → {output}")
+
+
+if __name__ == '__main__':
+    main()
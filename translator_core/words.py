@@ -0,0 +1,142 @@
+"""Tesseract TSV 結果的欄位式表示
+
+image_to_data 的 TSV 輸出直接切成欄位陣列（信心度、邊框、區塊/段落/行編號），
+信心度統計與分行都用 numpy 向量運算完成，不再逐字呼叫 int()/float()。
+保留的單字邊框（預處理後影像的座標）可供後續階段重複使用。
+"""
+from translator_core.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# image_to_data TSV 欄位：level page_num block_num par_num line_num word_num left top width height conf text
+TSV_COLUMNS = 12
+WORD_LEVEL = 5
+
+
+class WordBoxes:
+    """單字層級的識別結果（每個欄位都是長度相同的陣列）"""
+
+    __slots__ = ('text', 'conf', 'left', 'top', 'width', 'height', 'block', 'par', 'line')
+
+    def __init__(self, text, conf, left, top, width, height, block, par, line):
+        self.text = text
+        self.conf = conf
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.block = block
+        self.par = par
+        self.line = line
+
+    def __len__(self):
+        return len(self.conf)
+
+    @classmethod
+    def empty(cls):
+        ints = np.zeros(0, dtype=np.int32)
+        return cls(np.zeros(0, dtype=object), np.zeros(0, dtype=np.float32), ints, ints, ints, ints, ints, ints, ints)
+
+    @classmethod
+    def concatenate(cls, parts):
+        """依序合併多個條帶的結果；parts 為 [(WordBoxes, 條帶的 y 位移)]
+
+        各條帶的區塊編號接續前一條帶，分行時不會把不同條帶的行合併。
+        """
+        parts = [(words, offset) for words, offset in parts if len(words)]
+        if not parts:
+            return cls.empty()
+
+        blocks = []
+        next_block = 0
+        for words, _ in parts:
+            blocks.append(words.block + next_block)
+            next_block += int(words.block.max()) + 1
+
+        def join(name):
+            return np.concatenate([getattr(words, name) for words, _ in parts])
+
+        return cls(
+            text=join('text'),
+            conf=join('conf'),
+            left=join('left'),
+            top=np.concatenate([words.top + offset for words, offset in parts]),
+            width=join('width'),
+            height=join('height'),
+            block=np.concatenate(blocks),
+            par=join('par'),
+            line=join('line')
+        )
+
+    @property
+    def boxes(self):
+        """N x 4 陣列 (left, top, right, bottom)"""
+        return np.stack([self.left, self.top, self.left + self.width, self.top + self.height], axis=1)
+
+    def mean_confidence(self):
+        return float(self.conf.mean()) if len(self) else 0.0
+
+    def line_starts(self):
+        """每一行第一個單字的索引"""
+        if not len(self):
+            return np.zeros(0, dtype=np.intp)
+        changed = (
+            (self.block[1:] != self.block[:-1]) |
+            (self.par[1:] != self.par[:-1]) |
+            (self.line[1:] != self.line[:-1])
+        )
+        return np.concatenate(([0], np.flatnonzero(changed) + 1))
+
+    def lines(self, separator=' '):
+        """依原始分行組合的文字列表"""
+        words = self.text.tolist()
+        starts = self.line_starts().tolist()
+        ends = starts[1:] + [len(words)]
+        return [separator.join(words[start:end]) for start, end in zip(starts, ends)]
+
+    def line_boxes(self):
+        """每一行的外框，N x 4 陣列 (left, top, right, bottom)"""
+        if not len(self):
+            return np.zeros((0, 4), dtype=np.int32)
+        starts = self.line_starts()
+        boxes = self.boxes
+        return np.concatenate([
+            np.minimum.reduceat(boxes[:, :2], starts),
+            np.maximum.reduceat(boxes[:, 2:], starts)
+        ], axis=1)
+
+    def text_block(self, separator=' '):
+        """保留換行的完整文字"""
+        return '\n'.join(self.lines(separator))
+
+
+def parse_tesseract_tsv(tsv, min_conf=0):
+    """把 image_to_data 的 TSV 字串轉為 WordBoxes，只保留信心度高於 min_conf 的單字"""
+    # 換行也當成欄位分隔，整份輸出一次切開後以步長取出各欄
+    fields = tsv.replace('\r', '').replace('\n', '\t').split('\t')[TSV_COLUMNS:]
+    rows = len(fields) // TSV_COLUMNS
+    if not rows:
+        return WordBoxes.empty()
+    fields = fields[:rows * TSV_COLUMNS]
+
+    # 文字與信心度欄取出後，其餘整數欄一次解析成 rows x 10 的矩陣
+    texts = fields[11::TSV_COLUMNS]
+    conf = np.fromstring(' '.join(fields[10::TSV_COLUMNS]), dtype=np.float32, sep=' ')
+    del fields[10::TSV_COLUMNS]
+    del fields[10::TSV_COLUMNS - 1]
+    table = np.fromstring(' '.join(fields), dtype=np.int32, sep=' ').reshape(rows, TSV_COLUMNS - 2)
+
+    keep = (table[:, 0] == WORD_LEVEL) & (conf > min_conf)
+    table = table[keep]
+
+    return WordBoxes(
+        text=np.array(texts, dtype=object)[keep],
+        conf=conf[keep],
+        left=table[:, 6],
+        top=table[:, 7],
+        width=table[:, 8],
+        height=table[:, 9],
+        block=table[:, 2],
+        par=table[:, 3],
+        line=table[:, 4]
+    )